@@ -1,4 +1,8 @@
 import os
+import json
+import time
+import argparse
+import multiprocessing
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
@@ -9,94 +13,519 @@ import numpy as np
 plt.rcParams.update({'font.size': 12})  # fonte maior
 root_dir = os.getcwd()
 modo_graficos = "separado"  # opções: "junto" ou "separado"
+resultados_path = os.path.join(root_dir, "resultados.jsonl")  # gerado pelo run.py
+cache_path = os.path.join(root_dir, "analise_cache.json")
 
-results = []
+# Incrementar quando a leitura dos arquivos mudar, invalidando caches antigos
+CACHE_VERSION = 3
+# Arquivos de uma execução cujo estado (mtime e tamanho) define se ela precisa ser relida
+ARQUIVOS_EXECUCAO = ("res_resumo.jsonl", "debug.txt", "res_ciclos.csv", "res.csv")
 
 # -------------------------------------------------------------
 # COLETA DE DADOS
 # -------------------------------------------------------------
-for n_dir in sorted([d for d in os.listdir(root_dir) if d.startswith("n") and os.path.isdir(d)]):
-    try:
-        total_nodes = int(n_dir[1:])
-    except:
-        continue
+# Cada execução (ou réplica) vira uma amostra:
+# [Total_Nodes, Fail_Prob, Convergiu, Tempo_Convergencia, Media_Ativos_Ciclo0,
+#  Maior_Componente_Final, Particionada, Diametro_Final, Ciclo_Ramificacao]
+# Maior_Componente_Final, Particionada e Diametro_Final só existem em execuções com
+# sc.py --connectivity, e Ciclo_Ramificacao em cenários ramificados de um aquecimento
+# (run.py --warmup); None nas demais
+
+def agregar(total_nodes, fail_prob, tempos, convergencias, media_ativos0, maiores=(), particionadas=(), diametros=(),
+            ramificacoes=()):
+    linha = {
+        "Total_Nodes": total_nodes,
+        "Fail_Prob": fail_prob,
+        "Convergiu_pct": np.mean(convergencias) * 100,
+        "Tempo_Convergencia_medio": np.mean(tempos) if tempos else np.nan,
+        "Tempo_Convergencia_std": np.std(tempos) if tempos else np.nan,
+        "Media_Ativos_Ciclo0_medio": np.mean(media_ativos0) if media_ativos0 else np.nan,
+        "Media_Ativos_Ciclo0_std": np.std(media_ativos0) if media_ativos0 else np.nan
+    }
+    # Colunas de conectividade só aparecem quando algum cenário as mediu
+    if maiores:
+        linha["Maior_Componente_medio"] = np.mean(maiores)
+        linha["Maior_Componente_std"] = np.std(maiores)
+        linha["Particionada_pct"] = np.mean(particionadas) * 100
+        linha["Diametro_medio"] = np.mean(diametros)
+    # Métricas de cenários ramificados cobrem só os ciclos a partir do fim do aquecimento
+    if ramificacoes:
+        linha["Ciclo_Ramificacao"] = max(ramificacoes)
+    return linha
+
+
+def agregar_amostras(amostras):
+    grupos = {}
+    for total_nodes, fail_prob, convergiu, tempo, ativos0, maior, particionada, diametro, ramificacao in amostras:
+        grupo = grupos.setdefault((total_nodes, fail_prob), ([], [], [], [], [], [], []))
+        tempos, convergencias, media_ativos0, maiores, particionadas, diametros, ramificacoes = grupo
+        if convergiu and tempo is not None:
+            tempos.append(tempo)
+        convergencias.append(convergiu)
+        if ativos0 is not None:
+            media_ativos0.append(ativos0)
+        if maior is not None:
+            maiores.append(maior)
+            particionadas.append(particionada)
+            diametros.append(diametro)
+        if ramificacao is not None:
+            ramificacoes.append(ramificacao)
+    return [agregar(n, p, *grupo) for (n, p), grupo in sorted(grupos.items())]
+
+
+def amostra_resumo(registro, total_nodes=None, fail_prob=None):
+    componentes = registro.get("Componentes_Final")
+    return [registro["Total_Nodes"] if total_nodes is None else total_nodes,
+            registro["Fail_Mean"] if fail_prob is None else fail_prob,
+            bool(registro["Convergiu"]), registro["Tempo_Convergencia"], registro["Media_Ativos_Ciclo0"],
+            registro.get("Maior_Componente_Final"), None if componentes is None else componentes > 1,
+            registro.get("Diametro_Final"), registro.get("Ciclo_Ramificacao")]
+
+
+def ler_resumos(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
 
-    for prob_dir in sorted(os.listdir(n_dir)):
-        prob_path = os.path.join(n_dir, prob_dir)
-        if not os.path.isdir(prob_path):
-            continue
 
+def coletar_resumos(path, cache):
+    """Agrega o arquivo de resumos da varredura (um registro JSON por execução)
+
+    O arquivo só cresce durante a varredura, então apenas as linhas completas
+    acrescentadas desde a última leitura são processadas.
+    """
+    estado = cache.get("resultados")
+    if estado is None or estado["arquivo"] != path or os.path.getsize(path) < estado["offset"]:
+        estado = {"arquivo": path, "offset": 0, "amostras": {}}
+    with open(path, "rb") as f:
+        f.seek(estado["offset"])
+        novo = f.read()
+    completo = novo[:novo.rfind(b"\n") + 1]
+    # Uma execução repetida aparece mais de uma vez; vale o último registro
+    for line in completo.decode().splitlines():
+        if line.strip():
+            registro = json.loads(line)
+            chave = f"{registro.get('Execucao')}|{registro.get('Replica')}"
+            estado["amostras"][chave] = amostra_resumo(registro)
+    estado["offset"] += len(completo)
+    cache["resultados"] = estado
+    return list(estado["amostras"].values())
+
+
+def assinatura(directory, nomes):
+    """Estado (nome, mtime, tamanho) dos arquivos existentes em directory"""
+    estado = []
+    for nome in nomes:
         try:
-            fail_prob = float(prob_dir.replace("prob", "").replace("_", "."))
-        except:
+            st = os.stat(os.path.join(directory, nome))
+        except FileNotFoundError:
             continue
+        estado.append([nome, st.st_mtime_ns, st.st_size])
+    return estado
 
-        tempos, convergencias, media_ativos0 = [], [], []
 
-        for rep_dir in sorted(os.listdir(prob_path)):
-            run_dir = os.path.join(prob_path, rep_dir)
-            if not os.path.isdir(run_dir):
-                continue
+def ler_replicas(args):
+    """res_replicas.csv (repetições simuladas em lote: run.py --batched)"""
+    path, total_nodes, fail_prob = args
+    df = pd.read_csv(path)
+    return [[total_nodes, fail_prob, bool(row.Convergiu),
+             int(row.TempoConvergencia) if row.Convergiu else None, float(row.MediaAtivosCiclo0), None, None, None, None]
+            for row in df.itertuples()]
+
+
+def ler_execucao(args):
+    """Amostras de um diretório repW: resumo estruturado ou, em execuções antigas, debug.txt e CSV"""
+    run_dir, total_nodes, fail_prob = args
+
+    # --- res_resumo.jsonl: resumo estruturado gravado pelo sc.py ---
+    resumo_path = os.path.join(run_dir, "res_resumo.jsonl")
+    if os.path.exists(resumo_path):
+        return [amostra_resumo(registro, total_nodes, fail_prob) for registro in ler_resumos(resumo_path)]
 
-            debug_path = os.path.join(run_dir, "debug.txt")
-            res_path = os.path.join(run_dir, "res.csv")
-
-            tempo_convergencia = None
-            convergiu = True
-            media_ativos_ciclo0 = None
-
-            # --- debug.txt ---
-            if os.path.exists(debug_path):
-                with open(debug_path, "r") as f:
-                    lines = f.readlines()
-                for line in lines:
-                    if "Tempo de convergência:" in line:
-                        try:
-                            tempo_convergencia = int(line.split(":")[1].strip().split()[0])
-                        except:
-                            pass
-                    if "Rede não convergiu" in line:
-                        convergiu = False
-                        tempo_convergencia = None
-
-            # --- res.csv ---
-            if os.path.exists(res_path):
+    debug_path = os.path.join(run_dir, "debug.txt")
+    res_path = os.path.join(run_dir, "res.csv")
+
+    tempo_convergencia = None
+    convergiu = True
+    media_ativos_ciclo0 = None
+
+    # --- debug.txt ---
+    if os.path.exists(debug_path):
+        with open(debug_path, "r") as f:
+            lines = f.readlines()
+        for line in lines:
+            if "Tempo de convergência:" in line:
                 try:
-                    df = pd.read_csv(res_path)
-                    col_ciclo = [c for c in df.columns if "ciclo" in c.lower()]
-                    col_ativos = [c for c in df.columns if "ativo" in c.lower()]
-                    if col_ciclo and col_ativos:
-                        row0 = df[df[col_ciclo[0]] == 0]
-                        if not row0.empty:
-                            media_ativos_ciclo0 = float(row0[col_ativos[0]].iloc[0])
+                    tempo_convergencia = int(line.split(":")[1].strip().split()[0])
                 except:
                     pass
+            if "Rede não convergiu" in line:
+                convergiu = False
+                tempo_convergencia = None
+
+    # --- res_ciclos.csv (formatos npy/parquet) ou res.csv: só a linha do ciclo 0 é lida ---
+    ciclos_path = os.path.join(run_dir, "res_ciclos.csv")
+    if os.path.exists(ciclos_path):
+        res_path = ciclos_path
+    if os.path.exists(res_path):
+        try:
+            df = pd.read_csv(res_path, nrows=1)
+            col_ciclo = [c for c in df.columns if "ciclo" in c.lower()]
+            col_ativos = [c for c in df.columns if "ativo" in c.lower()]
+            if col_ciclo and col_ativos:
+                row0 = df[df[col_ciclo[0]] == 0]
+                if not row0.empty:
+                    media_ativos_ciclo0 = float(row0[col_ativos[0]].iloc[0])
+        except:
+            pass
+
+    return [[total_nodes, fail_prob, convergiu, tempo_convergencia, media_ativos_ciclo0, None, None, None, None]]
+
+
+def _ler(tarefa):
+    leitor, args = tarefa
+    return leitor(args)
+
+
+def listar_execucoes(root_dir):
+    """Percorre os diretórios nX/probY/repW gerados pelo run.py, sem abrir nenhum arquivo
+
+    Devolve tuplas (chave, assinatura, leitor, argumentos do leitor).
+    """
+    execucoes = []
+    for n_dir in sorted([d for d in os.listdir(root_dir) if d.startswith("n") and os.path.isdir(os.path.join(root_dir, d))]):
+        try:
+            total_nodes = int(n_dir[1:])
+        except:
+            continue
+
+        for prob_dir in sorted(os.listdir(os.path.join(root_dir, n_dir))):
+            prob_path = os.path.join(root_dir, n_dir, prob_dir)
+            if not os.path.isdir(prob_path):
+                continue
+
+            try:
+                fail_prob = float(prob_dir.replace("prob", "").replace("_", "."))
+            except:
+                continue
+
+            estado = assinatura(prob_path, ["res_replicas.csv"])
+            if estado:
+                execucoes.append((os.path.join(n_dir, prob_dir), estado, ler_replicas,
+                                  (os.path.join(prob_path, "res_replicas.csv"), total_nodes, fail_prob)))
+
+            for rep_dir in sorted(os.listdir(prob_path)):
+                run_dir = os.path.join(prob_path, rep_dir)
+                if not os.path.isdir(run_dir):
+                    continue
+                estado = assinatura(run_dir, ARQUIVOS_EXECUCAO)
+                # Sem resumo nem debug.txt, a execução ainda está em andamento
+                if not any(nome in ("res_resumo.jsonl", "debug.txt") for nome, _, _ in estado):
+                    continue
+                execucoes.append((os.path.join(n_dir, prob_dir, rep_dir), estado, ler_execucao,
+                                  (run_dir, total_nodes, fail_prob)))
+    return execucoes
+
+
+def coletar_diretorios(root_dir, cache, workers=1):
+    """Lê apenas as execuções novas ou alteradas desde a última análise, em paralelo"""
+    anteriores = cache.get("execucoes", {})
+    atuais = {}
+    pendentes = []
+    for chave, estado, leitor, args in listar_execucoes(root_dir):
+        entrada = anteriores.get(chave)
+        if entrada is not None and entrada["assinatura"] == estado:
+            atuais[chave] = entrada
+        else:
+            atuais[chave] = {"assinatura": estado}
+            pendentes.append((chave, (leitor, args)))
+
+    if pendentes:
+        tarefas = [tarefa for _, tarefa in pendentes]
+        if workers > 1 and len(pendentes) > 1:
+            with multiprocessing.Pool(processes=min(workers, len(pendentes))) as pool:
+                lidas = pool.map(_ler, tarefas, chunksize=max(1, len(tarefas) // (workers * 4)))
+        else:
+            lidas = [_ler(tarefa) for tarefa in tarefas]
+        for (chave, _), amostras in zip(pendentes, lidas):
+            atuais[chave]["amostras"] = amostras
+    print(f"{len(atuais)} execuções encontradas; {len(pendentes)} lidas, {len(atuais) - len(pendentes)} do cache")
+
+    cache["execucoes"] = atuais
+    return [amostra for entrada in atuais.values() for amostra in entrada["amostras"]]
+
+
+def carregar_cache(path):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"versao": CACHE_VERSION}
+    return cache if cache.get("versao") == CACHE_VERSION else {"versao": CACHE_VERSION}
+
+
+def salvar_cache(path, cache):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, path)
+
+
+def coletar(root_dir, cache, workers=1):
+    if os.path.exists(resultados_path):
+        amostras = coletar_resumos(resultados_path, cache)
+    else:
+        amostras = coletar_diretorios(root_dir, cache, workers)
+    return agregar_amostras(amostras)
+
+
+# -------------------------------------------------------------
+# CURVAS POR CICLO (--curvas)
+# -------------------------------------------------------------
+# Séries por ciclo agregadas entre as repetições de cada cenário
+CURVAS = ("MediaAtivos", "MensagensCiclo")
+QUANTIS = (0.05, 0.5, 0.95)
+
+
+class AcumuladorWelford:
+    """Média e variância por ciclo, atualizadas uma execução por vez (Welford)
+
+    O estado tem tamanho O(ciclos); ciclos ausentes de uma execução (NaN)
+    não são contados.
+    """
+
+    def __init__(self):
+        self.n = np.zeros(0)
+        self.media = np.zeros(0)
+        self.m2 = np.zeros(0)
+
+    def _crescer(self, ciclos):
+        if ciclos > len(self.n):
+            extra = ciclos - len(self.n)
+            self.n, self.media, self.m2 = (np.concatenate([a, np.zeros(extra)]) for a in (self.n, self.media, self.m2))
+
+    def adicionar(self, serie):
+        self._crescer(len(serie))
+        k = len(serie)
+        valido = ~np.isnan(serie)
+        x = np.where(valido, serie, 0.0)
+        n = self.n[:k] + valido
+        delta = np.where(valido, x - self.media[:k], 0.0)
+        self.media[:k] += delta / np.maximum(n, 1)
+        self.m2[:k] += delta * (x - self.media[:k])
+        self.n[:k] = n
+
+    def combinar(self, n, media, std):
+        """Incorpora um grupo já resumido (n execuções com média e desvio padrão por ciclo; Chan et al.)"""
+        self._crescer(len(media))
+        k = len(media)
+        total = self.n[:k] + n
+        delta = media - self.media[:k]
+        self.media[:k] += delta * n / total
+        self.m2[:k] += std ** 2 * n + delta ** 2 * self.n[:k] * n / total
+        self.n[:k] = total
+
+    def desvio(self):
+        # Desvio padrão populacional, como em agregar()
+        return np.sqrt(self.m2 / np.maximum(self.n, 1))
+
+
+class AcumuladorP2:
+    """Quantil q por ciclo pelo algoritmo P² (Jain e Chlamtac), com 5 marcadores por ciclo
+
+    Cada nova execução atualiza todos os ciclos de uma vez; a memória não
+    depende do número de execuções.
+    """
+
+    def __init__(self, q):
+        self.q = q
+        self.n = np.zeros(0, dtype=np.int64)
+        self.alturas = np.zeros((0, 5))
+        self.posicoes = np.zeros((0, 5))
+        self.desejadas = np.zeros((0, 5))
+        self.incremento = np.array([0, q / 2, q, (1 + q) / 2, 1])
+
+    def _crescer(self, ciclos):
+        if ciclos > len(self.n):
+            extra = ciclos - len(self.n)
+            self.n = np.concatenate([self.n, np.zeros(extra, dtype=np.int64)])
+            self.alturas, self.posicoes, self.desejadas = (np.concatenate([a, np.zeros((extra, 5))])
+                                                           for a in (self.alturas, self.posicoes, self.desejadas))
+
+    def adicionar(self, serie):
+        self._crescer(len(serie))
+        k = len(serie)
+        valido = ~np.isnan(serie)
+
+        # Primeiras 5 observações de cada ciclo: guardadas e ordenadas nos marcadores
+        inicio = valido & (self.n[:k] < 5)
+        linhas = np.nonzero(inicio)[0]
+        self.alturas[linhas, self.n[linhas]] = serie[linhas]
+        prontas = linhas[self.n[linhas] == 4]
+        self.alturas[prontas] = np.sort(self.alturas[prontas], axis=1)
+        self.posicoes[prontas] = np.arange(1, 6)
+        self.desejadas[prontas] = 1 + 4 * self.incremento
+
+        linhas = np.nonzero(valido & (self.n[:k] >= 5))[0]
+        self.n[:k] += valido
+        if not len(linhas):
+            return
+        x = serie[linhas]
+        q, pos, desejada = self.alturas[linhas], self.posicoes[linhas], self.desejadas[linhas]
+
+        # Célula do novo valor; os extremos acompanham mínimo e máximo
+        q[:, 0] = np.minimum(q[:, 0], x)
+        q[:, 4] = np.maximum(q[:, 4], x)
+        celula = np.clip((x[:, None] >= q[:, 1:4]).sum(axis=1), 0, 3)
+        pos += np.arange(5) > celula[:, None]
+        desejada += self.incremento
+
+        # Ajuste dos marcadores internos (parabólico, ou linear se sair da ordem)
+        for i in (1, 2, 3):
+            d = desejada[:, i] - pos[:, i]
+            ajustar = ((d >= 1) & (pos[:, i + 1] - pos[:, i] > 1)) | ((d <= -1) & (pos[:, i - 1] - pos[:, i] < -1))
+            s = np.sign(d) * ajustar
+            vizinho = q[np.arange(len(x)), i + s.astype(int)]
+            pos_vizinho = pos[np.arange(len(x)), i + s.astype(int)]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                parabola = q[:, i] + s / (pos[:, i + 1] - pos[:, i - 1]) * (
+                    (pos[:, i] - pos[:, i - 1] + s) * (q[:, i + 1] - q[:, i]) / (pos[:, i + 1] - pos[:, i])
+                    + (pos[:, i + 1] - pos[:, i] - s) * (q[:, i] - q[:, i - 1]) / (pos[:, i] - pos[:, i - 1]))
+                linear = q[:, i] + s * (vizinho - q[:, i]) / (pos_vizinho - pos[:, i])
+            ordenada = (q[:, i - 1] < parabola) & (parabola < q[:, i + 1])
+            q[:, i] = np.where(ajustar, np.where(ordenada, parabola, linear), q[:, i])
+            pos[:, i] += s
+
+        self.alturas[linhas], self.posicoes[linhas], self.desejadas[linhas] = q, pos, desejada
+
+    def valor(self):
+        """Quantil estimado por ciclo (exato enquanto o ciclo tem até 5 observações)"""
+        resultado = self.alturas[:, 2].copy()
+        for linha in np.nonzero(self.n < 5)[0]:
+            observadas = self.alturas[linha, :self.n[linha]]
+            resultado[linha] = np.quantile(observadas, self.q) if len(observadas) else np.nan
+        return resultado
+
+
+class CurvasCenario:
+    """Acumuladores de todas as curvas de um cenário (N, fail_prob)"""
+
+    def __init__(self):
+        self.execucoes = 0
+        self.welford = {nome: AcumuladorWelford() for nome in CURVAS}
+        self.quantis = {nome: [AcumuladorP2(q) for q in QUANTIS] for nome in CURVAS}
+
+    def adicionar(self, series):
+        self.execucoes += 1
+        for nome in CURVAS:
+            self.welford[nome].adicionar(series[nome])
+            for acumulador in self.quantis[nome]:
+                acumulador.adicionar(series[nome])
+
+    def combinar(self, n, medias, desvios):
+        # Lotes (run.py --batched) só trazem média e desvio: não entram nos quantis
+        self.execucoes += n
+        for nome in CURVAS:
+            self.welford[nome].combinar(n, medias[nome], desvios[nome])
+
+    def tabela(self, total_nodes, fail_prob):
+        """Uma linha por ciclo com ao menos uma execução (ciclos de aquecimento de cenários ramificados
+        não aparecem nos arquivos por ciclo, e ficam de fora)"""
+        ciclos = len(self.welford[CURVAS[0]].n)
+        linhas = {"Total_Nodes": np.full(ciclos, total_nodes), "Fail_Prob": np.full(ciclos, fail_prob),
+                  "Ciclo": np.arange(ciclos), "Execucoes": self.welford[CURVAS[0]].n.astype(int)}
+        for nome in CURVAS:
+            acumulador = self.welford[nome]
+            linhas[f"{nome}_medio"] = acumulador.media[:ciclos]
+            linhas[f"{nome}_std"] = acumulador.desvio()[:ciclos]
+            for q, quantil in zip(QUANTIS, self.quantis[nome]):
+                valores = quantil.valor()
+                linhas[f"{nome}_p{round(q * 100):02d}"] = np.concatenate([valores, np.full(ciclos - len(valores), np.nan)])
+        tabela = pd.DataFrame(linhas)
+        return tabela[tabela["Execucoes"] > 0]
+
+
+def ler_serie(args):
+    """Curvas por ciclo de uma execução (arrays indexados pelo ciclo; NaN nos ciclos ausentes)"""
+    run_dir, total_nodes, fail_prob = args
+    path = os.path.join(run_dir, "res_ciclos.csv")
+    if not os.path.exists(path):
+        path = os.path.join(run_dir, "res.csv")
+    try:
+        df = pd.read_csv(path, usecols=["Ciclo", *CURVAS])
+    except (FileNotFoundError, ValueError, pd.errors.EmptyDataError):
+        return total_nodes, fail_prob, None
+    ciclos = df["Ciclo"].to_numpy()
+    series = {}
+    for nome in CURVAS:
+        serie = np.full(ciclos.max() + 1 if len(ciclos) else 0, np.nan)
+        serie[ciclos] = df[nome].to_numpy(dtype=float)
+        series[nome] = serie
+    return total_nodes, fail_prob, series
+
+
+def ler_serie_lote(args):
+    """Médias e desvios entre réplicas gravados por run.py --batched, com o número de réplicas"""
+    replicas_path, total_nodes, fail_prob = args
+    prob_path = os.path.dirname(replicas_path)
+    try:
+        df = pd.read_csv(os.path.join(prob_path, "res.csv"), usecols=["Ciclo", *CURVAS, *(f"{c}_std" for c in CURVAS)])
+        n = len(pd.read_csv(replicas_path, usecols=["Replica"]))
+    except (FileNotFoundError, ValueError, pd.errors.EmptyDataError):
+        return total_nodes, fail_prob, None
+    return total_nodes, fail_prob, (n, {c: df[c].to_numpy(dtype=float) for c in CURVAS},
+                                    {c: df[f"{c}_std"].to_numpy(dtype=float) for c in CURVAS})
+
+
+def _ler_serie(tarefa):
+    leitor, args = tarefa
+    if leitor is ler_replicas:
+        return True, ler_serie_lote(args)
+    return False, ler_serie(args)
+
+
+def coletar_curvas(root_dir, workers=1):
+    """Agrega as curvas de todas as execuções em streaming: cada série é incorporada e descartada
+
+    A memória é O(cenários x ciclos), independente do número de execuções;
+    com workers > 1, a leitura dos arquivos é feita em paralelo e as séries
+    chegam uma a uma ao processo principal, na ordem da listagem (o P²
+    depende da ordem das observações, então o resultado não depende do
+    número de processos).
+    """
+    tarefas = [(leitor, args) for _, _, leitor, args in listar_execucoes(root_dir)]
+    cenarios = {}
+    if workers > 1 and len(tarefas) > 1:
+        pool = multiprocessing.Pool(processes=min(workers, len(tarefas)))
+        lidas = pool.imap(_ler_serie, tarefas, chunksize=max(1, len(tarefas) // (workers * 4)))
+    else:
+        pool = None
+        lidas = map(_ler_serie, tarefas)
+    try:
+        for lote, (total_nodes, fail_prob, dados) in lidas:
+            if dados is None:
+                continue
+            cenario = cenarios.setdefault((total_nodes, fail_prob), CurvasCenario())
+            if lote:
+                cenario.combinar(*dados)
+            else:
+                cenario.adicionar(dados)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    if not cenarios:
+        return None
+    return pd.concat([cenarios[chave].tabela(*chave) for chave in sorted(cenarios)], ignore_index=True)
 
-            if tempo_convergencia is not None:
-                tempos.append(tempo_convergencia)
-            convergencias.append(convergiu)
-            if media_ativos_ciclo0 is not None:
-                media_ativos0.append(media_ativos_ciclo0)
-
-        results.append({
-            "Total_Nodes": total_nodes,
-            "Fail_Prob": fail_prob,
-            "Convergiu_pct": np.mean(convergencias) * 100,
-            "Tempo_Convergencia_medio": np.mean(tempos) if tempos else None,
-            "Tempo_Convergencia_std": np.std(tempos) if tempos else None,
-            "Media_Ativos_Ciclo0_medio": np.mean(media_ativos0) if media_ativos0 else None,
-            "Media_Ativos_Ciclo0_std": np.std(media_ativos0) if media_ativos0 else None
-        })
 
 # -------------------------------------------------------------
 # DATAFRAME FINAL
 # -------------------------------------------------------------
-df_results = pd.DataFrame(results)
-df_results.sort_values(["Total_Nodes", "Fail_Prob"], inplace=True)
+def montar_tabela(results):
+    df_results = pd.DataFrame(results)
+    df_results.sort_values(["Total_Nodes", "Fail_Prob"], inplace=True)
+    return df_results
 
-print("\n=== RESULTADOS COLETADOS ===")
-print(df_results)
-df_results.to_csv("analise_resultados.csv", index=False)
 
 # -------------------------------------------------------------
 # FUNÇÃO PARA GERAR GRÁFICOS
@@ -200,8 +629,145 @@ def gerar_graficos(df_results, modo="separado"):
             plt.savefig(f"tempo_convergencia_{n}nos.pdf", bbox_inches="tight", dpi=300)
             plt.close()
 
+    # ---------------------------------------------------------
+    # 3️⃣ MAIOR COMPONENTE DO OVERLAY (execuções com --connectivity)
+    # ---------------------------------------------------------
+    if "Maior_Componente_medio" not in df_results:
+        return
+    if modo == "junto":
+        plt.figure(figsize=(8,5))
+        for color, n in zip(colors, df_results["Total_Nodes"].unique()):
+            subset = df_results[df_results["Total_Nodes"] == n]
+            plt.errorbar(
+                subset["Fail_Prob"],
+                subset["Maior_Componente_medio"] * 100,
+                yerr=subset["Maior_Componente_std"] * 100,
+                marker="^",
+                capsize=5,
+                color=color,
+                label=f"{n} nós"
+            )
+        plt.xlabel("Probabilidade de falha")
+        plt.ylabel("Nós na maior componente (%)")
+        plt.title("Maior componente do overlay vs Probabilidade de falha")
+        plt.legend()
+        plt.grid(True, linestyle="--", alpha=0.7)
+        plt.ylim(0, 105)
+        plt.tight_layout()
+        plt.savefig("maior_componente.pdf", bbox_inches="tight", dpi=300)
+        plt.close()
+
+    else:  # modo separado
+        for n in df_results["Total_Nodes"].unique():
+            subset = df_results[df_results["Total_Nodes"] == n]
+            plt.figure(figsize=(7,5))
+            plt.errorbar(
+                subset["Fail_Prob"],
+                subset["Maior_Componente_medio"] * 100,
+                yerr=subset["Maior_Componente_std"] * 100,
+                marker="^",
+                capsize=5,
+                color="purple"
+            )
+            plt.xlabel("Probabilidade de falha")
+            plt.ylabel("Nós na maior componente (%)")
+            plt.title(f"Maior componente do overlay vs Probabilidade de falha ({n} nós)")
+            plt.grid(True, linestyle="--", alpha=0.7)
+            plt.ylim(0, 105)
+            plt.tight_layout()
+            plt.savefig(f"maior_componente_{n}nos.pdf", bbox_inches="tight", dpi=300)
+            plt.close()
+
+
+def gerar_graficos_curvas(curvas, modo="separado"):
+    """Curvas médias ± desvio padrão por ciclo, uma linha por probabilidade de falha"""
+    rotulos = {"MediaAtivos": ("Média de ativos", "curva_media_ativos"),
+               "MensagensCiclo": ("Mensagens por ciclo", "curva_mensagens")}
+    nodes = curvas["Total_Nodes"].unique()
+    for nome in CURVAS:
+        ylabel, arquivo = rotulos[nome]
+        if modo == "junto":
+            # Um painel por quantidade de nós, no mesmo arquivo
+            fig, eixos = plt.subplots(len(nodes), 1, figsize=(8, 4 * len(nodes)), squeeze=False)
+        for i, n in enumerate(nodes):
+            if modo == "junto":
+                ax = eixos[i, 0]
+            else:
+                fig, ax = plt.subplots(figsize=(7, 5))
+            subset = curvas[curvas["Total_Nodes"] == n]
+            probs = subset["Fail_Prob"].unique()
+            colors = plt.cm.viridis(np.linspace(0, 1, len(probs)))
+            for color, p in zip(colors, probs):
+                curva = subset[subset["Fail_Prob"] == p]
+                media, std = curva[f"{nome}_medio"], curva[f"{nome}_std"]
+                ax.plot(curva["Ciclo"], media, color=color, label=f"p = {p}")
+                ax.fill_between(curva["Ciclo"], media - std, media + std, color=color, alpha=0.15)
+            ax.set_xlabel("Ciclo")
+            ax.set_ylabel(ylabel)
+            ax.set_title(f"{ylabel} por ciclo ({n} nós)")
+            ax.grid(True, linestyle="--", alpha=0.7)
+            ax.legend(fontsize=8, ncol=2)
+            if modo != "junto":
+                fig.tight_layout()
+                fig.savefig(f"{arquivo}_{n}nos.pdf", bbox_inches="tight", dpi=300)
+                plt.close(fig)
+        if modo == "junto":
+            fig.tight_layout()
+            fig.savefig(f"{arquivo}.pdf", bbox_inches="tight", dpi=300)
+            plt.close(fig)
+
 # -------------------------------------------------------------
 # EXECUÇÃO
 # -------------------------------------------------------------
-gerar_graficos(df_results, modo=modo_graficos)
-print(f"\nGráficos gerados no modo: {modo_graficos.upper()}")
+def main():
+    parser = argparse.ArgumentParser(description="Consolidação dos resultados da varredura do run.py")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processos usados para ler os diretórios de execução (padrão: número de núcleos)")
+    parser.add_argument("--no_cache", action="store_true",
+                        help=f"Ignora o cache ({os.path.basename(cache_path)}) e relê todas as execuções")
+    parser.add_argument("--watch", type=float, default=None, metavar="SEGUNDOS",
+                        help="Atualiza analise_resultados.csv a cada SEGUNDOS enquanto a varredura avança; "
+                             "os gráficos são gerados ao interromper (Ctrl+C)")
+    parser.add_argument("--curvas", action="store_true",
+                        help="Agrega as curvas por ciclo (MediaAtivos, MensagensCiclo) de todas as execuções em "
+                             "streaming e grava analise_curvas.csv com média, desvio e quantis por cenário")
+    args = parser.parse_args()
+
+    cache = {"versao": CACHE_VERSION} if args.no_cache else carregar_cache(cache_path)
+    df_results = None
+    try:
+        while True:
+            results = coletar(root_dir, cache, args.workers)
+            salvar_cache(cache_path, cache)
+            if results:
+                df_novo = montar_tabela(results)
+                if df_results is None or not df_novo.equals(df_results):
+                    df_results = df_novo
+                    print("\n=== RESULTADOS COLETADOS ===")
+                    print(df_results)
+                    df_results.to_csv("analise_resultados.csv", index=False)
+            elif args.watch is None:
+                print("Nenhum resultado encontrado.")
+            if args.watch is None:
+                break
+            time.sleep(args.watch)
+    except KeyboardInterrupt:
+        print("\nMonitoramento interrompido.")
+
+    if df_results is not None:
+        gerar_graficos(df_results, modo=modo_graficos)
+        print(f"\nGráficos gerados no modo: {modo_graficos.upper()}")
+
+    if args.curvas:
+        curvas = coletar_curvas(root_dir, args.workers)
+        if curvas is None:
+            print("Nenhuma curva por ciclo encontrada.")
+            return
+        curvas.to_csv("analise_curvas.csv", index=False)
+        print(f"📁 Curvas por ciclo de {curvas.groupby(['Total_Nodes', 'Fail_Prob']).ngroups} cenários salvas em: "
+              f"analise_curvas.csv")
+        gerar_graficos_curvas(curvas, modo=modo_graficos)
+
+
+if __name__ == "__main__":
+    main()
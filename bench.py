@@ -0,0 +1,185 @@
+"""Benchmarks do simulador: métodos do Node e ciclos completos em função do tamanho da rede.
+
+Para cada combinação de tamanho (--sizes) e probabilidade média de falha
+(--fail_means), mede o tempo por nó e por ciclo de:
+
+- ping_cycle, replace_failed e shuffle_passive, cada fase aplicada a todos os nós;
+- _replenish_passive, completando a Passive View depois de retirar dela a
+  fração trocada em um shuffle;
+- um ciclo das três fases (run_cycle) e um ciclo de sc.simulate_with_debug,
+  que inclui o cálculo das métricas (sem trace nem arquivos).
+
+O pico de memória (tracemalloc) da rede inicializada mais um ciclo é medido
+em uma passada separada, para não distorcer os tempos. Os resultados podem
+ser gravados em JSON (--json) e comparados com um arquivo de referência
+(--baseline): métricas acima da tolerância são marcadas como regressão e o
+script termina com código 1.
+"""
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+import contextlib
+
+import sc
+
+# Métricas de tempo (µs por nó e por ciclo) e de memória (bytes por nó)
+TIME_METRICS = ["ping_cycle", "replace_failed", "shuffle_passive", "replenish_passive", "run_cycle", "simulate_cycle"]
+MEMORY_METRIC = "peak_bytes_per_node"
+
+# Redes pequenas medem mais ciclos, para que cada cenário processe ao menos este número de nós-ciclo
+MIN_NODE_CYCLES = 20000
+
+
+def build_mesh(params):
+    nodes = [sc.Node(i, params.active_size, params.passive_size, params.total_nodes) for i in range(params.total_nodes)]
+    for node in nodes:
+        node.initialize_neighbors()
+    return nodes
+
+
+def run_cycle(nodes, params):
+    """Um ciclo completo, na mesma ordem de fases de sc.simulate_with_debug"""
+    failures = [node.ping_cycle(params)[1] for node in nodes]
+    for node, failed in zip(nodes, failures):
+        node.replace_failed(failed, params)
+    for node in nodes:
+        node.shuffle_passive(nodes)
+
+
+def time_phases(nodes, params):
+    """Tempo (s) de cada fase de um ciclo, aplicada a todos os nós"""
+    timings = {}
+    start = time.perf_counter()
+    failures = [node.ping_cycle(params)[1] for node in nodes]
+    timings["ping_cycle"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for node, failed in zip(nodes, failures):
+        node.replace_failed(failed, params)
+    timings["replace_failed"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for node in nodes:
+        node.shuffle_passive(nodes)
+    timings["shuffle_passive"] = time.perf_counter() - start
+
+    # Retira a fração trocada no shuffle e mede só a reposição
+    swap_count = max(1, int(params.passive_size * 0.3))
+    for node in nodes:
+        del node.passive[-swap_count:]
+    start = time.perf_counter()
+    for node in nodes:
+        node._replenish_passive()
+    timings["replenish_passive"] = time.perf_counter() - start
+    return timings
+
+
+def bench_case(total_nodes, fail_mean, cycles, seed):
+    """Tempos por nó e por ciclo (µs, melhor ciclo) e pico de memória de um cenário"""
+    cycles = max(cycles, MIN_NODE_CYCLES // total_nodes)
+    params = sc.make_params(total_nodes=total_nodes, fail_mean=fail_mean, seed=seed, max_cycles=cycles,
+                            csv_filename="", trace_level="off", plot_mode="none")
+    random.seed(seed)
+    nodes = build_mesh(params)
+
+    best = {}
+    for _ in range(cycles):
+        for name, elapsed in time_phases(nodes, params).items():
+            best[name] = min(best.get(name, elapsed), elapsed)
+
+    random.seed(seed)
+    nodes = build_mesh(params)
+    for _ in range(cycles):
+        start = time.perf_counter()
+        run_cycle(nodes, params)
+        elapsed = time.perf_counter() - start
+        best["run_cycle"] = min(best.get("run_cycle", elapsed), elapsed)
+
+    # simulate_with_debug inteiro, descontando a inicialização da rede
+    start = time.perf_counter()
+    random.seed(seed)
+    build_mesh(params)
+    init_time = time.perf_counter() - start
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        sc.simulate_with_debug(params)
+    best["simulate_cycle"] = max(0.0, time.perf_counter() - start - init_time) / cycles
+
+    record = {"total_nodes": total_nodes, "fail_mean": fail_mean, "cycles": cycles}
+    for name in TIME_METRICS:
+        record[name] = best[name] / total_nodes * 1e6
+    record[MEMORY_METRIC] = peak_memory(params, seed) / total_nodes
+    return record
+
+
+def peak_memory(params, seed):
+    """Pico de memória alocada (bytes) ao montar a rede e executar um ciclo"""
+    random.seed(seed)
+    tracemalloc.start()
+    try:
+        nodes = build_mesh(params)
+        run_cycle(nodes, params)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def compare(records, baseline, tolerance):
+    """Regressões em relação à referência: (registro, métrica, valor de referência, razão)"""
+    reference = {(r["total_nodes"], r["fail_mean"]): r for r in baseline}
+    regressions = []
+    for record in records:
+        ref = reference.get((record["total_nodes"], record["fail_mean"]))
+        if ref is None:
+            continue
+        for name in TIME_METRICS + [MEMORY_METRIC]:
+            if name in ref and ref[name] > 0:
+                ratio = record[name] / ref[name]
+                if ratio > 1 + tolerance:
+                    regressions.append((record, name, ref[name], ratio))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks dos métodos do Node e de ciclos completos")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[50, 500, 5000, 50000])
+    parser.add_argument("--fail_means", nargs="+", type=float, default=[0.1, 0.3, 0.5])
+    parser.add_argument("--cycles", type=int, default=3, help="Ciclos medidos por cenário, vale o melhor (mais em redes pequenas)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", type=str, default=None, help="Grava os resultados neste arquivo JSON")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="Arquivo JSON de referência (gerado com --json) para detectar regressões")
+    parser.add_argument("--tolerance", type=float, default=0.20,
+                        help="Aumento relativo tolerado antes de marcar regressão (padrão: 0.20)")
+    args = parser.parse_args()
+
+    header = " | ".join(f"{name:>17}" for name in TIME_METRICS)
+    print("Tempos em µs por nó e por ciclo; memória em bytes por nó")
+    print(f"{'Nós':>6} | {'fail':>4} | {header} | {'memória':>8}")
+    records = []
+    for n in args.sizes:
+        for fail_mean in args.fail_means:
+            r = bench_case(n, fail_mean, args.cycles, args.seed)
+            records.append(r)
+            values = " | ".join(f"{r[name]:>17.2f}" for name in TIME_METRICS)
+            print(f"{n:>6} | {fail_mean:>4} | {values} | {r[MEMORY_METRIC]:>8.0f}", flush=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"python": sys.version.split()[0], "results": records}, f, indent=2)
+        print(f"📁 Resultados salvos em: {args.json}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(records, baseline, args.tolerance)
+        for record, name, reference, ratio in regressions:
+            print(f"REGRESSÃO: {name} com {record['total_nodes']} nós e fail_mean {record['fail_mean']}: "
+                  f"{record[name]:.2f} contra {reference:.2f} na referência ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"Nenhuma regressão acima de {args.tolerance:.0%} em relação a {args.baseline}")
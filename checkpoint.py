@@ -0,0 +1,220 @@
+"""Checkpoints do estado completo da simulação (motor python).
+
+Um checkpoint guarda, depois de um ciclo, tudo o que simulate_with_debug
+precisa para continuar: Active View, Passive View e histórico passivo de
+todos os nós, mensagens acumuladas por nó, as séries por ciclo (médias,
+mensagens, convergência) e o estado do gerador aleatório global. Restaurado,
+o checkpoint continua a execução exatamente como ela seguiria sem a
+interrupção, ou serve de ponto de partida comum para vários cenários
+(outros fail_mean/fail_std) que só diferem depois do aquecimento. Nesse
+segundo caso (ramificação), só a rede e o gerador são restaurados: as
+séries e a convergência recomeçam no ciclo do checkpoint, e branch_cycle
+registra esse ciclo nos checkpoints gravados depois.
+
+Formato do arquivo (little-endian):
+
+    MAGIC | tamanho do cabeçalho (uint32) | cabeçalho JSON | arrays
+
+O cabeçalho traz os parâmetros da rede, os contadores escalares e, para cada
+array, tipo, forma e deslocamento no arquivo. Os arrays começam alinhados em
+64 bytes e podem ser lidos sem cópia com np.memmap; as visões de tamanho
+variável são gravadas em formato CSR (ids concatenados mais deslocamentos
+por nó). Para inspecionar um checkpoint:
+
+    python3 checkpoint.py aquecimento.ckpt
+"""
+import os
+import json
+import struct
+import random
+import argparse
+from array import array
+
+import numpy as np
+
+MAGIC = b"NMCK\x01"
+HEADER_SIZE = struct.Struct("<I")
+ALIGN = 64
+VERSION = 1
+
+# Parâmetros que definem a rede: precisam coincidir na restauração
+MESH_PARAMS = ("total_nodes", "active_size", "passive_size", "topology", "radio_range", "mean_degree")
+
+
+def _csr(lists):
+    """Listas de ids por nó -> (deslocamentos int64 N+1, ids int32 concatenados)"""
+    offsets = np.zeros(len(lists) + 1, dtype="<i8")
+    np.cumsum([len(values) for values in lists], out=offsets[1:])
+    ids = np.empty(offsets[-1], dtype="<i4")
+    for i, values in enumerate(lists):
+        ids[offsets[i]:offsets[i + 1]] = values
+    return offsets, ids
+
+
+def save_checkpoint(filename, params, cycle, nodes, run, topology_hash=None):
+    """Grava o estado da rede após `cycle` ciclos concluídos.
+
+    topology_hash: Topology.digest() da topologia geo (None na topologia completa).
+
+    run: dicionário com as séries de simulate_with_debug (avg_active_list,
+    avg_passive_diversity_list, messages_per_cycle, messages_per_node_cumulative,
+    messages_per_node_evolution, total_messages, convergence_cycle e
+    branch_cycle, o ciclo em que as séries começam).
+    """
+    version, mt_state, gauss_next = random.getstate()
+    evolution = run["messages_per_node_evolution"]
+    arrays = {"rng_state": np.array(mt_state, dtype="<u4"),
+              "messages_cumulative": np.array(run["messages_per_node_cumulative"], dtype="<i8"),
+              "avg_active": np.array(run["avg_active_list"], dtype="<f8"),
+              "avg_passive_diversity": np.array(run["avg_passive_diversity_list"], dtype="<f8"),
+              "messages_per_cycle": np.array(run["messages_per_cycle"], dtype="<i8"),
+              "evolution": np.array([evolution[i] for i in evolution], dtype="<f8").reshape(
+                  len(evolution), cycle - run["branch_cycle"])}
+    for view in ("active", "passive", "passive_history"):
+        arrays[f"{view}_offsets"], arrays[view] = _csr([getattr(node, view) for node in nodes])
+
+    header = {
+        "version": VERSION,
+        "cycle": cycle,
+        "seed": params.seed,
+        "fail_mean": params.fail_mean,
+        "fail_std": params.fail_std,
+        "rng": params.rng,
+        "rng_version": version,
+        "gauss_next": gauss_next,
+        "total_messages": run["total_messages"],
+        "convergence_cycle": run["convergence_cycle"],
+        "branch_cycle": run["branch_cycle"],
+        "topology_hash": topology_hash,
+        "evolution_nodes": list(evolution),
+        "arrays": {},
+    }
+    header.update({key: getattr(params, key) for key in MESH_PARAMS})
+
+    # Deslocamentos dependem do tamanho do cabeçalho, que depende dos deslocamentos:
+    # reserva espaço para os números antes de calcular a posição final
+    layout = {name: [a.dtype.str, list(a.shape), 0] for name, a in arrays.items()}
+    header["arrays"] = layout
+    start = _align(len(MAGIC) + HEADER_SIZE.size + len(json.dumps(header)) + 32 * len(arrays))
+    for name, a in arrays.items():
+        layout[name][2] = start
+        start = _align(start + a.nbytes)
+    encoded = json.dumps(header).encode()
+
+    # Grava em arquivo temporário e renomeia: uma interrupção nunca deixa um checkpoint incompleto
+    tmp = filename + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER_SIZE.pack(len(encoded)))
+        f.write(encoded)
+        for name, a in arrays.items():
+            f.write(b"\0" * (layout[name][2] - f.tell()))
+            f.write(a.tobytes())
+    os.replace(tmp, filename)
+
+
+def _align(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+class Checkpoint:
+    """Checkpoint aberto para leitura; os arrays são mapeados em memória, sem cópia"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{filename} não é um checkpoint do simulador")
+            (size,) = HEADER_SIZE.unpack(f.read(HEADER_SIZE.size))
+            self.header = json.loads(f.read(size))
+        if self.header["version"] != VERSION:
+            raise ValueError(f"{filename}: versão {self.header['version']} do checkpoint não suportada")
+        self.cycle = self.header["cycle"]
+        self.arrays = {name: np.memmap(filename, dtype=dtype, mode="r", offset=offset, shape=tuple(shape))
+                       if np.prod(shape) else np.empty(shape, dtype=dtype)
+                       for name, (dtype, shape, offset) in self.header["arrays"].items()}
+
+    def check(self, params):
+        """Confere se a rede de params é a mesma do checkpoint"""
+        for key in MESH_PARAMS:
+            if getattr(params, key) != self.header[key]:
+                raise ValueError(f"{self.filename}: {key} = {self.header[key]} no checkpoint, "
+                                 f"{getattr(params, key)} na execução")
+
+    def check_topology(self, topology_hash):
+        """Confere se a topologia geo reconstruída (pela semente) é a do checkpoint"""
+        if self.header.get("topology_hash") != topology_hash:
+            raise ValueError(f"{self.filename}: a topologia reconstruída difere da do checkpoint "
+                             f"(semente {self.header['seed']} no checkpoint)")
+
+    @property
+    def branch_cycle(self):
+        return self.header.get("branch_cycle", 0)
+
+    def is_branch(self, params):
+        """Restaurar com params ramifica (aquecimento) em vez de retomar a execução?"""
+        return bool(getattr(params, "branch", False)) or (
+            (params.fail_mean, params.fail_std) != (self.header["fail_mean"], self.header["fail_std"]))
+
+    def view(self, name, node_id):
+        offsets = self.arrays[f"{name}_offsets"]
+        return self.arrays[name][offsets[node_id]:offsets[node_id + 1]]
+
+    def restore_random(self):
+        random.setstate((self.header["rng_version"], tuple(self.arrays["rng_state"].tolist()),
+                         self.header["gauss_next"]))
+
+    def restore_nodes(self, nodes, stats=None):
+        """Preenche nós recém-criados (ainda sem visões) com as visões e históricos gravados, atualizando stats"""
+        for i, node in enumerate(nodes):
+            node.active = array("i", self.view("active", i).tobytes())
+            node.passive = array("i", self.view("passive", i).tobytes())
+            node.passive_history = array("i", self.view("passive_history", i).tobytes())
+            if stats is not None:
+                stats.active_changed(0, len(node.active))
+                stats.history_total += len(node.passive_history)
+
+    def run_state(self, debug_nodes):
+        """Séries de simulate_with_debug de branch_cycle até o ciclo do checkpoint.
+
+        A evolução dos acumulados de um nó de debug que não constava no
+        checkpoint fica com NaN nos ciclos anteriores à restauração.
+        """
+        cycles = self.cycle - self.branch_cycle
+        stored = dict(zip(self.header["evolution_nodes"], self.arrays["evolution"]))
+        return {
+            "avg_active_list": self.arrays["avg_active"].tolist(),
+            "avg_passive_diversity_list": self.arrays["avg_passive_diversity"].tolist(),
+            "messages_per_cycle": self.arrays["messages_per_cycle"].tolist(),
+            "messages_per_node_cumulative": self.arrays["messages_cumulative"].tolist(),
+            "messages_per_node_evolution": {i: [int(v) if v == v else v for v in stored[i]] if i in stored else [float("nan")] * cycles
+                                            for i in debug_nodes},
+            "total_messages": self.header["total_messages"],
+            "convergence_cycle": self.header["convergence_cycle"],
+            "branch_cycle": self.branch_cycle,
+        }
+
+
+def load_checkpoint(filename):
+    return Checkpoint(filename)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exibe o conteúdo de um checkpoint do simulador")
+    parser.add_argument("checkpoint")
+    args = parser.parse_args()
+
+    ckpt = load_checkpoint(args.checkpoint)
+    h = ckpt.header
+    print(f"Ciclos concluídos: {h['cycle']} | Nós: {h['total_nodes']} | Ativos/Passivos: "
+          f"{h['active_size']}/{h['passive_size']} | Semente: {h['seed']} | rng: {h['rng']}")
+    print(f"Falhas do aquecimento: fail_mean = {h['fail_mean']} | fail_std = {h['fail_std']}")
+    if ckpt.branch_cycle:
+        print(f"Séries a partir do ciclo {ckpt.branch_cycle} (execução ramificada)")
+    if h["cycle"]:
+        print(f"Média de ativos no último ciclo: {ckpt.arrays['avg_active'][-1]:.2f} | Diversidade passiva média: "
+              f"{ckpt.arrays['avg_passive_diversity'][-1]:.2f} | Mensagens acumuladas: {h['total_messages']}")
+    convergence = h["convergence_cycle"]
+    print(f"Convergência: {'ciclo ' + str(convergence) if convergence is not None else 'ainda não'}")
+    for name, (dtype, shape, offset) in h["arrays"].items():
+        print(f"  {name:<24} {dtype:<4} {str(tuple(shape)):<12} @ {offset}")
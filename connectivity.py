@@ -0,0 +1,190 @@
+"""Conectividade do overlay ativo, medida a cada ciclo (sc.py --connectivity).
+
+A média de ativos não mostra se a rede está particionada, que é o que
+decide se uma disseminação (ex.: OTA) alcança todos os nós. Com
+--connectivity, ao final de cada ciclo o grafo das Active Views (aresta
+i -> j para cada j na Active View de i) é analisado como não direcionado:
+
+- componentes conexas e fração de nós na maior delas;
+- distribuição do grau de entrada (quantos nós têm i na Active View):
+  média, desvio, mínimo, máximo e nós sem nenhuma entrada;
+- estimativa do diâmetro da maior componente por varredura dupla (BFS a
+  partir de um nó, depois a partir do mais distante encontrado), que dá um
+  limite inferior normalmente igual ao diâmetro em grafos esparsos.
+
+Tudo é feito sobre arrays de arestas com NumPy: as componentes vêm de
+scipy.sparse.csgraph quando o SciPy está instalado e, sem ele, de propagação
+de rótulos mínimos com saltos de ponteiro (union-find em lote); as BFS
+expandem uma fronteira inteira por passo. O custo é O(arestas) por
+iteração, sem laços Python por nó: cerca de 0,2 s por ciclo com 100 mil nós
+(sem SciPy), uma fração pequena do próprio ciclo. Nenhum número aleatório é
+consumido, então a simulação segue a mesma com ou sem a análise.
+
+Os valores vão para <csv>_conectividade.csv (uma linha por ciclo) e os do
+último ciclo para o resumo da execução, agregado pelo analysis.py.
+"""
+import os
+import csv
+
+import numpy as np
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import connected_components
+except ImportError:
+    connected_components = None
+
+FIELDS = ["Ciclo", "Componentes", "MaiorComponente", "GrauEntradaMedio", "GrauEntradaStd", "GrauEntradaMin",
+          "GrauEntradaMax", "SemEntrada", "DiametroEstimado"]
+
+
+# ---------------------------------------------------------
+# Arestas do overlay
+# ---------------------------------------------------------
+def edges_from_nodes(nodes):
+    """Arestas (origem, destino) das Active Views de objetos Node (motores python e des)"""
+    counts = np.fromiter((len(node.active) for node in nodes), dtype=np.int64, count=len(nodes))
+    dst = np.frombuffer(b"".join(node.active.tobytes() for node in nodes), dtype=np.int32).astype(np.int64)
+    src = np.repeat(np.arange(len(nodes), dtype=np.int64), counts)
+    return src, dst
+
+
+def edges_from_matrix(active):
+    """Arestas da matriz de ativos do motor numpy (posições vazias < 0)"""
+    rows, slots = np.nonzero(active >= 0)
+    return rows.astype(np.int64), active[rows, slots].astype(np.int64)
+
+
+# ---------------------------------------------------------
+# Componentes e BFS
+# ---------------------------------------------------------
+def component_labels(n, src, dst):
+    """Rótulo da componente (não direcionada) de cada nó"""
+    if connected_components is not None:
+        graph = csr_matrix((np.ones(len(src), dtype=np.int8), (src, dst)), shape=(n, n))
+        return connected_components(graph, directed=True, connection="weak")[1]
+    labels = np.arange(n, dtype=np.int64)
+    while True:
+        # Cada aresta leva o menor rótulo das pontas às duas pontas...
+        low = np.minimum(labels[src], labels[dst])
+        new = labels.copy()
+        np.minimum.at(new, src, low)
+        np.minimum.at(new, dst, low)
+        # ...e os saltos de ponteiro encurtam as cadeias de rótulos (labels[i] <= i sempre)
+        while True:
+            jumped = new[new]
+            if np.array_equal(jumped, new):
+                break
+            new = jumped
+        if np.array_equal(new, labels):
+            return labels
+        labels = new
+
+
+def undirected_csr(n, src, dst):
+    both_src = np.concatenate([src, dst])
+    both_dst = np.concatenate([dst, src])
+    order = np.argsort(both_src)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(both_src, minlength=n), out=indptr[1:])
+    return indptr, both_dst[order]
+
+
+def bfs_farthest(indptr, indices, start):
+    """(nó mais distante de start, distância), com a fronteira inteira expandida a cada passo"""
+    seen = np.zeros(len(indptr) - 1, dtype=bool)
+    seen[start] = True
+    frontier = np.array([start], dtype=np.int64)
+    farthest, depth = start, 0
+    while True:
+        counts = indptr[frontier + 1] - indptr[frontier]
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        reached = indices[np.repeat(indptr[frontier], counts) + offsets]
+        reached = np.unique(reached[~seen[reached]])
+        if not len(reached):
+            return farthest, depth
+        seen[reached] = True
+        frontier = reached
+        farthest, depth = int(reached[0]), depth + 1
+
+
+def overlay_metrics(n, src, dst):
+    """Métricas de conectividade do overlay com arestas src -> dst"""
+    labels = component_labels(n, src, dst)
+    sizes = np.bincount(labels, minlength=n)
+    largest = int(sizes.argmax())
+    in_degree = np.bincount(dst, minlength=n)
+
+    # Varredura dupla a partir do menor id da maior componente (determinística)
+    indptr, indices = undirected_csr(n, src, dst)
+    start = int(np.argmax(labels == largest))
+    far, _ = bfs_farthest(indptr, indices, start)
+    _, diameter = bfs_farthest(indptr, indices, far)
+
+    return {
+        "Componentes": int((sizes > 0).sum()),
+        "MaiorComponente": float(sizes[largest] / n),
+        "GrauEntradaMedio": float(in_degree.mean()),
+        "GrauEntradaStd": float(in_degree.std()),
+        "GrauEntradaMin": int(in_degree.min()),
+        "GrauEntradaMax": int(in_degree.max()),
+        "SemEntrada": int((in_degree == 0).sum()),
+        "DiametroEstimado": diameter,
+    }
+
+
+# ---------------------------------------------------------
+# Gravação por ciclo
+# ---------------------------------------------------------
+class ConnectivityRecorder:
+    """Mede o overlay a cada ciclo, grava <csv>_conectividade.csv e resume o último ciclo"""
+
+    def __init__(self, params):
+        self.params = params
+        self.filename = None
+        self.file = None
+        if params.csv_filename:
+            base, ext = os.path.splitext(params.csv_filename)
+            self.filename = f"{base}_conectividade.csv"
+            self.file = open(self.filename, mode="w", newline="")
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(FIELDS)
+        self.last = None
+        self.partitioned_cycles = 0
+
+    def record(self, cycle, src, dst, show=False):
+        metrics = overlay_metrics(self.params.total_nodes, src, dst)
+        self.last = metrics
+        self.partitioned_cycles += metrics["Componentes"] > 1
+        if self.file is not None:
+            self.writer.writerow([cycle] + [metrics[name] for name in FIELDS[1:]])
+            self.file.flush()
+        if show:
+            print(f"Conectividade: componentes = {metrics['Componentes']} | maior componente = "
+                  f"{metrics['MaiorComponente']:.1%} | grau de entrada = {metrics['GrauEntradaMedio']:.2f} ± "
+                  f"{metrics['GrauEntradaStd']:.2f} (sem entrada: {metrics['SemEntrada']}) | "
+                  f"diâmetro ≈ {metrics['DiametroEstimado']}")
+        return metrics
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            print(f"📁 Conectividade por ciclo salva em: {self.filename}")
+
+    def summary(self):
+        """Campos do resumo da execução (último ciclo medido)"""
+        if self.last is None:
+            return {}
+        return {
+            "Componentes_Final": self.last["Componentes"],
+            "Maior_Componente_Final": self.last["MaiorComponente"],
+            "Grau_Entrada_Std_Final": self.last["GrauEntradaStd"],
+            "Diametro_Final": self.last["DiametroEstimado"],
+            "Ciclos_Particionada": self.partitioned_cycles,
+        }
+
+
+def make_connectivity(params):
+    if getattr(params, "connectivity", False):
+        return ConnectivityRecorder(params)
+    return None
@@ -0,0 +1,303 @@
+"""Emulação da camada NetMaintenance com datagramas UDP reais em 127.0.0.1.
+
+Cada nó (um objeto sc.Node) roda como uma corrotina asyncio que, a cada
+ciclo de cycle_seconds (com fase inicial sorteada), pinga seus ativos,
+substitui os que não responderam testando passivos e faz um shuffle com um
+vizinho ativo. As mensagens são datagramas de verdade: os nós são
+multiplexados em --sockets sockets UDP locais, e o cabeçalho de cada
+datagrama identifica origem e destino.
+
+As falhas seguem o modelo do simulador: ao receber um ping, o nó destino o
+descarta com probabilidade sc.sample_fail_prob(params), e o remetente detecta
+a falha por timeout.
+
+Ao final, informa mensagens por segundo, percentis da latência de ida e volta
+dos pings e o atraso (lag) do event loop, além das métricas por ciclo do
+simulador (média de ativos e diversidade passiva).
+"""
+import json
+import time
+import random
+import struct
+import asyncio
+import argparse
+from array import array
+from itertools import count
+
+import sc
+
+# Tipos de datagrama
+PING = 1
+PONG = 2
+SHUFFLE = 3
+SHUFFLE_REPLY = 4
+
+# tipo, origem, destino, sequência; seguido, no shuffle, dos ids em int32
+HEADER = struct.Struct("<BiiI")
+
+# Intervalo de amostragem do atraso do event loop, em segundos
+LAG_INTERVAL = 0.01
+
+TIMEOUT = object()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(q / 100 * len(sorted_values)))]
+
+
+class Endpoint(asyncio.DatagramProtocol):
+    def __init__(self, emulator):
+        self.emulator = emulator
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.emulator.receive(data)
+
+    def error_received(self, exc):
+        self.emulator.errors += 1
+
+
+class Emulator:
+    def __init__(self, params, sockets, cycle_seconds, ping_timeout):
+        self.params = params
+        self.cycle_seconds = cycle_seconds
+        self.ping_timeout = ping_timeout
+        self.nodes = [sc.Node(i, params.active_size, params.passive_size, params.total_nodes)
+                      for i in range(params.total_nodes)]
+        self.sockets = sockets
+        self.endpoints = []
+        self.addresses = []
+        self.seq = count()
+        self.pending = {}
+        self.swap_count = max(1, int(params.passive_size * 0.3))
+        self.stopping = False
+
+        # Medições
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+        self.errors = 0
+        self.rtts = []
+        self.lags = []
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        for _ in range(self.sockets):
+            transport, endpoint = await loop.create_datagram_endpoint(lambda: Endpoint(self),
+                                                                      local_addr=("127.0.0.1", 0))
+            self.endpoints.append(endpoint)
+            self.addresses.append(transport.get_extra_info("sockname"))
+        for node in self.nodes:
+            node.initialize_neighbors()
+
+    def close(self):
+        for endpoint in self.endpoints:
+            endpoint.transport.close()
+
+    # ---------------------------------------------------------
+    # Transporte
+    # ---------------------------------------------------------
+    def send(self, kind, src, dst, seq, payload=b""):
+        # O nó i usa o socket i % sockets, tanto para enviar quanto para receber
+        transport = self.endpoints[src % self.sockets].transport
+        transport.sendto(HEADER.pack(kind, src, dst, seq) + payload, self.addresses[dst % self.sockets])
+        self.sent += 1
+
+    def request(self, kind, src, dst, payload=b""):
+        """Envia um pedido e devolve um future resolvido com a resposta ou TIMEOUT"""
+        loop = asyncio.get_running_loop()
+        seq = next(self.seq) & 0xFFFFFFFF
+        future = loop.create_future()
+        self.pending[seq] = (future, time.perf_counter_ns())
+        loop.call_later(self.ping_timeout, self._expire, seq)
+        self.send(kind, src, dst, seq, payload)
+        return future
+
+    def _expire(self, seq):
+        entry = self.pending.pop(seq, None)
+        if entry is not None and not entry[0].done():
+            entry[0].set_result(TIMEOUT)
+
+    def _resolve(self, seq, result):
+        entry = self.pending.pop(seq, None)
+        if entry is None or entry[0].done():
+            return None
+        entry[0].set_result(result)
+        return entry[1]
+
+    def receive(self, data):
+        self.received += 1
+        kind, src, dst, seq = HEADER.unpack_from(data)
+        if kind == PING:
+            # Falha injetada: o destino não responde
+            if random.random() < sc.sample_fail_prob(self.params):
+                self.dropped += 1
+            else:
+                self.send(PONG, dst, src, seq)
+        elif kind == PONG:
+            sent_at = self._resolve(seq, None)
+            if sent_at is not None:
+                self.rtts.append(time.perf_counter_ns() - sent_at)
+        elif kind == SHUFFLE:
+            node = self.nodes[dst]
+            reply = self.take_swap(node)
+            node._merge_passive(array("i", data[HEADER.size:]))
+            node._replenish_passive()
+            node._record_history(node.passive)
+            self.send(SHUFFLE_REPLY, dst, src, seq, array("i", reply).tobytes())
+        elif kind == SHUFFLE_REPLY:
+            self._resolve(seq, array("i", data[HEADER.size:]))
+
+    # ---------------------------------------------------------
+    # Protocolo de cada nó
+    # ---------------------------------------------------------
+    async def run_node(self, node, start):
+        loop = asyncio.get_running_loop()
+        phase = random.uniform(0, self.cycle_seconds)
+        tick = 0
+        while not self.stopping:
+            # Agenda absoluta: o atraso de um ciclo não se acumula nos seguintes
+            delay = start + phase + tick * self.cycle_seconds - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tick += 1
+            await self.ping_round(node)
+            await self.shuffle(node)
+
+    async def ping_round(self, node):
+        targets = list(node.active)
+        results = await asyncio.gather(*[self.request(PING, node.id, peer) for peer in targets])
+        failed = [peer for peer, result in zip(targets, results) if result is TIMEOUT]
+        for peer in failed:
+            if peer in node.active:
+                node.active.remove(peer)
+        if not failed:
+            return
+        while len(node.active) < node.active_size and node.passive:
+            candidate = random.choice(node.passive)
+            node.passive.remove(candidate)
+            if await self.request(PING, node.id, candidate) is not TIMEOUT and candidate not in node.active:
+                # Durante o teste, o candidato pode ter voltado à Passive View por um shuffle
+                if candidate in node.passive:
+                    node.passive.remove(candidate)
+                node.active.append(candidate)
+        node._replenish_passive()
+
+    async def shuffle(self, node):
+        if not node.active:
+            return
+        partner = random.choice(node.active)
+        my_swap = self.take_swap(node)
+        reply = await self.request(SHUFFLE, node.id, partner, array("i", my_swap).tobytes())
+        if reply is not TIMEOUT:
+            node._merge_passive(reply)
+        node._replenish_passive()
+        node._record_history(node.passive)
+
+    def take_swap(self, node):
+        swap = random.sample(node.passive, min(self.swap_count, len(node.passive)))
+        for p in swap:
+            node.passive.remove(p)
+        return swap
+
+    # ---------------------------------------------------------
+    # Medições
+    # ---------------------------------------------------------
+    async def monitor_lag(self):
+        loop = asyncio.get_running_loop()
+        while not self.stopping:
+            expected = loop.time() + LAG_INTERVAL
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags.append(max(0.0, loop.time() - expected))
+
+    def sample_cycle(self):
+        n = self.params.total_nodes
+        avg_active = sum(len(node.active) for node in self.nodes) / n
+        avg_passive_diversity = sum(len(node.passive_history) for node in self.nodes) / n
+        return avg_active, avg_passive_diversity
+
+
+async def emulate(params, cycles, sockets, cycle_seconds, ping_timeout):
+    random.seed(params.seed)
+    emulator = Emulator(params, sockets, cycle_seconds, ping_timeout)
+    await emulator.start()
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    tasks = [asyncio.ensure_future(emulator.run_node(node, start)) for node in emulator.nodes]
+    lag_task = asyncio.ensure_future(emulator.monitor_lag())
+
+    cycle_records = []
+    last_sent = 0
+    try:
+        for cycle in range(cycles):
+            await asyncio.sleep(start + (cycle + 1) * cycle_seconds - loop.time())
+            avg_active, avg_passive_diversity = emulator.sample_cycle()
+            cycle_messages = emulator.sent - last_sent
+            last_sent = emulator.sent
+            cycle_records.append({"Ciclo": cycle, "MediaAtivos": avg_active,
+                                  "MediaDiversidadePassiva": avg_passive_diversity, "MensagensCiclo": cycle_messages})
+            print(f"Ciclo {cycle}: Média de ativos = {avg_active:.2f} | Diversidade passiva média = "
+                  f"{avg_passive_diversity:.2f} | Mensagens no ciclo = {cycle_messages}")
+    finally:
+        elapsed = loop.time() - start
+        emulator.stopping = True
+        for task in tasks + [lag_task]:
+            task.cancel()
+        await asyncio.gather(*tasks, lag_task, return_exceptions=True)
+        emulator.close()
+
+    rtts = sorted(emulator.rtts)
+    lags = sorted(emulator.lags)
+    return {
+        "total_nodes": params.total_nodes,
+        "sockets": sockets,
+        "cycles": cycles,
+        "cycle_seconds": cycle_seconds,
+        "elapsed_s": elapsed,
+        "messages_sent": emulator.sent,
+        "messages_received": emulator.received,
+        "pings_dropped": emulator.dropped,
+        "socket_errors": emulator.errors,
+        "messages_per_s": emulator.sent / elapsed,
+        "rtt_ms": {f"p{q}": percentile(rtts, q) / 1e6 for q in (50, 90, 99)},
+        "loop_lag_ms": dict({f"p{q}": percentile(lags, q) * 1e3 for q in (50, 90, 99)},
+                            max=lags[-1] * 1e3 if lags else float("nan")),
+        "ciclos": cycle_records,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Emulação da camada NetMaintenance sobre UDP em 127.0.0.1")
+    parser.add_argument("--total_nodes", type=int, default=1000)
+    parser.add_argument("--active_size", type=int, default=4)
+    parser.add_argument("--passive_size", type=int, default=6)
+    parser.add_argument("--fail_mean", type=float, default=0.3)
+    parser.add_argument("--fail_std", type=float, default=0.1)
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--cycle_seconds", type=float, default=1.0, help="Duração de um ciclo, em segundos")
+    parser.add_argument("--ping_timeout", type=float, default=0.2, help="Espera pela resposta de um pedido, em segundos")
+    parser.add_argument("--sockets", type=int, default=16, help="Sockets UDP entre os quais os nós são distribuídos")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", type=str, default=None, help="Grava o relatório completo neste arquivo JSON")
+    args = parser.parse_args()
+
+    params = sc.make_params(total_nodes=args.total_nodes, active_size=args.active_size, passive_size=args.passive_size,
+                            fail_mean=args.fail_mean, fail_std=args.fail_std, seed=args.seed)
+    report = asyncio.run(emulate(params, args.cycles, args.sockets, args.cycle_seconds, args.ping_timeout))
+
+    print(f"\nNós: {report['total_nodes']} em {report['sockets']} sockets | Duração: {report['elapsed_s']:.1f} s")
+    print(f"Mensagens enviadas: {report['messages_sent']} ({report['messages_per_s']:.0f}/s) | "
+          f"Pings descartados (falhas): {report['pings_dropped']} | Erros de socket: {report['socket_errors']}")
+    rtt, lag = report["rtt_ms"], report["loop_lag_ms"]
+    print(f"Latência ida e volta (ms): p50 = {rtt['p50']:.3f} | p90 = {rtt['p90']:.3f} | p99 = {rtt['p99']:.3f}")
+    print(f"Atraso do event loop (ms): p50 = {lag['p50']:.3f} | p90 = {lag['p90']:.3f} | p99 = {lag['p99']:.3f} | "
+          f"máx = {lag['max']:.3f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📁 Relatório salvo em: {args.json}")
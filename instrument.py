@@ -0,0 +1,223 @@
+"""Instrumentação do simulador: tempo por fase, contadores e perfis.
+
+Com sc.py --instrument, simulate_with_debug mede em cada ciclo o tempo de
+parede das fases (pings, substituições, shuffle, métricas, gravação dos
+resultados e trace) e conta as chamadas ao gerador aleatório, os conjuntos
+alocados pela amostragem de candidatos e as chamadas a _replenish_passive.
+Os valores vão para <csv>_perf.csv, uma linha por ciclo; o tempo dos
+gráficos, gerados depois da simulação, é acrescentado como uma linha final.
+
+Os contadores são instalados substituindo, só durante a execução
+instrumentada, o módulo random usado pelo sc.py, sc.sample_excluding e
+Node._replenish_passive por versões que contam as chamadas; o Instrument é
+um gerenciador de contexto, e os originais voltam ao final do bloco mesmo
+quando a execução levanta uma exceção. Sem --instrument,
+o simulador usa um NullInstrument cujos métodos não fazem nada: o custo é de
+poucas chamadas vazias por ciclo, e nenhuma por nó.
+
+Perfis de uma execução completa (cProfile e/ou tracemalloc):
+
+    python3 instrument.py --cprofile perfil.prof --tracemalloc -- sc.py --total_nodes 5000 --plot_mode none
+
+O run.py usa profile_call para perfilar uma única execução da grade
+(run.py --profile_task).
+"""
+import os
+import csv
+import sys
+import time
+import runpy
+import argparse
+
+PHASES = ["Ping", "Substituicao", "Shuffle", "Metricas", "Gravacao", "Trace"]
+COUNTERS = ["ChamadasRNG", "ConjuntosAlocados", "ChamadasReplenish"]
+
+
+class NullInstrument:
+    """Instrumentação desligada"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def mark(self, phase):
+        pass
+
+    def end_cycle(self, cycle):
+        pass
+
+    def close(self):
+        pass
+
+
+class _CountingRandom:
+    """Fachada do módulo random que conta as chamadas de cada função"""
+
+    def __init__(self, module, counts):
+        self._module = module
+        self._counts = counts
+
+    def __getattr__(self, name):
+        target = getattr(self._module, name)
+        if not callable(target):
+            return target
+        counts = self._counts
+
+        def counted(*args, **kwargs):
+            counts["ChamadasRNG"] += 1
+            return target(*args, **kwargs)
+
+        # Cacheado na instância: as próximas consultas não passam pelo __getattr__
+        setattr(self, name, counted)
+        return counted
+
+
+class Instrument(NullInstrument):
+    """Tempo por fase e contadores de uma execução de sc.simulate_with_debug
+
+    Usado como gerenciador de contexto: as substituições no módulo são
+    desfeitas na saída do bloco, mesmo se a execução falhar.
+    """
+
+    def __init__(self, params, module):
+        self.module = module
+        base, ext = os.path.splitext(params.csv_filename or "res.csv")
+        self.filename = f"{base}_perf.csv"
+        self.file = open(self.filename, mode="w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["Ciclo"] + [f"{phase}_s" for phase in PHASES] + ["Total_s"] + COUNTERS)
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self._install()
+        self.last = time.perf_counter()
+
+    # ---------------------------------------------------------
+    # Contadores
+    # ---------------------------------------------------------
+    def _install(self):
+        module = self.module
+        _restore(module)
+        counts = self.counts
+        originals = {"random": module.random, "sample_excluding": module.sample_excluding,
+                     "_replenish_passive": module.Node._replenish_passive}
+        module._instrument_originals = originals
+        sample_excluding = originals["sample_excluding"]
+        replenish = originals["_replenish_passive"]
+
+        def counted_sample_excluding(total_nodes, k, excluded):
+            # O conjunto de excluídos montado por quem chama e, na amostragem por rejeição, a sua cópia
+            counts["ConjuntosAlocados"] += 1 + (2 * (len(excluded) + k) <= total_nodes)
+            return sample_excluding(total_nodes, k, excluded)
+
+        def counted_replenish(node):
+            counts["ChamadasReplenish"] += 1
+            return replenish(node)
+
+        module.random = _CountingRandom(originals["random"], counts)
+        module.sample_excluding = counted_sample_excluding
+        module.Node._replenish_passive = counted_replenish
+
+    # ---------------------------------------------------------
+    # Tempos
+    # ---------------------------------------------------------
+    def mark(self, phase):
+        """Atribui a phase o tempo decorrido desde a marca anterior"""
+        now = time.perf_counter()
+        self.times[phase] += now - self.last
+        self.last = now
+
+    def end_cycle(self, cycle):
+        self.mark("Gravacao")
+        times = [self.times[phase] for phase in PHASES]
+        self.writer.writerow([cycle] + times + [sum(times)] + [self.counts[name] for name in COUNTERS])
+        self.file.flush()
+        self.times = dict.fromkeys(PHASES, 0.0)
+        for name in COUNTERS:
+            self.counts[name] = 0
+        self.last = time.perf_counter()
+
+    def close(self):
+        if self.file.closed:
+            return
+        _restore(self.module)
+        self.file.close()
+        print(f"📁 Instrumentação por ciclo salva em: {self.filename}")
+
+
+def _restore(module):
+    originals = getattr(module, "_instrument_originals", None)
+    if originals is None:
+        return
+    module.random = originals["random"]
+    module.sample_excluding = originals["sample_excluding"]
+    module.Node._replenish_passive = originals["_replenish_passive"]
+    del module._instrument_originals
+
+
+def make_instrument(params, module):
+    if getattr(params, "instrument", False):
+        return Instrument(params, module)
+    return NullInstrument()
+
+
+def record_plot_time(params, seconds):
+    """Acrescenta ao <csv>_perf.csv o tempo gasto com os gráficos"""
+    base, ext = os.path.splitext(params.csv_filename or "res.csv")
+    with open(f"{base}_perf.csv", mode="a", newline="") as f:
+        csv.writer(f).writerow(["graficos"] + [""] * len(PHASES) + [seconds] + [""] * len(COUNTERS))
+
+
+def profile_call(fn, *args, cprofile_path=None, tracemalloc_path=None, top=25):
+    """Executa fn(*args) sob cProfile e/ou tracemalloc, gravando os relatórios nos caminhos indicados"""
+    profiler = None
+    if cprofile_path:
+        import cProfile
+        profiler = cProfile.Profile()
+    if tracemalloc_path:
+        import tracemalloc
+        tracemalloc.start(10)
+    try:
+        if profiler is not None:
+            profiler.enable()
+        try:
+            return fn(*args)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+    finally:
+        if profiler is not None:
+            profiler.dump_stats(cprofile_path)
+        if tracemalloc_path:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(tracemalloc_path, "w") as f:
+                f.write(f"Memória atual: {current / 2**20:.1f} MiB | Pico: {peak / 2**20:.1f} MiB\n\n")
+                for stat in snapshot.statistics("lineno")[:top]:
+                    f.write(f"{stat}\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Executa um script Python sob cProfile e/ou tracemalloc",
+                                     usage="%(prog)s [opções] -- script.py [argumentos do script]")
+    parser.add_argument("--cprofile", type=str, default=None, metavar="ARQUIVO",
+                        help="Grava as estatísticas do cProfile (abrir com python3 -m pstats ARQUIVO)")
+    parser.add_argument("--tracemalloc", type=str, nargs="?", const="memoria.txt", default=None, metavar="ARQUIVO",
+                        help="Grava as linhas que mais alocaram memória e o pico (padrão: memoria.txt)")
+    parser.add_argument("--top", type=int, default=25, help="Linhas exibidas no relatório do tracemalloc")
+    parser.add_argument("script", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    script = args.script[1:] if args.script[:1] == ["--"] else args.script
+    if not script:
+        parser.error("informe o script a executar, ex.: -- sc.py --plot_mode none")
+    sys.argv = script
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script[0])))
+    profile_call(runpy.run_path, script[0], {}, "__main__",
+                 cprofile_path=args.cprofile, tracemalloc_path=args.tracemalloc, top=args.top)
+    if args.cprofile:
+        print(f"📁 Perfil (cProfile) salvo em: {args.cprofile}")
+    if args.tracemalloc:
+        print(f"📁 Relatório de memória salvo em: {args.tracemalloc}")
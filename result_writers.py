@@ -0,0 +1,185 @@
+"""Gravação dos resultados da simulação, ciclo a ciclo.
+
+Cada ciclo é gravado em disco assim que termina, sem acumular as linhas em
+memória. Formatos disponíveis (sc.py --output_format):
+
+- csv: formato original, uma linha por ciclo com as colunas NoX_* de todos os
+  nós (3N+5 colunas), em csv_filename.
+- npy: tabela longa (Ciclo, No, Ativos, MensagensCiclo, MensagensAcumuladas)
+  em <base>_nos.npy, um array estruturado mapeado em memória; com --compress,
+  convertido ao final em <base>_nos.npz comprimido.
+- parquet: a mesma tabela longa em <base>_nos.parquet, um row group por
+  ciclo (requer pyarrow); com --compress, usa zstd.
+
+Nos formatos longos, as métricas gerais de cada ciclo vão para o arquivo
+pequeno <base>_ciclos.csv. Em todos os formatos, <base>_acc.csv recebe as
+mensagens acumuladas finais por nó.
+"""
+import os
+import csv
+
+CYCLE_FIELDS = ["Ciclo", "MediaAtivos", "MediaDiversidadePassiva", "MensagensCiclo", "MensagensAcumuladas"]
+NODE_FIELDS = ["Ciclo", "No", "Ativos", "MensagensCiclo", "MensagensAcumuladas"]
+
+
+def open_result_writer(params, first_cycle=0):
+    """Cria o gravador correspondente a params.output_format (ou um nulo, sem csv_filename)
+
+    first_cycle é o primeiro ciclo gravado (o de um checkpoint restaurado).
+    """
+    if not params.csv_filename:
+        return NullWriter()
+    if params.output_format == "npy":
+        return NpyWriter(params, first_cycle)
+    if params.output_format == "parquet":
+        return ParquetWriter(params)
+    return WideCsvWriter(params)
+
+
+def _base(params):
+    base, ext = os.path.splitext(params.csv_filename)
+    return base
+
+
+def save_accumulated_csv(params, messages_per_node_cumulative):
+    # CSV separado com mensagens acumuladas finais por nó
+    csv_acum_filename = f"{_base(params)}_acc.csv"
+    with open(csv_acum_filename, mode="w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["No", "MensagensAcumuladas"])
+        for i, total in enumerate(messages_per_node_cumulative):
+            writer.writerow([i, total])
+    print(f"📁 Mensagens acumuladas por nó salvas em: {csv_acum_filename}")
+
+
+class NullWriter:
+    # Sem saída por nó: quem chama não precisa montar as listas por nó
+    per_node = False
+
+    def write_cycle(self, cycle, avg_active, avg_passive_diversity, cycle_messages, total_messages,
+                    active_counts, cycle_messages_per_node, messages_per_node_cumulative):
+        pass
+
+    def close(self, messages_per_node_cumulative):
+        pass
+
+
+class WideCsvWriter:
+    """CSV original (uma coluna por nó e métrica), gravado linha a linha"""
+    per_node = True
+
+    def __init__(self, params):
+        self.params = params
+        fieldnames = list(CYCLE_FIELDS)
+        for i in range(params.total_nodes):
+            fieldnames += [f"No{i}_Ativos", f"No{i}_MensagensCiclo", f"No{i}_MensagensAcumuladas"]
+        self.file = open(params.csv_filename, mode="w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(fieldnames)
+
+    def write_cycle(self, cycle, avg_active, avg_passive_diversity, cycle_messages, total_messages,
+                    active_counts, cycle_messages_per_node, messages_per_node_cumulative):
+        row = [cycle, avg_active, avg_passive_diversity, cycle_messages, total_messages]
+        for values in zip(active_counts, cycle_messages_per_node, messages_per_node_cumulative):
+            row.extend(values)
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self, messages_per_node_cumulative):
+        self.file.close()
+        print(f"\n📁 Resultados salvos em: {self.params.csv_filename}")
+        save_accumulated_csv(self.params, messages_per_node_cumulative)
+
+
+class _LongWriter:
+    """Base dos formatos longos: métricas por ciclo em <base>_ciclos.csv"""
+    per_node = True
+
+    def __init__(self, params):
+        self.params = params
+        self.cycles_filename = f"{_base(params)}_ciclos.csv"
+        self.cycles_file = open(self.cycles_filename, mode="w", newline="")
+        self.cycles_writer = csv.writer(self.cycles_file)
+        self.cycles_writer.writerow(CYCLE_FIELDS)
+
+    def write_cycle(self, cycle, avg_active, avg_passive_diversity, cycle_messages, total_messages,
+                    active_counts, cycle_messages_per_node, messages_per_node_cumulative):
+        self.cycles_writer.writerow([cycle, avg_active, avg_passive_diversity, cycle_messages, total_messages])
+        self.cycles_file.flush()
+        self.write_nodes(cycle, active_counts, cycle_messages_per_node, messages_per_node_cumulative)
+
+    def close(self, messages_per_node_cumulative):
+        self.cycles_file.close()
+        self.close_nodes()
+        print(f"\n📁 Métricas por ciclo salvas em: {self.cycles_filename}")
+        print(f"📁 Métricas por nó salvas em: {self.nodes_filename}")
+        save_accumulated_csv(self.params, messages_per_node_cumulative)
+
+
+class NpyWriter(_LongWriter):
+    def __init__(self, params, first_cycle=0):
+        import numpy as np
+        super().__init__(params)
+        self.np = np
+        self.dtype = np.dtype([("Ciclo", "<i4"), ("No", "<i4"), ("Ativos", "<i2"),
+                               ("MensagensCiclo", "<i4"), ("MensagensAcumuladas", "<i8")])
+        self.nodes_filename = f"{_base(params)}_nos.npy"
+        n = params.total_nodes
+        # Uma linha por nó em cada ciclo simulado (a partir do ciclo restaurado, se houver)
+        self.table = np.lib.format.open_memmap(self.nodes_filename, mode="w+", dtype=self.dtype,
+                                               shape=(max(0, params.max_cycles - first_cycle) * n,))
+        self.node_ids = np.arange(n, dtype=np.int32)
+        self.rows = 0
+
+    def write_nodes(self, cycle, active_counts, cycle_messages_per_node, messages_per_node_cumulative):
+        n = self.params.total_nodes
+        block = self.table[self.rows:self.rows + n]
+        block["Ciclo"] = cycle
+        block["No"] = self.node_ids
+        block["Ativos"] = active_counts
+        block["MensagensCiclo"] = cycle_messages_per_node
+        block["MensagensAcumuladas"] = messages_per_node_cumulative
+        self.rows += n
+        self.table.flush()
+
+    def close_nodes(self):
+        table = self.table
+        del self.table
+        if self.params.compress:
+            npy_filename = self.nodes_filename
+            self.nodes_filename = f"{_base(self.params)}_nos.npz"
+            self.np.savez_compressed(self.nodes_filename, nos=table[:self.rows])
+            del table
+            os.remove(npy_filename)
+
+
+class ParquetWriter(_LongWriter):
+    def __init__(self, params):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("--output_format parquet requer o pacote pyarrow (pip install pyarrow)")
+        super().__init__(params)
+        self.pa = pyarrow
+        self.schema = pyarrow.schema([("Ciclo", pyarrow.int32()), ("No", pyarrow.int32()), ("Ativos", pyarrow.int16()),
+                                      ("MensagensCiclo", pyarrow.int32()), ("MensagensAcumuladas", pyarrow.int64())])
+        self.nodes_filename = f"{_base(params)}_nos.parquet"
+        self.writer = pyarrow.parquet.ParquetWriter(self.nodes_filename, self.schema,
+                                                    compression="zstd" if params.compress else "none")
+        self.node_ids = pyarrow.array(range(params.total_nodes), type=pyarrow.int32())
+
+    def write_nodes(self, cycle, active_counts, cycle_messages_per_node, messages_per_node_cumulative):
+        pa = self.pa
+        n = self.params.total_nodes
+        batch = pa.record_batch([
+            pa.array([cycle] * n, type=pa.int32()),
+            self.node_ids,
+            pa.array(active_counts, type=pa.int16()),
+            pa.array(cycle_messages_per_node, type=pa.int32()),
+            pa.array(messages_per_node_cumulative, type=pa.int64()),
+        ], schema=self.schema)
+        self.writer.write_batch(batch)
+
+    def close_nodes(self):
+        self.writer.close()
@@ -0,0 +1,68 @@
+"""Fluxos aleatórios determinísticos e divisíveis para os sorteios de falha.
+
+Com sc.py --rng streams, os sorteios de falha dos pings deixam de consumir o
+gerador global (um random.gauss e um random.random por mensagem) e passam a
+vir de blocos gerados de uma vez pelo NumPy. Cada bloco vem de um gerador
+Philox (baseado em contador) derivado da semente por SeedSequence, com a
+chave (réplica, fase, ciclo): blocos diferentes são fluxos independentes, e
+nenhum depende da ordem em que os outros foram consumidos.
+
+Dentro de um bloco, a linha i pertence ao nó i e cada coluna a uma mensagem
+do nó na fase (a k-ésima posição da Active View no ping, o k-ésimo passivo
+testado na substituição). O sorteio de cada (nó, mensagem) depende apenas de
+(semente, réplica, fase, ciclo), e não da ordem de processamento dos nós nem
+de quantas réplicas são geradas juntas: a réplica 0 de um lote recebe os
+mesmos blocos que uma execução isolada com a mesma semente.
+
+O que é compartilhado são os blocos, não os resultados simulados. A escolha
+de vizinhos continua em outros geradores (o global no motor python, o do
+lote no numpy), e a k-ésima posição da Active View não é o mesmo vizinho nos
+dois motores: o python compacta a Active View e o numpy mantém posições
+vazias (-1). Por isso, a mesma semente não dá a mesma execução nos dois
+motores, nem numa réplica de lote e numa execução isolada.
+
+O motor des não usa fluxos: seus pings não acontecem em fases síncronas por
+ciclo, então não há bloco (fase, ciclo) a que associá-los, e sc.simulate
+recusa --engine des --rng streams.
+"""
+import random
+
+import numpy as np
+
+# Fases com sorteio de falha
+PING = 0
+REPLACE = 1
+
+
+class FailureStreams:
+    """Blocos de sorteios de falha (True = mensagem sem resposta)"""
+
+    def __init__(self, seed, fail_mean, fail_std):
+        self.seed = seed
+        self.fail_mean = fail_mean
+        self.fail_std = fail_std
+
+    def generator(self, replicate, phase, cycle):
+        sequence = np.random.SeedSequence(self.seed, spawn_key=(replicate, phase, cycle))
+        return np.random.Generator(np.random.Philox(sequence))
+
+    def block(self, phase, cycle, rows, width, replicate=0):
+        """Matriz booleana rows x width com as falhas de uma fase do ciclo"""
+        gen = self.generator(replicate, phase, cycle)
+        # Mesmo modelo de sc.sample_fail_prob: probabilidade gaussiana limitada a [0, 1] por mensagem
+        p = np.clip(gen.normal(self.fail_mean, self.fail_std, (rows, width)), 0.0, 1.0)
+        return gen.random((rows, width)) < p
+
+    def stacked(self, phase, cycle, replicates, rows, width):
+        """Blocos de várias réplicas empilhados (réplica r nas linhas r*rows a (r+1)*rows - 1)"""
+        return np.concatenate([self.block(phase, cycle, rows, width, r) for r in range(replicates)])
+
+
+def make_streams(params):
+    """FailureStreams para params.rng == "streams" (fixando params.seed, se ausente), ou None"""
+    if getattr(params, "rng", "global") != "streams":
+        return None
+    if params.seed is None:
+        # Semente sorteada é gravada em params, para constar no resumo e permitir repetir a execução
+        params.seed = random.SystemRandom().randrange(2**63)
+    return FailureStreams(params.seed, params.fail_mean, params.fail_std)
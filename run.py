@@ -1,16 +1,26 @@
+import io
 import os
-import subprocess
+import csv
+import json
+import math
+import zlib
+import time
+import random
+import argparse
+import contextlib
+import traceback
+import multiprocessing
+
+import sc
+import instrument
+import runcache
 
 # Parâmetros fixos
 active_size = 4
 passive_size = 6
 fail_std = 0.1
 max_cycles = 30
-debug_nodes = ["0", "1", "9"]
-script = "sc_v11.py"
-
-# Caminho absoluto do script raiz
-script_path = os.path.abspath(script)
+debug_nodes = [0, 1, 9]
 
 # Listas de variação
 total_nodes_list = range(10, 51, 10)       # 10,20,30,40,50
@@ -19,38 +29,540 @@ fail_probs = [0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45, 0.50, 0.55] # 10 p
 # Número de execuções por configuração
 repetitions = 30
 
-for n in total_nodes_list:
-    n_dir = f"n{n}"
-    os.makedirs(n_dir, exist_ok=True)
-
-    for p in fail_probs:
-        prob_str = f"prob{str(p).replace('.', '_')}"
-        prob_dir = os.path.join(n_dir, prob_str)
-        os.makedirs(prob_dir, exist_ok=True)
-
-        for rep in range(1, repetitions + 1):
-            run_dir = os.path.join(prob_dir, f"rep{rep}")
-            os.makedirs(run_dir, exist_ok=True)
-
-            # Arquivos de saída (relativos ao run_dir)
-            csv_file = "res.csv"
-            debug_file = os.path.join(run_dir, "debug.txt")
-
-            # Monta o comando
-            cmd = [
-                "python3", script_path,
-                "--total_nodes", str(n),
-                "--active_size", str(active_size),
-                "--passive_size", str(passive_size),
-                "--fail_mean", str(p),
-                "--fail_std", str(fail_std),
-                "--max_cycles", str(max_cycles),
-                "--debug_nodes"
-            ] + debug_nodes + [
-                "--csv_filename", csv_file,
-                "--save_graphs"
-            ]
-
-            print(f"\nExecutando em {run_dir}: {cmd}")
-            with open(debug_file, "w") as dbg:
-                subprocess.run(cmd, stdout=dbg, stderr=subprocess.STDOUT, cwd=run_dir)
+# Resumos de todas as execuções da varredura (JSON Lines), lido pelo analysis.py
+results_file = "resultados.jsonl"
+
+
+def build_tasks(root_dir, base_seed, batched=False):
+    """Gera a grade completa de execuções, cada uma com sua própria semente"""
+    tasks = []
+    for n in total_nodes_list:
+        for p in fail_probs:
+            if batched:
+                # Todas as repetições do cenário em uma única chamada, gravadas no diretório probX
+                run_dir = os.path.join(root_dir, f"n{n}", prob_dir(p))
+                tasks.append({"run_dir": run_dir, "total_nodes": n, "fail_mean": p,
+                              "seed": base_seed + len(tasks), "replicates": repetitions})
+                continue
+            for rep in range(1, repetitions + 1):
+                # A semente depende apenas da posição na grade, então uma
+                # execução retomada reproduz exatamente as mesmas sementes
+                tasks.append(make_task(root_dir, n, p, rep, base_seed + len(tasks)))
+    return tasks
+
+
+def prob_dir(p):
+    return f"prob{str(p).replace('.', '_')}"
+
+
+def make_task(root_dir, n, p, rep, seed):
+    run_dir = os.path.join(root_dir, f"n{n}", prob_dir(p), f"rep{rep}")
+    return {"run_dir": run_dir, "total_nodes": n, "fail_mean": p, "seed": seed, "replicates": 1, "rep": rep}
+
+
+def build_warmups(tasks, root_dir, base_seed, cycles, fail_mean):
+    """Um aquecimento por (N, repetição), compartilhado pelos cenários de falha da grade.
+
+    Cada tarefa recebe em "restore" o checkpoint do seu aquecimento; as
+    sementes dos aquecimentos vêm depois das sementes da grade.
+    """
+    warmups = {}
+    for task in tasks:
+        key = (task["total_nodes"], task["rep"])
+        if key not in warmups:
+            path = os.path.join(root_dir, f"n{key[0]}", "aquecimento", f"rep{key[1]}.ckpt")
+            warmups[key] = {"checkpoint": path, "total_nodes": key[0], "fail_mean": fail_mean,
+                            "seed": base_seed + len(tasks) + len(warmups), "cycles": cycles}
+        task["restore"] = warmups[key]["checkpoint"]
+    return list(warmups.values())
+
+
+def run_warmup(warmup):
+    """Simula os ciclos de aquecimento e grava o checkpoint (sem trace nem arquivos de resultado)"""
+    os.makedirs(os.path.dirname(warmup["checkpoint"]), exist_ok=True)
+    params = sc.make_params(
+        total_nodes=warmup["total_nodes"],
+        active_size=active_size,
+        passive_size=passive_size,
+        fail_mean=warmup["fail_mean"],
+        fail_std=fail_std,
+        max_cycles=warmup["cycles"],
+        csv_filename="",
+        plot_mode="none",
+        trace_level="off",
+        seed=warmup["seed"],
+        rng=warmup["rng"],
+        checkpoint=warmup["checkpoint"],
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        sc.simulate(params)
+    return warmup["checkpoint"]
+
+
+def is_done(task):
+    # debug.txt só é criado (via rename) quando a execução termina
+    return os.path.exists(os.path.join(task["run_dir"], "debug.txt"))
+
+
+def read_run_records(task, root_dir):
+    """Lê o resumo gravado pelo sc.py em run_dir, identificando a execução pelo caminho relativo"""
+    records = []
+    with open(os.path.join(task["run_dir"], "res_resumo.jsonl")) as f:
+        for line in f:
+            record = json.loads(line)
+            record["Execucao"] = os.path.relpath(task["run_dir"], root_dir)
+            records.append(record)
+    return records
+
+
+def sync_results_file(tasks, root_dir):
+    """Acrescenta ao arquivo da varredura os resumos de execuções concluídas que ainda não constam nele"""
+    path = os.path.join(root_dir, results_file)
+    known = set()
+    if os.path.exists(path):
+        with open(path) as f:
+            known = {json.loads(line)["Execucao"] for line in f if line.strip()}
+    with open(path, "a") as f:
+        for task in tasks:
+            if is_done(task) and os.path.relpath(task["run_dir"], root_dir) not in known:
+                for record in read_run_records(task, root_dir):
+                    f.write(json.dumps(record) + "\n")
+
+
+# -------------------------------------------------------------
+# VARREDURA ADAPTATIVA
+# -------------------------------------------------------------
+Z95 = 1.959964
+# Quantis 97,5% exatos da t de Student onde a expansão de Cornish-Fisher ainda erra muito
+T95_SMALL = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776}
+
+
+def wilson_half_width(successes, total, z=Z95):
+    """Meia largura do intervalo de Wilson (95%) de uma proporção; não se anula com 0% ou 100%"""
+    if total == 0:
+        return math.inf
+    p = successes / total
+    return z / (1 + z * z / total) * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total))
+
+
+def t_quantile(df, z=Z95):
+    """Quantil 97,5% da t de Student (expansão de Cornish-Fisher a partir de 5 graus de liberdade)"""
+    if df in T95_SMALL:
+        return T95_SMALL[df]
+    return z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df * df)
+
+
+def cell_stats(records):
+    """Taxa de convergência e tempo médio de um cenário, com as meias larguras dos ICs de 95%"""
+    total = len(records)
+    times = [r["Tempo_Convergencia"] for r in records if r["Convergiu"]]
+    stats = {"reps": total, "rate": 100 * len(times) / total if total else math.nan,
+             "rate_half": 100 * wilson_half_width(len(times), total),
+             "time": sum(times) / len(times) if times else math.nan, "time_half": math.nan}
+    if len(times) >= 2:
+        mean = stats["time"]
+        std = math.sqrt(sum((t - mean) ** 2 for t in times) / (len(times) - 1))
+        stats["time_half"] = t_quantile(len(times) - 1) * std / math.sqrt(len(times))
+    return stats
+
+
+def task_seed(base_seed, n, p, rep):
+    """Semente de (N, p, repetição): a mesma da grade completa para pontos da grade, e derivada
+    do próprio cenário para os pontos acrescentados pelo refinamento"""
+    if p in fail_probs and n in total_nodes_list and rep <= repetitions:
+        cell = list(total_nodes_list).index(n) * len(fail_probs) + fail_probs.index(p)
+        return base_seed + cell * repetitions + rep - 1
+    grid_size = len(total_nodes_list) * len(fail_probs) * repetitions
+    return base_seed + grid_size + zlib.crc32(f"{n}|{p!r}|{rep}".encode())
+
+
+def cell_target(done, stats, args):
+    """Repetições que o cenário deve ter ao final da rodada (igual a done quando está concluído)"""
+    if done < args.min_reps:
+        return args.min_reps
+    # Sempre em lotes completos a partir de min_reps, para que uma retomada decida igual
+    if (done - args.min_reps) % args.batch_reps:
+        return min(repetitions, done + args.batch_reps - (done - args.min_reps) % args.batch_reps)
+    # Com menos de duas convergências o tempo não tem IC (NaN) e só a taxa decide
+    precise = stats["rate_half"] <= args.ci_rate and not stats["time_half"] > args.ci_time
+    if precise or done >= repetitions:
+        return done
+    return min(repetitions, done + args.batch_reps)
+
+
+def refine_points(points, stats, args):
+    """Pontos médios entre probabilidades vizinhas cuja taxa de convergência muda mais que refine_threshold"""
+    new = []
+    for a, b in zip(points, points[1:]):
+        midpoint = round((a + b) / 2, 6)
+        if (abs(stats[b]["rate"] - stats[a]["rate"]) > args.refine_threshold
+                and (b - a) / 2 >= args.min_step - 1e-9 and midpoint not in points):
+            new.append(midpoint)
+    return new
+
+
+def adaptive_sweep(args, root_dir, base_seed, configure):
+    """Executa rodadas até que todos os cenários tenham ICs abaixo do alvo (ou repetitions repetições)
+
+    A cada rodada, cenários imprecisos recebem mais batch_reps repetições e,
+    para cada N cujos cenários estão todos concluídos, pontos intermediários
+    são acrescentados onde Convergiu_pct varia bruscamente. As decisões
+    dependem só dos resultados em disco, então a varredura pode ser retomada.
+    """
+    points = {n: sorted(fail_probs) for n in total_nodes_list}
+    records = {}
+    round_number = 0
+    while True:
+        round_number += 1
+        pending, finished, stats = [], [], {}
+        refined = False
+        for n in total_nodes_list:
+            open_cells = False
+            for p in points[n]:
+                tasks = configure([make_task(root_dir, n, p, rep, task_seed(base_seed, n, p, rep))
+                                   for rep in range(1, repetitions + 1)])
+                done = 0
+                while done < len(tasks) and is_done(tasks[done]):
+                    done += 1
+                cell_records = []
+                for task in tasks[:done]:
+                    if task["run_dir"] not in records:
+                        records[task["run_dir"]] = read_run_records(task, root_dir)
+                    cell_records += records[task["run_dir"]]
+                stats[n, p] = cell_stats(cell_records)
+                target = cell_target(done, stats[n, p], args)
+                finished += tasks[:done]
+                pending += [t for t in tasks[done:target] if not is_done(t)]
+                open_cells = open_cells or target > done
+            if not open_cells:
+                new = refine_points(points[n], {p: stats[n, p] for p in points[n]}, args)
+                if new:
+                    print(f"N = {n}: refinando em p = {', '.join(map(str, new))}")
+                    points[n] = sorted(points[n] + new)
+                    refined = True
+                    for p in new:
+                        tasks = configure([make_task(root_dir, n, p, rep, task_seed(base_seed, n, p, rep))
+                                           for rep in range(1, args.min_reps + 1)])
+                        pending += [t for t in tasks if not is_done(t)]
+
+        sync_results_file(finished, root_dir)
+        if not pending:
+            # Numa retomada, os pontos refinados podem já estar concluídos: reavalia antes de encerrar
+            if refined:
+                continue
+            break
+        print(f"\nRodada {round_number}: {len(pending)} execuções")
+        if execute(pending, args, root_dir):
+            raise SystemExit("Execuções com erro (ver debug.txt.tmp); corrija e retome a varredura")
+
+    save_plan(args, root_dir, points, stats)
+
+
+def save_plan(args, root_dir, points, stats):
+    """Grava plano_adaptativo.csv e compara o custo com o da grade completa"""
+    path = os.path.join(root_dir, "plano_adaptativo.csv")
+    used = 0
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Total_Nodes", "Fail_Prob", "Repeticoes", "Convergiu_pct", "IC_Convergiu_pct",
+                         "Tempo_Convergencia_medio", "IC_Tempo_Convergencia"])
+        for n in total_nodes_list:
+            for p in points[n]:
+                st = stats[n, p]
+                used += st["reps"]
+                writer.writerow([n, p, st["reps"], st["rate"], st["rate_half"], st["time"], st["time_half"]])
+    full = len(total_nodes_list) * len(fail_probs) * repetitions
+    print(f"\nVarredura adaptativa concluída: {used} execuções, contra {full} da grade completa "
+          f"({used / full:.0%}), com {sum(len(points[n]) for n in points)} cenários")
+    print(f"📁 Plano e intervalos de confiança salvos em: {path}")
+
+
+def init_worker():
+    # Processos da varredura nunca exibem janelas
+    sc.use_headless_backend()
+
+
+def run_task(task):
+    """Executa uma simulação no processo atual, gravando a saída em run_dir"""
+    run_dir = task["run_dir"]
+    os.makedirs(run_dir, exist_ok=True)
+    debug_file = os.path.join(run_dir, "debug.txt")
+    tmp_file = debug_file + ".tmp"
+
+    params = sc.make_params(
+        total_nodes=task["total_nodes"],
+        active_size=active_size,
+        passive_size=passive_size,
+        fail_mean=task["fail_mean"],
+        fail_std=fail_std,
+        max_cycles=max_cycles,
+        debug_nodes=debug_nodes,
+        csv_filename="res.csv",
+        save_graphs=True,
+        graphs_dir=run_dir,
+        plot_mode="headless" if task["plots"] == "inline" else "none",
+        seed=task["seed"],
+        engine=task["engine"],
+        replicates=task["replicates"],
+        trace_level=task["trace_level"],
+        instrument=task["instrument"],
+        rng=task["rng"],
+        connectivity=task["connectivity"],
+        restore=task.get("restore"),
+        # Cenários de uma varredura com aquecimento sempre ramificam, mesmo com a falha do aquecimento
+        branch=bool(task.get("restore")),
+    )
+
+    # Execução já calculada (mesmo código, parâmetros e semente): copia a saída do cache.
+    # Medições de desempenho (instrument) são sempre refeitas
+    cache = key = None
+    if task.get("cache") and not params.instrument:
+        cache = runcache.RunCache(*task["cache"])
+        key = runcache.run_key(params)
+        hit, results = cache.fetch(key, run_dir, marker="debug.txt")
+        if hit:
+            return run_dir, True, params, results, True
+
+    # Arquivos de saída são relativos ao run_dir, como na execução via linha de comando
+    old_cwd = os.getcwd()
+    ok = True
+    results = None
+    try:
+        os.chdir(run_dir)
+        with open(tmp_file, "w") as dbg, contextlib.redirect_stdout(dbg), contextlib.redirect_stderr(dbg):
+            try:
+                print(f"Semente: {params.seed}")
+                if params.replicates > 1:
+                    sc.simulate_replicates(params)
+                else:
+                    results = sc.simulate(params)
+                    if params.plot_mode != "none":
+                        start = time.perf_counter()
+                        sc.plot_graphs(params, *results)
+                        if params.instrument:
+                            instrument.record_plot_time(params, time.perf_counter() - start)
+            except Exception:
+                traceback.print_exc()
+                ok = False
+    finally:
+        os.chdir(old_cwd)
+
+    if ok:
+        os.replace(tmp_file, debug_file)
+    if task["plots"] != "deferred" or results is None:
+        results = None
+    if ok and cache is not None:
+        # No modo deferred os gráficos ainda não existem: guarda os resultados para gerá-los num acerto
+        cache.store(key, params, run_dir, results)
+    return run_dir, ok, params, results, False
+
+
+def profile_task(tasks, root_dir, relpath, warmups=()):
+    """Executa uma única tarefa da grade sob cProfile e tracemalloc, com a instrumentação ligada"""
+    matches = [t for t in tasks if os.path.relpath(t["run_dir"], root_dir) == os.path.normpath(relpath)]
+    if not matches:
+        raise SystemExit(f"Execução {relpath} não pertence à grade (ex.: n10/prob0_1/rep1)")
+    task = dict(matches[0], instrument=True)
+    # O aquecimento, se ainda não existir, é simulado antes e fora do perfil
+    for w in warmups:
+        if w["checkpoint"] == task.get("restore") and not os.path.exists(w["checkpoint"]):
+            run_warmup(w)
+    sc.use_headless_backend()
+    cprofile_path = os.path.join(task["run_dir"], "perfil.prof")
+    tracemalloc_path = os.path.join(task["run_dir"], "memoria.txt")
+    os.makedirs(task["run_dir"], exist_ok=True)
+    run_dir, ok, params, results, cached = instrument.profile_call(run_task, task, cprofile_path=cprofile_path,
+                                                           tracemalloc_path=tracemalloc_path)
+    print(f"{relpath}: {'ok' if ok else 'ERRO (ver debug.txt.tmp)'}")
+    print(f"📁 Perfil (cProfile) salvo em: {cprofile_path} (abrir com python3 -m pstats)")
+    print(f"📁 Relatório de memória salvo em: {tracemalloc_path}")
+
+
+def render_task(args):
+    """Gera os gráficos de uma execução já concluída (modo deferred)"""
+    params, results = args
+    params.plot_mode = "headless"
+    sc.plot_graphs(params, *results)
+    return params.graphs_dir
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Execução paralela da grade de experimentos")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Número de processos (padrão: número de núcleos)")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Execuções enviadas por vez a cada processo (padrão: automático)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Semente base da grade (padrão: aleatória, exibida no início)")
+    parser.add_argument("--engine", choices=["python", "numpy", "des"], default="python",
+                        help="Motor de simulação usado em cada execução (ver sc.py --engine)")
+    parser.add_argument("--rng", choices=["global", "streams"], default="global",
+                        help="Gerador dos sorteios de falha de cada execução (ver sc.py --rng)")
+    parser.add_argument("--batched", action="store_true",
+                        help="Simula as repetições de cada cenário em lote (sc.py --replicates), gravando "
+                             "res.csv e res_replicas.csv em nX/probY, sem diretórios repW nem gráficos por execução")
+    parser.add_argument("--trace_level", choices=["off", "summary", "debug"], default="debug",
+                        help="Nível de trace gravado no debug.txt de cada execução (ver sc.py --trace_level)")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Grava res_perf.csv (tempo por fase e contadores) em cada execução (ver sc.py "
+                             "--instrument); requer o motor python, sem --batched")
+    parser.add_argument("--connectivity", action="store_true",
+                        help="Mede a conectividade do overlay em cada execução (ver sc.py --connectivity); "
+                             "o analysis.py agrega a maior componente, as partições e o diâmetro")
+    parser.add_argument("--profile_task", type=str, default=None, metavar="nX/probY/repW",
+                        help="Executa apenas esta execução da grade, no processo atual, sob cProfile e tracemalloc, "
+                             "gravando perfil.prof e memoria.txt no seu diretório (com a instrumentação ligada: "
+                             "requer o motor python, sem --batched)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Varredura adaptativa: acrescenta repetições a cada cenário só até os ICs de 95%% da taxa "
+                             "e do tempo de convergência ficarem abaixo do alvo, e refina fail_prob onde a taxa muda "
+                             "bruscamente (até repetitions repetições por cenário)")
+    parser.add_argument("--min_reps", type=int, default=5, help="Modo adaptativo: repetições iniciais de cada cenário")
+    parser.add_argument("--batch_reps", type=int, default=5,
+                        help="Modo adaptativo: repetições acrescentadas por rodada a um cenário impreciso")
+    parser.add_argument("--ci_rate", type=float, default=17.0,
+                        help="Modo adaptativo: meia largura máxima do IC de Convergiu_pct, em pontos percentuais. "
+                             "O IC é mais largo com taxas perto de 50%%: ~20 pp com 20 repetições, ~18 com 25 e ~17 "
+                             "com 30 (repetitions). Alvos menores que isso nunca são atingidos nesses cenários, que "
+                             "param no limite de repetições; alvos maiores economizam repetições às custas de ICs "
+                             "mais largos")
+    parser.add_argument("--ci_time", type=float, default=1.0,
+                        help="Modo adaptativo: meia largura máxima do IC do tempo médio de convergência, em ciclos")
+    parser.add_argument("--refine_threshold", type=float, default=25.0,
+                        help="Modo adaptativo: diferença de Convergiu_pct (pontos percentuais) entre probabilidades "
+                             "vizinhas que gera um ponto intermediário")
+    parser.add_argument("--min_step", type=float, default=0.0125,
+                        help="Modo adaptativo: menor espaçamento entre probabilidades de falha após o refinamento")
+    parser.add_argument("--warmup", type=int, default=0, metavar="CICLOS",
+                        help="Simula CICLOS ciclos de aquecimento uma vez por (N, repetição), grava um checkpoint em "
+                             "nX/aquecimento/repW.ckpt e ramifica dele todos os cenários de falha, que seguem até "
+                             "max_cycles (motor python, sem --batched)")
+    parser.add_argument("--warmup_fail_mean", type=float, default=0.3,
+                        help="Probabilidade média de falha durante o aquecimento")
+    parser.add_argument("--cache", type=str, default=None, metavar="DIR",
+                        help="Cache de execuções endereçado por conteúdo (código do simulador, parâmetros e semente): "
+                             "execuções já presentes em DIR são copiadas em vez de simuladas (ver runcache.py)")
+    parser.add_argument("--cache_size", type=float, default=2048, metavar="MB",
+                        help="Tamanho máximo do cache; ao final da varredura, as entradas usadas há mais tempo "
+                             "são removidas até caber")
+    parser.add_argument("--plots", choices=["inline", "deferred", "none"], default="inline",
+                        help="inline: cada processo gera seus gráficos; deferred: gráficos gerados por um pool "
+                             "separado, sem atrasar as simulações; none: sem gráficos")
+    parser.add_argument("--render_workers", type=int, default=1,
+                        help="Processos dedicados aos gráficos no modo deferred")
+    return parser
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.warmup and (args.batched or args.engine != "python"):
+        parser.error("--warmup requer o motor python e não pode ser combinado com --batched")
+    if (args.instrument or args.profile_task) and (args.batched or args.engine != "python"):
+        parser.error("--instrument e --profile_task requerem o motor python e não podem ser combinados com --batched")
+    if args.engine == "des" and args.rng != "global":
+        parser.error("--rng streams está disponível apenas nos motores python e numpy")
+    if args.adaptive and (args.batched or args.warmup or args.profile_task):
+        parser.error("--adaptive não pode ser combinado com --batched, --warmup nem --profile_task")
+    if args.warmup >= max_cycles:
+        parser.error(f"--warmup deve ser menor que max_cycles ({max_cycles})")
+    widest = 100 * wilson_half_width(repetitions // 2, repetitions)
+    if args.adaptive and args.ci_rate < widest:
+        print(f"Aviso: --ci_rate {args.ci_rate:g} é menor que o IC de uma taxa de 50% com {repetitions} repetições "
+              f"({widest:.1f} pp); esses cenários vão parar no limite de repetições sem atingir o alvo")
+
+    root_dir = os.getcwd()
+    if args.cache:
+        args.cache = os.path.abspath(args.cache)
+    base_seed = args.seed if args.seed is not None else random.SystemRandom().randrange(2**31)
+    print(f"Semente base: {base_seed}")
+
+    def configure(tasks):
+        for t in tasks:
+            t["plots"] = args.plots
+            t["engine"] = args.engine
+            t["trace_level"] = args.trace_level
+            t["instrument"] = args.instrument
+            t["rng"] = args.rng
+            t["connectivity"] = args.connectivity
+            t["cache"] = (args.cache, args.cache_size * 2**20) if args.cache else None
+        return tasks
+
+    tasks = configure(build_tasks(root_dir, base_seed, batched=args.batched))
+
+    warmups = []
+    if args.warmup:
+        warmups = build_warmups(tasks, root_dir, base_seed, args.warmup, args.warmup_fail_mean)
+        for w in warmups:
+            w["rng"] = args.rng
+
+    if args.profile_task:
+        profile_task(tasks, root_dir, args.profile_task, warmups)
+        return
+
+    if args.adaptive:
+        adaptive_sweep(args, root_dir, base_seed, configure)
+        return
+
+    sync_results_file(tasks, root_dir)
+    pending = [t for t in tasks if not is_done(t)]
+    print(f"{len(tasks) - len(pending)} de {len(tasks)} execuções já concluídas; {len(pending)} pendentes")
+    if pending:
+        execute(pending, args, root_dir, warmups)
+
+
+def execute(pending, args, root_dir, warmups=()):
+    """Executa as tarefas pendentes no pool, acrescentando os resumos ao arquivo da varredura; devolve as falhas"""
+    workers = max(1, min(args.workers, len(pending)))
+    chunksize = args.chunksize or max(1, len(pending) // (workers * 4))
+
+    # Aquecimentos ainda sem checkpoint (o arquivo só aparece, via rename, quando completo)
+    needed = {t["restore"] for t in pending if t.get("restore")}
+    missing = [w for w in warmups if w["checkpoint"] in needed and not os.path.exists(w["checkpoint"])]
+    if missing:
+        print(f"Aquecendo {len(missing)} redes por {args.warmup} ciclos...")
+        with multiprocessing.Pool(processes=min(workers, len(missing)), initializer=init_worker) as pool:
+            for _ in pool.imap_unordered(run_warmup, missing):
+                pass
+
+    done = 0
+    failures = 0
+    hits = 0
+    render_pool = None
+    if args.plots == "deferred":
+        render_pool = multiprocessing.Pool(processes=max(1, args.render_workers), initializer=init_worker)
+    renders = []
+    summary = open(os.path.join(root_dir, results_file), "a")
+    try:
+        with multiprocessing.Pool(processes=workers, initializer=init_worker) as pool:
+            for run_dir, ok, params, results, cached in pool.imap_unordered(run_task, pending, chunksize=chunksize):
+                done += 1
+                failures += not ok
+                hits += cached
+                status = ("ok (cache)" if cached else "ok") if ok else "ERRO (ver debug.txt.tmp)"
+                print(f"[{done}/{len(pending)}] {os.path.relpath(run_dir, root_dir)}: {status}")
+                if ok:
+                    # Só o processo principal escreve no arquivo da varredura
+                    for record in read_run_records({"run_dir": run_dir}, root_dir):
+                        summary.write(json.dumps(record) + "\n")
+                    summary.flush()
+                if render_pool is not None and ok and results is not None:
+                    renders.append(render_pool.apply_async(render_task, ((params, results),)))
+        if render_pool is not None:
+            print(f"Aguardando a geração de {len(renders)} conjuntos de gráficos...")
+            for r in renders:
+                r.get()
+    finally:
+        summary.close()
+        if render_pool is not None:
+            render_pool.close()
+            render_pool.join()
+    if args.cache:
+        removed, size = runcache.RunCache(args.cache, args.cache_size * 2**20).evict()
+        print(f"Cache: {hits} de {len(pending)} execuções reaproveitadas | {removed} entradas removidas | "
+              f"{size / 2**20:.1f} MB em {args.cache}")
+    return failures
+
+
+if __name__ == "__main__":
+    main()
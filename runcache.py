@@ -0,0 +1,180 @@
+"""Cache de execuções endereçado por conteúdo (run.py --cache DIR).
+
+A chave de cada execução é o SHA-256 de três coisas:
+
+- a versão do simulador: o conteúdo dos módulos que determinam a saída
+  (SOURCES), de modo que qualquer mudança no código invalida o cache;
+- o conjunto completo de parâmetros (sc.make_params), exceto os caminhos,
+  que não alteram o resultado;
+- a semente e, numa execução restaurada, o conteúdo do checkpoint de origem.
+
+Cada entrada é um diretório <DIR>/ab/abcdef.../ com cópias dos arquivos que
+a execução gravou em run_dir (debug.txt, res.csv, gráficos...) e um
+entrada.json com a chave, os parâmetros e o tamanho. Uma varredura que
+encontra a chave copia esses arquivos em vez de simular, então cenários já
+calculados por outra varredura (outro diretório, outra grade) ou por uma
+versão interrompida da mesma não são recalculados.
+
+As entradas são gravadas em um diretório temporário e renomeadas, então uma
+execução interrompida nunca deixa uma entrada incompleta, e vários processos
+podem gravar ao mesmo tempo. A data de modificação de entrada.json marca o
+último uso; quando o cache passa do limite de tamanho, as entradas usadas há
+mais tempo são removidas primeiro (LRU).
+"""
+import os
+import json
+import shutil
+import pickle
+import hashlib
+import argparse
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Módulos cujo código determina a saída de uma execução
+SOURCES = ("sc.py", "sc_vec.py", "sc_des.py", "rng.py", "tracing.py", "result_writers.py", "checkpoint.py",
+           "connectivity.py", "topology.py")
+
+# Parâmetros que só dizem onde gravar, e não o que é gravado
+PATH_PARAMS = ("graphs_dir", "restore")
+
+INDEX_FILE = "entrada.json"
+RESULTS_FILE = "resultados.pkl"
+
+_source_digest = None
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def source_digest():
+    """Hash do código do simulador (calculado uma vez por processo)"""
+    global _source_digest
+    if _source_digest is None:
+        h = hashlib.sha256()
+        for name in SOURCES:
+            h.update(name.encode())
+            h.update(file_digest(os.path.join(MODULE_DIR, name)).encode())
+        _source_digest = h.hexdigest()
+    return _source_digest
+
+
+def run_key(params):
+    """Chave da execução descrita por params (com a semente já fixada)"""
+    content = {key: value for key, value in sorted(vars(params).items()) if key not in PATH_PARAMS}
+    if params.restore:
+        content["restore"] = file_digest(params.restore)
+    content["sources"] = source_digest()
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+class RunCache:
+    """Entradas do cache em root, limitadas a max_bytes"""
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def entry_dir(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def fetch(self, key, run_dir, marker):
+        """Copia a entrada para run_dir e devolve (True, resultados guardados ou None); (False, None) se ausente.
+
+        O arquivo marker (que indica execução concluída) é copiado por último.
+        """
+        entry = self.entry_dir(key)
+        index = os.path.join(entry, INDEX_FILE)
+        try:
+            os.utime(index)
+        except FileNotFoundError:
+            return False, None
+        results = None
+        names = sorted(os.listdir(entry), key=lambda name: name == marker)
+        for name in names:
+            if name == INDEX_FILE:
+                continue
+            if name == RESULTS_FILE:
+                with open(os.path.join(entry, name), "rb") as f:
+                    results = pickle.load(f)
+                continue
+            target = os.path.join(run_dir, name)
+            shutil.copy2(os.path.join(entry, name), target + ".tmp")
+            os.replace(target + ".tmp", target)
+        return True, results
+
+    def store(self, key, params, run_dir, results=None):
+        """Grava os arquivos de run_dir (e, se informados, os resultados para gráficos adiados) sob key"""
+        entry = self.entry_dir(key)
+        if os.path.exists(entry):
+            return
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp = f"{entry}.{os.getpid()}.tmp"
+        os.makedirs(tmp, exist_ok=True)
+        size = 0
+        for name in os.listdir(run_dir):
+            path = os.path.join(run_dir, name)
+            if os.path.isfile(path) and not name.endswith(".tmp"):
+                shutil.copy2(path, os.path.join(tmp, name))
+                size += os.path.getsize(path)
+        if results is not None:
+            with open(os.path.join(tmp, RESULTS_FILE), "wb") as f:
+                pickle.dump(results, f, protocol=pickle.HIGHEST_PROTOCOL)
+            size += os.path.getsize(os.path.join(tmp, RESULTS_FILE))
+        with open(os.path.join(tmp, INDEX_FILE), "w") as f:
+            json.dump({"key": key, "bytes": size, "params": vars(params)}, f)
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # Outro processo gravou a mesma entrada primeiro
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def entries(self):
+        """(último uso, bytes, diretório) de cada entrada completa"""
+        found = []
+        if not os.path.isdir(self.root):
+            return found
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                index = os.path.join(prefix_dir, name, INDEX_FILE)
+                if name.endswith(".tmp") or not os.path.exists(index):
+                    continue
+                with open(index) as f:
+                    size = json.load(f)["bytes"]
+                found.append((os.path.getmtime(index), size, os.path.join(prefix_dir, name)))
+        return found
+
+    def evict(self):
+        """Remove as entradas usadas há mais tempo até o cache caber em max_bytes; devolve (removidas, bytes restantes)"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed, total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exibe o uso do cache de execuções e aplica o limite de tamanho")
+    parser.add_argument("cache_dir")
+    parser.add_argument("--max_mb", type=float, default=None,
+                        help="Remove as entradas usadas há mais tempo até o cache ocupar no máximo MAX_MB")
+    args = parser.parse_args()
+
+    cache = RunCache(args.cache_dir, args.max_mb * 2**20 if args.max_mb is not None else float("inf"))
+    if args.max_mb is not None:
+        removed, total = cache.evict()
+        print(f"Entradas removidas: {removed}")
+    entries = cache.entries()
+    print(f"Entradas: {len(entries)} | Tamanho: {sum(size for _, size, _ in entries) / 2**20:.1f} MB")
@@ -1,42 +1,87 @@
 import random
-import csv
 import matplotlib.pyplot as plt
 import argparse
 import os
+import sys
+import json
+import time
+from array import array
+from bisect import bisect_left
+
+import rng
+import tracing
+import checkpoint
+import connectivity
+import instrument
+from result_writers import open_result_writer
+
+class MeshStats:
+    """Totais da rede mantidos pelas alterações dos nós: métricas do ciclo em O(1)"""
+    __slots__ = ("active_size", "active_total", "history_total", "under_target")
+
+    def __init__(self, total_nodes, active_size):
+        self.active_size = active_size
+        self.active_total = 0
+        self.history_total = 0
+        # Nós começam vazios: abaixo do alvo, a menos que o alvo seja zero
+        self.under_target = total_nodes if active_size > 0 else 0
+
+    def active_changed(self, before, after):
+        self.active_total += after - before
+        self.under_target += (after < self.active_size) - (before < self.active_size)
+
 
 class Node:
-    def __init__(self, node_id, active_size, passive_size, total_nodes):
+    # Representação compacta: sem __dict__, visões em arrays de inteiros de 32 bits
+    __slots__ = ("id", "total_nodes", "active_size", "passive_size", "active", "passive", "passive_history", "stats")
+
+    def __init__(self, node_id, active_size, passive_size, total_nodes, stats=None):
         self.id = node_id
+        # MeshStats compartilhado pela rede (opcional), atualizado a cada alteração das visões
+        self.stats = stats
         self.total_nodes = total_nodes
         self.active_size = active_size
         self.passive_size = passive_size
-        self.active = set()
-        self.passive = set()
-        self.passive_history = set()
+        self.active = array("i")
+        self.passive = array("i")
+        # Todos os nós que já passaram pela Passive View, ordenados (busca binária);
+        # len(passive_history) é a diversidade passiva exata do nó. São 4 bytes por par
+        # distinto, e o número de pares cresce com os ciclos (~110 em 30 ciclos), não com N.
+        # Um bitset exato ocuparia N/8 bytes por nó (12,5 KB com 100 mil nós) e só fica
+        # menor depois de N/32 pares distintos; um esboço de tamanho fixo não seria exato.
+        self.passive_history = array("i")
 
     def initialize_neighbors(self):
-        others = list(set(range(self.total_nodes)) - {self.id})
-        random.shuffle(others)
-        self.active = set(others[:self.active_size])
-        self.passive = set(others[self.active_size:self.active_size + self.passive_size])
-        self.passive_history.update(self.passive)
-
-    def ping_cycle(self, params):
-        responded = set()
-        failed = set()
+        others = self._sample_peers(self.active_size + self.passive_size, {self.id})
+        before = len(self.active)
+        self.active = array("i", others[:self.active_size])
+        if self.stats is not None:
+            self.stats.active_changed(before, len(self.active))
+        self.passive = array("i", others[self.active_size:self.active_size + self.passive_size])
+        self._record_history(self.passive)
+
+    def ping_cycle(self, params, fails=None):
+        # fails: sorteios pré-gerados (rng.FailureStreams), um por posição da Active View
+        responded = []
+        failed = []
         message_count = 0
-        for neighbor in list(self.active):
+        for neighbor in self.active:
+            if fails is not None:
+                down = fails[message_count]
+            else:
+                down = self._link_down(neighbor, params)
             message_count += 1
-            fail_prob = sample_fail_prob(params)
-            if random.random() < fail_prob:
-                failed.add(neighbor)
+            if down:
+                failed.append(neighbor)
             else:
-                responded.add(neighbor)
+                responded.append(neighbor)
         return responded, failed, message_count
 
-    def replace_failed(self, failed, params):
+    def replace_failed(self, failed, params, fails=None):
+        # fails: sorteios pré-gerados, um por passivo testado
         replacements_log = []
         test_messages = 0
+        active_before = len(self.active)
         to_process = []
         for f in failed:
             if f in self.active:
@@ -45,12 +90,15 @@ class Node:
         for f in to_process:
             replaced = False
             while len(self.active) < self.active_size and self.passive:
-                candidate = random.choice(list(self.passive))
+                candidate = random.choice(self.passive)
                 self.passive.remove(candidate)
+                if fails is not None:
+                    down = fails[test_messages]
+                else:
+                    down = self._link_down(candidate, params)
                 test_messages += 1
-                fail_prob = sample_fail_prob(params)
-                if random.random() >= fail_prob:
-                    self.active.add(candidate)
+                if not down:
+                    self.active.append(candidate)
                     replacements_log.append((f, candidate, "PING OK"))
                     replaced = True
                     break
@@ -58,13 +106,15 @@ class Node:
                     replacements_log.append((f, candidate, "PING FAIL"))
             if not replaced and len(self.active) < self.active_size:
                 replacements_log.append((f, None, "SEM CANDIDATO"))
+        if self.stats is not None:
+            self.stats.active_changed(active_before, len(self.active))
         self._replenish_passive()
         return replacements_log, test_messages
 
     def shuffle_passive(self, nodes):
         if not self.active:
             return
-        partner_id = random.choice(list(self.active))
+        partner_id = random.choice(self.active)
         partner = nodes[partner_id]
         swap_count = max(1, int(self.passive_size * 0.3))
         my_swap = random.sample(self.passive, min(swap_count, len(self.passive)))
@@ -73,156 +123,377 @@ class Node:
             self.passive.remove(p)
         for p in partner_swap:
             partner.passive.remove(p)
-        self.passive.update([p for p in partner_swap if p != self.id and p not in self.active])
-        partner.passive.update([p for p in my_swap if p != partner.id and p not in partner.active])
+        self._merge_passive(partner_swap)
+        partner._merge_passive(my_swap)
         self._replenish_passive()
         partner._replenish_passive()
-        self.passive_history.update(self.passive)
-        partner.passive_history.update(partner.passive)
+        self._record_history(self.passive)
+        partner._record_history(partner.passive)
+
+    def _merge_passive(self, peers):
+        for p in peers:
+            if p != self.id and p not in self.active and p not in self.passive:
+                self.passive.append(p)
 
     def _replenish_passive(self):
         needed = self.passive_size - len(self.passive)
         if needed > 0:
-            candidates = set(range(self.total_nodes)) - {self.id} - self.active - self.passive
-            if candidates:
-                new_peers = random.sample(list(candidates), min(needed, len(candidates)))
-                self.passive.update(new_peers)
-                self.passive_history.update(new_peers)
+            new_peers = self._sample_peers(needed, {self.id, *self.active, *self.passive})
+            if new_peers:
+                self.passive.extend(new_peers)
+                self._record_history(new_peers)
+
+    def _sample_peers(self, k, excluded):
+        # Candidatos a vizinho: qualquer nó da rede (topology.GeoNode restringe ao alcance de rádio)
+        return sample_excluding(self.total_nodes, k, excluded)
+
+    def _link_down(self, peer, params):
+        # Modelo padrão: probabilidade de falha gaussiana sorteada a cada mensagem
+        fail_prob = sample_fail_prob(params)
+        return random.random() < fail_prob
+
+    def _record_history(self, peers):
+        history = self.passive_history
+        before = len(history)
+        for p in peers:
+            i = bisect_left(history, p)
+            if i == len(history) or history[i] != p:
+                history.insert(i, p)
+        if self.stats is not None:
+            self.stats.history_total += len(history) - before
+
+def sample_excluding(total_nodes, k, excluded):
+    """Sorteia até k nós distintos de range(total_nodes) fora de excluded, em ordem aleatória.
+
+    Enquanto a maior parte da população está disponível, usa amostragem por
+    rejeição contra o conjunto (pequeno) de excluídos, com custo que não
+    depende de total_nodes. Só em redes pequenas monta a lista de candidatos.
+    """
+    k = min(k, total_nodes - len(excluded))
+    if k <= 0:
+        return []
+    if 2 * (len(excluded) + k) <= total_nodes:
+        chosen = []
+        seen = set(excluded)
+        while len(chosen) < k:
+            c = random.randrange(total_nodes)
+            if c not in seen:
+                seen.add(c)
+                chosen.append(c)
+        return chosen
+    return random.sample([c for c in range(total_nodes) if c not in excluded], k)
 
 def sample_fail_prob(params):
     """Sorteia probabilidade de falha a partir de uma gaussiana"""
     p = random.gauss(params.fail_mean, params.fail_std)
     return min(1.0, max(0.0, p))  # garante que fique entre 0 e 1
 
-def simulate_with_debug(params):
-    random.seed()
-    nodes = [Node(i, params.active_size, params.passive_size, params.total_nodes) for i in range(params.total_nodes)]
-    for node in nodes:
-        node.initialize_neighbors()
-
-    avg_active_list = []
-    avg_passive_diversity_list = []
-    messages_per_cycle = []
-    total_messages = 0
-    convergence_cycle = None
-    csv_rows = []
-    messages_per_node_cumulative = [0] * params.total_nodes
-    messages_per_node_evolution = [[] for _ in range(params.total_nodes)]
-
-    for cycle in range(params.max_cycles):
-        print(f"\n=== CICLO {cycle} ===")
-        ping_results = {}
+def print_cycle_summary(avg_active, avg_passive_diversity, cycle_messages, total_messages):
+    print(f"\nResumo: Média de ativos = {avg_active:.2f} | Diversidade passiva média = {avg_passive_diversity:.2f} | Mensagens no ciclo = {cycle_messages} | Total acumulado = {total_messages}")
+
+
+def report_convergence(convergence_cycle):
+    # Convergência
+    if convergence_cycle is not None:
+        print(f"\nTempo de convergência: {convergence_cycle} ciclos")
+    else:
+        print("\nRede não convergiu totalmente dentro do limite de ciclos.")
+
+
+def run_summary(params, convergence_cycle, avg_active_list, avg_passive_diversity_list, messages_per_cycle, replica=None):
+    """Resumo estruturado de uma execução (um registro do arquivo de resumo)"""
+    record = {
+        "Total_Nodes": params.total_nodes,
+        "Fail_Mean": params.fail_mean,
+        "Fail_Std": params.fail_std,
+        "Active_Size": params.active_size,
+        "Passive_Size": params.passive_size,
+        "Max_Cycles": params.max_cycles,
+        "Seed": params.seed,
+        "Engine": params.engine,
+        "Convergiu": convergence_cycle is not None,
+        "Tempo_Convergencia": convergence_cycle,
+        "Media_Ativos_Ciclo0": float(avg_active_list[0]) if len(avg_active_list) else None,
+        "Media_Ativos_Final": float(avg_active_list[-1]) if len(avg_active_list) else None,
+        "Diversidade_Passiva_Final": float(avg_passive_diversity_list[-1]) if len(avg_passive_diversity_list) else None,
+        "Mensagens_Totais": int(sum(messages_per_cycle)),
+    }
+    if replica is not None:
+        record["Replica"] = replica
+    return record
+
+
+def save_summary(params, records):
+    """Grava os registros de resumo (JSON Lines) em summary_file, ou em <csv>_resumo.jsonl"""
+    if params.summary_file:
+        # Arquivo informado explicitamente: acumula execuções (ex.: uma varredura inteira)
+        filename, mode = params.summary_file, "a"
+    elif params.csv_filename:
+        base, ext = os.path.splitext(params.csv_filename)
+        filename, mode = f"{base}_resumo.jsonl", "w"
+    else:
+        return
+    with open(filename, mode) as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    print(f"📁 Resumo da execução salvo em: {filename}")
+
+
+def simulate(params):
+    """Executa a simulação com o motor escolhido em params.engine"""
+    if (params.checkpoint or params.restore) and params.engine != "python":
+        raise SystemExit("--checkpoint e --restore estão disponíveis apenas no motor python")
+    if params.topology == "geo" and (params.engine != "python" or params.rng != "global"):
+        raise SystemExit("--topology geo está disponível apenas no motor python com --rng global")
+    if params.instrument and params.engine != "python":
+        raise SystemExit("--instrument está disponível apenas no motor python, sem --replicates")
+    if params.engine == "des" and params.rng != "global":
+        raise SystemExit("--rng streams está disponível apenas nos motores python e numpy")
+    if params.engine == "numpy":
+        import sc_vec
+        return sc_vec.simulate_vectorized(params)
+    if params.engine == "des":
+        import sc_des
+        return sc_des.simulate_events(params)
+    return simulate_with_debug(params)
+
+
+def simulate_replicates(params):
+    """Executa params.replicates réplicas independentes em lote (sempre no motor numpy)"""
+    import sc_vec
+    if params.instrument:
+        raise SystemExit("--instrument está disponível apenas no motor python, sem --replicates")
+    params.engine = "numpy"
+    return sc_vec.simulate_replicates(params)
+
+
+def simulate_with_debug(params, instr=None):
+    if instr is None:
+        # A instrumentação (se ligada) desfaz suas substituições no módulo mesmo se a execução falhar
+        with instrument.make_instrument(params, sys.modules[__name__]) as instr:
+            return simulate_with_debug(params, instr)
+
+    stats = MeshStats(params.total_nodes, params.active_size)
+    # Evolução dos acumulados só dos nós de debug (usada no gráfico correspondente)
+    debug_nodes = [i for i in params.debug_nodes if i < params.total_nodes]
+    snapshot = None
+    if params.restore:
+        snapshot = checkpoint.load_checkpoint(params.restore)
+        snapshot.check(params)
+        if params.seed is None:
+            params.seed = snapshot.header["seed"]
+    if params.topology == "geo":
+        import topology
+        topo, nodes = topology.build_nodes(params, stats)
+        topology_hash = topo.digest()
+        if params.trace_level != "off":
+            print(topology.describe(topo, params.active_size))
+    else:
+        nodes = [Node(i, params.active_size, params.passive_size, params.total_nodes, stats) for i in range(params.total_nodes)]
+        topology_hash = None
+    streams = rng.make_streams(params)
+
+    first_cycle = 0
+    branch = False
+    if snapshot is not None:
+        # Continua a partir de um checkpoint: rede e gerador global como estavam
+        # Visões restauradas só fazem sentido sobre o mesmo grafo de vizinhança
+        snapshot.check_topology(topology_hash)
+        snapshot.restore_random()
+        snapshot.restore_nodes(nodes, stats)
+        first_cycle = snapshot.cycle
+        branch = snapshot.is_branch(params)
+        if params.trace_level != "off":
+            print(f"Restaurado de {params.restore}: {first_cycle} ciclos concluídos"
+                  + (" (ramificação: métricas a partir deste ciclo)" if branch else ""))
+    else:
+        random.seed(params.seed)
+        for node in nodes:
+            node.initialize_neighbors()
+
+    if snapshot is not None and not branch:
+        # Retomada: as séries seguem as do checkpoint
+        run = snapshot.run_state(debug_nodes)
+    else:
+        # Execução nova ou ramificação: séries, mensagens e convergência começam no ciclo first_cycle,
+        # sem herdar nada do aquecimento
+        run = {"avg_active_list": [], "avg_passive_diversity_list": [], "messages_per_cycle": [],
+               "messages_per_node_cumulative": [0] * params.total_nodes,
+               "messages_per_node_evolution": {i: [] for i in debug_nodes},
+               "total_messages": 0, "convergence_cycle": None, "branch_cycle": first_cycle}
+    branch_cycle = run["branch_cycle"]
+
+    avg_active_list = run["avg_active_list"]
+    avg_passive_diversity_list = run["avg_passive_diversity_list"]
+    messages_per_cycle = run["messages_per_cycle"]
+    total_messages = run["total_messages"]
+    convergence_cycle = run["convergence_cycle"]
+    writer = open_result_writer(params, first_cycle)
+    messages_per_node_cumulative = run["messages_per_node_cumulative"]
+    messages_per_node_evolution = run["messages_per_node_evolution"]
+    tracer = tracing.make_tracer(params)
+    conn = connectivity.make_connectivity(params)
+
+    for cycle in range(first_cycle, params.max_cycles):
+        if tracer.summary:
+            print(f"\n=== CICLO {cycle} ===")
+        ping_results = []
         promotion_info = {}
         cycle_messages = 0
-        cycle_messages_per_node = {}
+        cycle_messages_per_node = [0] * params.total_nodes
 
         # Debug: listas iniciais
-        for node in nodes:
-            if node.id in params.debug_nodes:
+        if tracer.debug:
+            for node_id in sorted(set(tracer.nodes)):
+                node = nodes[node_id]
                 print(f"\nNó {node.id} - Ativos iniciais: {sorted(node.active)} | Passivos iniciais: {sorted(node.passive)}")
+        instr.mark("Trace")
 
         # Pings
+        ping_fails = streams.block(rng.PING, cycle, params.total_nodes, params.active_size).tolist() if streams else None
         for node in nodes:
-            responded, failed, msg_count = node.ping_cycle(params)
-            ping_results[node.id] = (responded, failed, msg_count)
+            responded, failed, msg_count = node.ping_cycle(params, ping_fails[node.id] if streams else None)
+            ping_results.append((responded, failed))
             cycle_messages += msg_count
             cycle_messages_per_node[node.id] = msg_count
+            messages_per_node_cumulative[node.id] += msg_count
+        instr.mark("Ping")
 
         # Debug: resultados de ping
-        for node_id in params.debug_nodes:
-            if node_id < params.total_nodes:
-                responded, failed, msg_count = ping_results[node_id]
+        if tracer.debug:
+            for node_id in tracer.nodes:
+                responded, failed = ping_results[node_id]
                 print(f"\nNó {node_id} - Ping OK: {sorted(responded)} | Ping FAIL: {sorted(failed)}")
+        if tracer.logging:
+            for node_id in (range(params.total_nodes) if tracer.log_all else tracer.nodes):
+                responded, failed = ping_results[node_id]
+                for neighbor in responded:
+                    tracer.event(cycle, node_id, tracing.PING_OK, neighbor)
+                for neighbor in failed:
+                    tracer.event(cycle, node_id, tracing.PING_FAIL, neighbor)
+        instr.mark("Trace")
 
         # Substituições
+        keep_log = tracer.debug or tracer.logging
+        test_fails = streams.block(rng.REPLACE, cycle, params.total_nodes, params.passive_size).tolist() if streams else None
         for node in nodes:
-            _, failed, _ = ping_results[node.id]
-            repl_log, test_msgs = node.replace_failed(failed, params)
-            promotion_info[node.id] = (repl_log, test_msgs)
+            repl_log, test_msgs = node.replace_failed(ping_results[node.id][1], params, test_fails[node.id] if streams else None)
+            if keep_log and repl_log:
+                promotion_info[node.id] = repl_log
             cycle_messages += test_msgs
             cycle_messages_per_node[node.id] += test_msgs
+            messages_per_node_cumulative[node.id] += test_msgs
+        instr.mark("Substituicao")
 
         # Debug: substituições
-        for node_id in params.debug_nodes:
-            if node_id < params.total_nodes:
-                repl_log, test_msgs = promotion_info[node_id]
-                for old, cand, status in repl_log:
+        if tracer.debug:
+            for node_id in tracer.nodes:
+                for old, cand, status in promotion_info.get(node_id, ()):
                     if cand is None:
                         print(f"Nó {node_id} - Substituindo ativo {old}: {status} (sem candidatos na Passive View)")
                     else:
                         print(f"Nó {node_id} - Substituindo ativo {old} por passivo {cand} → {status}")
+        if tracer.logging:
+            for node_id in (promotion_info if tracer.log_all else tracer.nodes):
+                for old, cand, status in promotion_info.get(node_id, ()):
+                    if cand is None:
+                        tracer.event(cycle, node_id, tracing.NO_CANDIDATE, old)
+                    else:
+                        kind = tracing.REPLACE_OK if status == "PING OK" else tracing.REPLACE_FAIL
+                        tracer.event(cycle, node_id, kind, old, cand)
+        instr.mark("Trace")
 
         # Shuffle
         for node in nodes:
             node.shuffle_passive(nodes)
+        instr.mark("Shuffle")
 
         # Debug: mensagens por nó
-        for node_id in params.debug_nodes:
-            if node_id < params.total_nodes:
+        if tracer.debug:
+            for node_id in tracer.nodes:
                 print(f"Nó {node_id} - Mensagens enviadas no ciclo: {cycle_messages_per_node[node_id]}")
+        if tracer.logging:
+            for node_id in (range(params.total_nodes) if tracer.log_all else tracer.nodes):
+                tracer.event(cycle, node_id, tracing.CYCLE_MESSAGES, cycle_messages_per_node[node_id])
+        instr.mark("Trace")
 
-        # Atualiza acumulados por nó
-        for node_id, msg_count in cycle_messages_per_node.items():
-            messages_per_node_cumulative[node_id] += msg_count
-            messages_per_node_evolution[node_id].append(messages_per_node_cumulative[node_id])
+        # Evolução dos acumulados dos nós de debug
+        for node_id, evolution in messages_per_node_evolution.items():
+            evolution.append(messages_per_node_cumulative[node_id])
 
-        # Métricas
-        active_counts = [len(n.active) for n in nodes]
-        avg_active = sum(active_counts) / params.total_nodes
+        # Métricas: totais mantidos pelos nós (MeshStats), sem percorrer a rede
+        avg_active = stats.active_total / params.total_nodes
         avg_active_list.append(avg_active)
-        passive_diversity = [len(n.passive_history) for n in nodes]
-        avg_passive_diversity = sum(passive_diversity) / params.total_nodes
+        avg_passive_diversity = stats.history_total / params.total_nodes
         avg_passive_diversity_list.append(avg_passive_diversity)
-        if convergence_cycle is None and all(count >= params.active_size for count in active_counts):
+        if convergence_cycle is None and stats.under_target == 0:
             convergence_cycle = cycle
 
         total_messages += cycle_messages
         messages_per_cycle.append(cycle_messages)
-
-        print(f"\nResumo: Média de ativos = {avg_active:.2f} | Diversidade passiva média = {avg_passive_diversity:.2f} | Mensagens no ciclo = {cycle_messages} | Total acumulado = {total_messages}")
-
-        # Linha do CSV
-        row = {
-            "Ciclo": cycle,
-            "MediaAtivos": avg_active,
-            "MediaDiversidadePassiva": avg_passive_diversity,
-            "MensagensCiclo": cycle_messages,
-            "MensagensAcumuladas": total_messages
-        }
-        for i, count in enumerate(active_counts):
-            row[f"No{i}_Ativos"] = count
-            row[f"No{i}_MensagensCiclo"] = cycle_messages_per_node[i]
-            row[f"No{i}_MensagensAcumuladas"] = messages_per_node_cumulative[i]
-        csv_rows.append(row)
-
-    # CSV principal
-    if params.csv_filename:
-        fieldnames = list(csv_rows[0].keys())
-        with open(params.csv_filename, mode="w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(csv_rows)
-        print(f"\n📁 Resultados salvos em: {params.csv_filename}")
-
-        # CSV separado com mensagens acumuladas finais por nó
-        base, ext = os.path.splitext(params.csv_filename)
-        csv_acum_filename = f"{base}_acc.csv"
-        with open(csv_acum_filename, mode="w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(["No", "MensagensAcumuladas"])
-            for i, total in enumerate(messages_per_node_cumulative):
-                writer.writerow([i, total])
-        print(f"📁 Mensagens acumuladas por nó salvas em: {csv_acum_filename}")
-
-    # Convergência
+        instr.mark("Metricas")
+
+        if tracer.summary:
+            print_cycle_summary(avg_active, avg_passive_diversity, cycle_messages, total_messages)
+        instr.mark("Trace")
+
+        if conn is not None:
+            conn.record(cycle, *connectivity.edges_from_nodes(nodes), show=tracer.summary)
+            instr.mark("Metricas")
+
+        # Ciclo gravado em disco assim que termina; ativos por nó só para os formatos por nó
+        active_counts = [len(n.active) for n in nodes] if writer.per_node else None
+        writer.write_cycle(cycle, avg_active, avg_passive_diversity, cycle_messages, total_messages,
+                           active_counts, cycle_messages_per_node, messages_per_node_cumulative)
+        if params.checkpoint_every and (cycle + 1) % params.checkpoint_every == 0 and cycle + 1 < params.max_cycles:
+            run.update(total_messages=total_messages, convergence_cycle=convergence_cycle)
+            checkpoint.save_checkpoint(params.checkpoint, params, cycle + 1, nodes, run, topology_hash)
+        instr.end_cycle(cycle)
+
+    if params.checkpoint:
+        run.update(total_messages=total_messages, convergence_cycle=convergence_cycle)
+        checkpoint.save_checkpoint(params.checkpoint, params, max(first_cycle, params.max_cycles), nodes, run,
+                                   topology_hash)
+        print(f"📁 Checkpoint salvo em: {params.checkpoint}")
+    writer.close(messages_per_node_cumulative)
+    tracer.close()
+    instr.close()
+    if conn is not None:
+        conn.close()
+    # Convergência contada a partir da ramificação (ciclo 0 numa execução sem aquecimento)
     if convergence_cycle is not None:
-        print(f"\nTempo de convergência: {convergence_cycle} ciclos")
-    else:
-        print("\nRede não convergiu totalmente dentro do limite de ciclos.")
+        convergence_cycle -= branch_cycle
+    report_convergence(convergence_cycle)
+    summary = run_summary(params, convergence_cycle, avg_active_list, avg_passive_diversity_list, messages_per_cycle)
+    if conn is not None:
+        summary.update(conn.summary())
+    if params.topology == "geo":
+        summary["Topologia"] = "geo"
+        summary["Grau_Medio"] = float(topo.degrees.mean())
+    if params.restore:
+        summary["Ciclos_Restaurados"] = first_cycle
+    if branch_cycle:
+        # Métricas do resumo cobrem só os ciclos a partir daqui; os anteriores são aquecimento
+        summary["Ciclo_Ramificacao"] = branch_cycle
+    save_summary(params, [summary])
 
     return avg_active_list, avg_passive_diversity_list, [len(n.active) for n in nodes], messages_per_cycle, messages_per_node_evolution, messages_per_node_cumulative
 
 
+def use_headless_backend():
+    """Troca o backend do matplotlib por um não interativo (Agg)"""
+    plt.switch_backend("Agg")
+
+
+def _finish_figure(params, filename, **savefig_kwargs):
+    if params.save_graphs:
+        plt.savefig(os.path.join(params.graphs_dir, filename), **savefig_kwargs)
+    # Só o modo interativo exibe a janela; os demais apenas salvam, sem pausa
+    if params.plot_mode == "interactive":
+        plt.show(block=False); plt.pause(2)
+    plt.close()
+
+
 def plot_graphs(params, avg_active_list, avg_passive_diversity_list, final_active_counts, messages_per_cycle, messages_per_node_evolution, messages_per_node_cumulative):
     # Média ativos
     plt.figure(figsize=(10, 5))
@@ -230,9 +501,7 @@ def plot_graphs(params, avg_active_list, avg_passive_diversity_list, final_activ
     plt.axhline(y=params.active_size, color="r", linestyle="--", label="Meta de ativos")
     plt.xlabel("Ciclos"); plt.ylabel("Média de vizinhos ativos"); plt.title("Evolução da média de vizinhos ativos")
     plt.legend(); plt.grid(True);
-    if params.save_graphs:
-        plt.savefig("grafico_media_ativos.png")
-    plt.show(block=False); plt.pause(2); plt.close()
+    _finish_figure(params, "grafico_media_ativos.png")
 
     # Diversidade passiva
     plt.figure(figsize=(10, 5))
@@ -240,32 +509,26 @@ def plot_graphs(params, avg_active_list, avg_passive_diversity_list, final_activ
              label="Diversidade média da Passive View")
     plt.xlabel("Ciclos"); plt.ylabel("Quantidade média de vizinhos únicos"); plt.title("Evolução da diversidade da Passive View")
     plt.legend(); plt.grid(True);
-    if params.save_graphs:
-        plt.savefig("grafico_diversidade_passiva.png")
-    plt.show(block=False); plt.pause(2); plt.close()
+    _finish_figure(params, "grafico_diversidade_passiva.png")
 
     # Distribuição final
     plt.figure(figsize=(7, 4))
     plt.hist(final_active_counts, bins=range(0, params.active_size+2), align='left', rwidth=0.8, color='skyblue', edgecolor='black')
     plt.xlabel("Quantidade de vizinhos ativos"); plt.ylabel("Número de nós"); plt.title("Distribuição final de conectividade")
     plt.grid(axis='y');
-    if params.save_graphs:
-        plt.savefig("grafico_distribuicao.png")
-    plt.show(block=False); plt.pause(2); plt.close()
+    _finish_figure(params, "grafico_distribuicao.png")
 
     # Mensagens por ciclo
     plt.figure(figsize=(10, 5))
     plt.plot(range(len(messages_per_cycle)), messages_per_cycle, marker="d", color="orange", label="Mensagens/ciclo")
     plt.xlabel("Ciclos"); plt.ylabel("Quantidade de mensagens"); plt.title("Mensagens trocadas por ciclo")
     plt.legend(); plt.grid(True);
-    if params.save_graphs:
-        plt.savefig("grafico_mensagens.png")
-    plt.show(block=False); plt.pause(2); plt.close()
+    _finish_figure(params, "grafico_mensagens.png")
 
     # Novo gráfico: evolução das mensagens acumuladas por nó
     plt.figure(figsize=(10, 5))
     for i in params.debug_nodes:
-        if i < len(messages_per_node_evolution):
+        if i in messages_per_node_evolution:
             plt.plot(range(len(messages_per_node_evolution[i])), messages_per_node_evolution[i], label=f"Nó {i}")
     plt.xlabel("Ciclos")
     plt.ylabel("Mensagens acumuladas")
@@ -273,11 +536,7 @@ def plot_graphs(params, avg_active_list, avg_passive_diversity_list, final_activ
     plt.legend()
     plt.grid(True)
     plt.tight_layout()
-    if params.save_graphs:
-        plt.savefig("grafico_mensagens_acumuladas_por_no_debug.png", bbox_inches='tight')
-    plt.show(block=False)
-    plt.pause(2)
-    plt.close()
+    _finish_figure(params, "grafico_mensagens_acumuladas_por_no_debug.png", bbox_inches='tight')
 
     # Gráfico 6: mensagens acumuladas por nó
     plt.figure(figsize=(10, 5))
@@ -286,14 +545,35 @@ def plot_graphs(params, avg_active_list, avg_passive_diversity_list, final_activ
     plt.ylabel("Mensagens acumuladas")
     plt.title("Mensagens acumuladas por nó ao final da simulação")
     plt.grid(axis='y')
-    if params.save_graphs:
-        plt.savefig("grafico_mensagens_acumuladas.png")
-    plt.show(block=False)
-    plt.pause(2)
-    plt.close()
-
-
-if __name__ == "__main__":
+    _finish_figure(params, "grafico_mensagens_acumuladas.png")
+
+
+def save_plot_data(params, results, filename):
+    """Salva os dados dos gráficos para renderização posterior (modo deferred)"""
+    results = list(results)
+    # Chaves JSON são sempre strings; a evolução por nó vai como lista de pares
+    results[4] = list(results[4].items())
+    data = {
+        "params": {key: getattr(params, key) for key in ("active_size", "total_nodes", "debug_nodes")},
+        "results": results,
+    }
+    with open(filename, "w") as f:
+        json.dump(data, f)
+
+
+def render_plot_data(filename, graphs_dir=None):
+    """Gera os PNGs a partir de um arquivo salvo por save_plot_data, sem exibir janelas"""
+    with open(filename) as f:
+        data = json.load(f)
+    if graphs_dir is None:
+        graphs_dir = os.path.dirname(filename)
+    params = make_params(save_graphs=True, plot_mode="headless", graphs_dir=graphs_dir, **data["params"])
+    data["results"][4] = dict(data["results"][4])
+    use_headless_backend()
+    plot_graphs(params, *data["results"])
+
+
+def build_parser():
     parser = argparse.ArgumentParser(description="Simulador de Camada de Conectividade para redes mesh")
     parser.add_argument("--total_nodes", type=int, default=50)
     parser.add_argument("--active_size", type=int, default=4)
@@ -302,10 +582,112 @@ if __name__ == "__main__":
     parser.add_argument("--fail_std", type=float, default=0.1)
     parser.add_argument("--max_cycles", type=int, default=30)
     parser.add_argument("--debug_nodes", nargs="+", type=int, default=[0,1,2])
+    parser.add_argument("--trace_level", choices=["off", "summary", "debug"], default="debug",
+                        help="off: sem saída por ciclo; summary: apenas o resumo de cada ciclo; "
+                             "debug: resumo e detalhes dos nós de debug_nodes (padrão)")
+    parser.add_argument("--trace_log", type=str, default=None,
+                        help="Log binário de eventos (pings e substituições) dos nós de debug_nodes; "
+                             "decodifique com python3 tracing.py <arquivo>")
+    parser.add_argument("--trace_log_all", action="store_true",
+                        help="Registra no log binário os eventos de todos os nós")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Grava em <csv>_perf.csv o tempo de cada fase por ciclo e contadores (chamadas ao "
+                             "gerador aleatório, conjuntos alocados, chamadas a _replenish_passive). Apenas no motor "
+                             "python sem --replicates: com numpy, des ou réplicas a execução é recusada")
     parser.add_argument("--csv_filename", type=str, default="res.csv")
+    parser.add_argument("--output_format", choices=["csv", "npy", "parquet"], default="csv",
+                        help="csv: CSV largo original (colunas NoX_*); npy/parquet: tabela longa por nó em "
+                             "<csv>_nos.npy|.parquet e métricas por ciclo em <csv>_ciclos.csv, gravadas a cada ciclo")
+    parser.add_argument("--compress", action="store_true",
+                        help="Comprime a tabela por nó (npy: gera <csv>_nos.npz ao final; parquet: zstd)")
+    parser.add_argument("--summary_file", type=str, default=None,
+                        help="Arquivo JSON Lines ao qual o resumo da execução é acrescentado "
+                             "(padrão: <csv>_resumo.jsonl, sobrescrito a cada execução)")
     parser.add_argument("--save_graphs", action="store_true")
+    parser.add_argument("--graphs_dir", type=str, default="",
+                        help="Diretório onde os gráficos são salvos (padrão: diretório atual)")
+    parser.add_argument("--plot_mode", choices=["interactive", "headless", "deferred", "none"], default="interactive",
+                        help="interactive: exibe cada gráfico por 2s; headless: apenas salva, sem janela nem pausa; "
+                             "deferred: salva os dados em <csv>_plot.json para renderizar depois com --render_plots; "
+                             "none: não gera gráficos")
+    parser.add_argument("--render_plots", type=str, default=None, metavar="PLOT_JSON",
+                        help="Renderiza os gráficos de um arquivo gerado no modo deferred e encerra")
+    parser.add_argument("--engine", choices=["python", "numpy", "des"], default="python",
+                        help="python: um objeto Node por nó; numpy: visões em matrizes, fases vetorizadas (requer numpy); "
+                             "des: eventos discretos, com temporizadores por nó e latência das mensagens")
+    parser.add_argument("--latency_mean", type=float, default=0.02,
+                        help="Motor des: latência média de cada mensagem, em ciclos")
+    parser.add_argument("--latency_std", type=float, default=0.01,
+                        help="Motor des: desvio padrão da latência")
+    parser.add_argument("--ping_timeout", type=float, default=0.25,
+                        help="Motor des: espera pela resposta de um ping, em ciclos")
+    parser.add_argument("--ping_period", type=float, default=1.0,
+                        help="Motor des: intervalo entre rodadas de ping de cada nó, em ciclos")
+    parser.add_argument("--shuffle_period", type=float, default=1.0,
+                        help="Motor des: intervalo entre shuffles iniciados por cada nó, em ciclos")
+    parser.add_argument("--replicates", type=int, default=1,
+                        help="Simula R redes independentes de uma só vez (motor numpy), gravando as médias/desvios "
+                             "entre réplicas em csv_filename e o resumo por réplica em <csv>_replicas.csv")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Semente do gerador aleatório (padrão: aleatória a cada execução)")
+    parser.add_argument("--rng", choices=["global", "streams"], default="global",
+                        help="global: falhas sorteadas mensagem a mensagem no gerador global; streams: blocos de "
+                             "sorteios de falha por (réplica, fase, ciclo) gerados com Philox, que dependem só da "
+                             "semente e dessa chave. Os blocos são os mesmos nos motores python e numpy, mas a "
+                             "escolha de vizinhos e a disposição das Active Views não, então os resultados "
+                             "simulados diferem entre motores (ver rng.py). Não disponível no motor des")
+    parser.add_argument("--topology", choices=["full", "geo"], default="full",
+                        help="full: qualquer nó pode ser vizinho de qualquer outro; geo: nós no plano, vizinhança "
+                             "restrita ao alcance de rádio e probabilidade de falha por enlace (motor python)")
+    parser.add_argument("--radio_range", type=float, default=None,
+                        help="Topologia geo: alcance de rádio no quadrado unitário (padrão: o que dá mean_degree)")
+    parser.add_argument("--mean_degree", type=float, default=12.0,
+                        help="Topologia geo: grau médio desejado do grafo de alcance, quando radio_range não é informado")
+    parser.add_argument("--connectivity", action="store_true",
+                        help="Analisa a cada ciclo o overlay das Active Views (componentes, maior componente, grau "
+                             "de entrada, diâmetro estimado), gravando <csv>_conectividade.csv e o último ciclo no resumo")
+    parser.add_argument("--checkpoint", type=str, default=None, metavar="ARQUIVO",
+                        help="Motor python: grava ao final o estado completo da rede (visões, históricos, séries e "
+                             "gerador aleatório) neste arquivo binário, para retomar ou ramificar a execução")
+    parser.add_argument("--checkpoint_every", type=int, default=0, metavar="K",
+                        help="Com --checkpoint, grava também a cada K ciclos, permitindo retomar após uma interrupção")
+    parser.add_argument("--restore", type=str, default=None, metavar="ARQUIVO",
+                        help="Motor python: continua a partir de um checkpoint até max_cycles (total, contando os "
+                             "ciclos do checkpoint). Com os mesmos fail_mean/fail_std do checkpoint, retoma a execução; "
+                             "com outros (ou com --branch), ramifica: o checkpoint é só aquecimento e as métricas, "
+                             "a convergência e o resumo cobrem apenas os ciclos seguintes")
+    parser.add_argument("--branch", action="store_true",
+                        help="Com --restore, ramifica mesmo que fail_mean e fail_std sejam os do checkpoint")
+    return parser
+
+
+def make_params(**overrides):
+    """Monta os parâmetros padrão da linha de comando, sobrescrevendo os informados"""
+    params = build_parser().parse_args([])
+    for key, value in overrides.items():
+        setattr(params, key, value)
+    return params
 
-    params = parser.parse_args()
 
-    avg_active_list, avg_passive_diversity_list, final_active_counts, messages_per_cycle, messages_per_node_evolution, messages_per_node_cumulative = simulate_with_debug(params)
-    plot_graphs(params, avg_active_list, avg_passive_diversity_list, final_active_counts, messages_per_cycle, messages_per_node_evolution, messages_per_node_cumulative)
+if __name__ == "__main__":
+    params = build_parser().parse_args()
+
+    if params.render_plots:
+        render_plot_data(params.render_plots)
+        raise SystemExit(0)
+
+    if params.replicates > 1:
+        simulate_replicates(params)
+        raise SystemExit(0)
+
+    results = simulate(params)
+    if params.plot_mode == "deferred":
+        base, ext = os.path.splitext(params.csv_filename or "res.csv")
+        save_plot_data(params, results, f"{base}_plot.json")
+    elif params.plot_mode != "none":
+        if params.plot_mode == "headless":
+            use_headless_backend()
+        start = time.perf_counter()
+        plot_graphs(params, *results)
+        if params.instrument:
+            instrument.record_plot_time(params, time.perf_counter() - start)
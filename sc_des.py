@@ -0,0 +1,300 @@
+"""Motor de eventos discretos da simulação NetMaintenance.
+
+Em vez de mover todos os nós em sincronia pelas fases ping → substituição →
+shuffle, cada nó tem seus próprios temporizadores (ping a cada ping_period e
+shuffle a cada shuffle_period, com fase inicial sorteada) e as mensagens
+chegam após uma latência sorteada. Os eventos ficam em uma fila de
+prioridade (heapq) ordenada pelo tempo, e só há trabalho para os nós que têm
+eventos pendentes.
+
+- Ping: a resposta chega após a ida e volta; se o vizinho falhar (mesma
+  probabilidade gaussiana do motor Python) ou a resposta passar de
+  ping_timeout, o timeout remove o vizinho da Active View e inicia a
+  substituição.
+- Substituição: passivos são testados um a um, cada teste esperando a sua
+  resposta (ou timeout), até completar a Active View ou esgotar a Passive View.
+- Shuffle: assíncrono; a amostra do iniciador viaja até o parceiro, que
+  responde com a sua.
+
+O tempo é medido em ciclos. As métricas de cada ciclo (as mesmas do motor
+Python) são amostradas nas fronteiras inteiras de tempo, a partir de
+contadores mantidos a cada alteração, sem percorrer os N nós; apenas a saída
+por nó (csv_filename) monta listas com todos os nós.
+"""
+import heapq
+import random
+from itertools import count
+
+import sc
+import tracing
+import connectivity
+from result_writers import open_result_writer
+
+# Tipos de evento
+PING_TIMER = 0
+PING_OK = 1
+PING_TIMEOUT = 2
+TEST_OK = 3
+TEST_TIMEOUT = 4
+SHUFFLE_TIMER = 5
+SHUFFLE_REQUEST = 6
+SHUFFLE_REPLY = 7
+
+
+class EventMesh:
+    """Nós, fila de eventos e contadores agregados usados nas métricas"""
+
+    def __init__(self, params, tracer):
+        self.params = params
+        self.tracer = tracer
+        self.debug_nodes = set(tracer.nodes)
+        # Nós cujos eventos vão para o trace (range: teste de pertinência O(1) para todos os nós)
+        self.watched = range(params.total_nodes) if tracer.log_all else self.debug_nodes
+        self.tracing = tracer.debug or tracer.logging
+        self.stats = sc.MeshStats(params.total_nodes, params.active_size)
+        self.nodes = [sc.Node(i, params.active_size, params.passive_size, params.total_nodes, self.stats)
+                      for i in range(params.total_nodes)]
+        self.queue = []
+        self.seq = count()
+        self.now = 0.0
+        # Nós com um teste de substituição em andamento
+        self.testing = set()
+        self.swap_count = max(1, int(params.passive_size * 0.3))
+
+        # Contadores de mensagens (os totais das visões ficam em self.stats)
+        self.cycle_messages = 0
+        self.cycle_messages_per_node = {}
+        self.messages_per_node_cumulative = [0] * params.total_nodes
+
+    def initialize(self):
+        p = self.params
+        for node in self.nodes:
+            node.initialize_neighbors()
+            self.schedule(random.uniform(0, p.ping_period), PING_TIMER, node.id)
+            self.schedule(random.uniform(0, p.shuffle_period), SHUFFLE_TIMER, node.id)
+
+    # ---------------------------------------------------------
+    # Fila de eventos
+    # ---------------------------------------------------------
+    def schedule(self, time, kind, node_id, peer=-1, payload=None):
+        heapq.heappush(self.queue, (time, next(self.seq), kind, node_id, peer, payload))
+
+    def run_until(self, end):
+        """Processa os eventos com tempo anterior a end"""
+        queue = self.queue
+        handlers = self.handlers
+        while queue and queue[0][0] < end:
+            time, _, kind, node_id, peer, payload = heapq.heappop(queue)
+            self.now = time
+            handlers[kind](self, node_id, peer, payload)
+
+    def latency(self):
+        return max(0.0, random.gauss(self.params.latency_mean, self.params.latency_std))
+
+    def send_ping(self, node_id, peer, ok_kind, timeout_kind, payload=None):
+        """Envia um ping; agenda a resposta ou, se o vizinho falhar ou demorar, o timeout"""
+        p = self.params
+        self.count_message(node_id)
+        rtt = self.latency() + self.latency()
+        if random.random() < sc.sample_fail_prob(p) or rtt > p.ping_timeout:
+            self.schedule(self.now + p.ping_timeout, timeout_kind, node_id, peer, payload)
+        elif ok_kind != PING_OK or (self.tracing and node_id in self.watched):
+            # Uma resposta de ping não altera o estado: só vira evento quando vai para o trace
+            self.schedule(self.now + rtt, ok_kind, node_id, peer, payload)
+
+    def count_message(self, node_id):
+        self.cycle_messages += 1
+        self.cycle_messages_per_node[node_id] = self.cycle_messages_per_node.get(node_id, 0) + 1
+        self.messages_per_node_cumulative[node_id] += 1
+
+    # ---------------------------------------------------------
+    # Alterações de estado (o histórico atualiza self.stats pelo próprio Node)
+    # ---------------------------------------------------------
+    def remove_active(self, node, peer):
+        node.active.remove(peer)
+        self.stats.active_changed(len(node.active) + 1, len(node.active))
+
+    def add_active(self, node, peer):
+        node.active.append(peer)
+        self.stats.active_changed(len(node.active) - 1, len(node.active))
+
+    def refresh_passive(self, node):
+        """Completa a Passive View e registra o histórico"""
+        node._replenish_passive()
+        node._record_history(node.passive)
+
+    # ---------------------------------------------------------
+    # Tratadores de eventos
+    # ---------------------------------------------------------
+    def on_ping_timer(self, node_id, peer, payload):
+        node = self.nodes[node_id]
+        for neighbor in node.active:
+            self.send_ping(node_id, neighbor, PING_OK, PING_TIMEOUT)
+        self.schedule(self.now + self.params.ping_period, PING_TIMER, node_id)
+
+    def on_ping_ok(self, node_id, peer, payload):
+        if self.tracing and node_id in self.watched:
+            self.trace(node_id, tracing.PING_OK, f"Ping OK: {peer}", peer)
+
+    def on_ping_timeout(self, node_id, peer, payload):
+        node = self.nodes[node_id]
+        if self.tracing and node_id in self.watched:
+            self.trace(node_id, tracing.PING_FAIL, f"Ping FAIL: {peer}", peer)
+        if peer in node.active:
+            self.remove_active(node, peer)
+            if node_id not in self.testing:
+                self.next_test(node, peer)
+
+    def next_test(self, node, failed):
+        """Testa o próximo passivo, ou encerra a substituição"""
+        if len(node.active) < node.active_size and node.passive:
+            candidate = random.choice(node.passive)
+            node.passive.remove(candidate)
+            self.testing.add(node.id)
+            # O ativo substituído viaja no payload apenas para o trace
+            self.send_ping(node.id, candidate, TEST_OK, TEST_TIMEOUT, failed)
+            return
+        self.testing.discard(node.id)
+        if len(node.active) < node.active_size and self.tracing and node.id in self.watched:
+            self.trace(node.id, tracing.NO_CANDIDATE,
+                       f"Substituindo ativo {failed}: SEM CANDIDATO (sem candidatos na Passive View)", failed)
+        self.refresh_passive(node)
+
+    def on_test_ok(self, node_id, candidate, failed):
+        node = self.nodes[node_id]
+        if self.tracing and node_id in self.watched:
+            self.trace(node_id, tracing.REPLACE_OK, f"Substituindo ativo {failed} por passivo {candidate} → PING OK",
+                       failed, candidate)
+        if len(node.active) < node.active_size and candidate not in node.active:
+            # Durante o teste, o candidato pode ter voltado à Passive View por um shuffle
+            if candidate in node.passive:
+                node.passive.remove(candidate)
+            self.add_active(node, candidate)
+        self.next_test(node, failed)
+
+    def on_test_timeout(self, node_id, candidate, failed):
+        if self.tracing and node_id in self.watched:
+            self.trace(node_id, tracing.REPLACE_FAIL, f"Substituindo ativo {failed} por passivo {candidate} → PING FAIL",
+                       failed, candidate)
+        self.next_test(self.nodes[node_id], failed)
+
+    def on_shuffle_timer(self, node_id, peer, payload):
+        node = self.nodes[node_id]
+        if node.active:
+            partner = random.choice(node.active)
+            my_swap = self.take_swap(node)
+            self.schedule(self.now + self.latency(), SHUFFLE_REQUEST, partner, node_id, my_swap)
+        self.schedule(self.now + self.params.shuffle_period, SHUFFLE_TIMER, node_id)
+
+    def on_shuffle_request(self, node_id, initiator, incoming):
+        node = self.nodes[node_id]
+        reply = self.take_swap(node)
+        node._merge_passive(incoming)
+        self.refresh_passive(node)
+        self.schedule(self.now + self.latency(), SHUFFLE_REPLY, initiator, node_id, reply)
+
+    def on_shuffle_reply(self, node_id, partner, incoming):
+        node = self.nodes[node_id]
+        node._merge_passive(incoming)
+        self.refresh_passive(node)
+
+    def take_swap(self, node):
+        swap = random.sample(node.passive, min(self.swap_count, len(node.passive)))
+        for p in swap:
+            node.passive.remove(p)
+        return swap
+
+    handlers = {
+        PING_TIMER: on_ping_timer,
+        PING_OK: on_ping_ok,
+        PING_TIMEOUT: on_ping_timeout,
+        TEST_OK: on_test_ok,
+        TEST_TIMEOUT: on_test_timeout,
+        SHUFFLE_TIMER: on_shuffle_timer,
+        SHUFFLE_REQUEST: on_shuffle_request,
+        SHUFFLE_REPLY: on_shuffle_reply,
+    }
+
+    def trace(self, node_id, kind, text, a=-1, b=-1):
+        if self.tracer.debug and node_id in self.debug_nodes:
+            print(f"t={self.now:.3f} Nó {node_id} - {text}")
+        if self.tracer.logging:
+            self.tracer.event(int(self.now), node_id, kind, a, b)
+
+
+def simulate_events(params):
+    """Mesma simulação de sc.simulate_with_debug, dirigida por eventos com latência e temporizadores por nó"""
+    random.seed(params.seed)
+    tracer = tracing.make_tracer(params)
+    mesh = EventMesh(params, tracer)
+    mesh.initialize()
+    nodes = mesh.nodes
+    n = params.total_nodes
+
+    avg_active_list = []
+    avg_passive_diversity_list = []
+    messages_per_cycle = []
+    total_messages = 0
+    convergence_cycle = None
+    writer = open_result_writer(params)
+    messages_per_node_cumulative = mesh.messages_per_node_cumulative
+    messages_per_node_evolution = {i: [] for i in tracer.nodes}
+    conn = connectivity.make_connectivity(params)
+
+    for cycle in range(params.max_cycles):
+        if tracer.summary:
+            print(f"\n=== CICLO {cycle} ===")
+        if tracer.debug:
+            for node_id in tracer.nodes:
+                node = nodes[node_id]
+                print(f"\nNó {node_id} - Ativos: {sorted(node.active)} | Passivos: {sorted(node.passive)}")
+
+        mesh.run_until(cycle + 1)
+
+        # Amostragem na fronteira do ciclo
+        cycle_messages = mesh.cycle_messages
+        if tracer.debug:
+            for node_id in tracer.nodes:
+                print(f"Nó {node_id} - Mensagens enviadas no ciclo: {mesh.cycle_messages_per_node.get(node_id, 0)}")
+        if tracer.logging:
+            for node_id in (range(n) if tracer.log_all else tracer.nodes):
+                tracer.event(cycle, node_id, tracing.CYCLE_MESSAGES, mesh.cycle_messages_per_node.get(node_id, 0))
+        for node_id, evolution in messages_per_node_evolution.items():
+            evolution.append(messages_per_node_cumulative[node_id])
+
+        avg_active = mesh.stats.active_total / n
+        avg_active_list.append(avg_active)
+        avg_passive_diversity = mesh.stats.history_total / n
+        avg_passive_diversity_list.append(avg_passive_diversity)
+        if convergence_cycle is None and mesh.stats.under_target == 0:
+            convergence_cycle = cycle
+
+        total_messages += cycle_messages
+        messages_per_cycle.append(cycle_messages)
+
+        if tracer.summary:
+            sc.print_cycle_summary(avg_active, avg_passive_diversity, cycle_messages, total_messages)
+        if conn is not None:
+            conn.record(cycle, *connectivity.edges_from_nodes(nodes), show=tracer.summary)
+
+        # Listas por nó só quando há saída por nó
+        if writer.per_node:
+            active_counts = [len(node.active) for node in nodes]
+            per_node = mesh.cycle_messages_per_node
+            cycle_messages_per_node = [per_node.get(i, 0) for i in range(n)]
+            writer.write_cycle(cycle, avg_active, avg_passive_diversity, cycle_messages, total_messages,
+                               active_counts, cycle_messages_per_node, messages_per_node_cumulative)
+        mesh.cycle_messages = 0
+        mesh.cycle_messages_per_node = {}
+
+    writer.close(messages_per_node_cumulative)
+    tracer.close()
+    summary = sc.run_summary(params, convergence_cycle, avg_active_list, avg_passive_diversity_list, messages_per_cycle)
+    if conn is not None:
+        conn.close()
+        summary.update(conn.summary())
+    sc.report_convergence(convergence_cycle)
+    sc.save_summary(params, [summary])
+
+    return (avg_active_list, avg_passive_diversity_list, [len(node.active) for node in nodes], messages_per_cycle,
+            messages_per_node_evolution, messages_per_node_cumulative)
@@ -0,0 +1,517 @@
+"""Motor vetorizado (NumPy) da simulação NetMaintenance.
+
+As visões de todos os nós ficam em matrizes de inteiros de largura fixa
+(N x active_size e N x passive_size, com -1 nas posições vazias), e cada fase
+do ciclo (pings, substituições, shuffle) é executada em lote sobre todos os
+nós. Produz as mesmas métricas e arquivos que sc.simulate_with_debug.
+
+Com R réplicas, as R redes independentes são empilhadas no eixo das linhas
+(R*N linhas, visíveis como R x N x largura): a linha r*N + i é o nó i da
+réplica r, e os vizinhos são guardados como índices globais de linha, sempre
+dentro do bloco da própria réplica.
+"""
+import os
+import csv
+
+import numpy as np
+
+import sc
+import tracing
+import connectivity
+from rng import PING, REPLACE, make_streams
+from result_writers import open_result_writer
+
+EMPTY = -1
+
+# Abaixo deste tamanho, a inicialização embaralha a população inteira de cada nó
+# (chaves N x N por réplica: ~64 MiB no limite, qualquer que seja o número de réplicas)
+SMALL_MESH = 2048
+
+# Tentativas de amostragem por rejeição antes de recorrer à lista exata de candidatos
+REJECTION_ATTEMPTS = 8
+
+
+class VectorMesh:
+    """Estado de toda a rede: visões ativas/passivas e histórico da Passive View"""
+
+    def __init__(self, params, rng, replicates=1, streams=None):
+        self.params = params
+        self.rng = rng
+        self.n = params.total_nodes
+        self.replicates = replicates
+        self.rows = replicates * self.n
+        # Primeira linha da réplica de cada linha
+        self.base = np.repeat(np.arange(replicates, dtype=np.int64) * self.n, self.n)
+        self.active_size = params.active_size
+        self.passive_size = params.passive_size
+        self.active = np.full((self.rows, self.active_size), EMPTY, dtype=np.int64)
+        self.passive = np.full((self.rows, self.passive_size), EMPTY, dtype=np.int64)
+        # Histórico: códigos linha*R*N + passivo já vistos (ordenados) e contagem por linha
+        self.history = np.empty(0, dtype=np.int64)
+        self.history_count = np.zeros(self.rows, dtype=np.int64)
+        # Com --rng streams, as falhas vêm de blocos por (réplica, fase, ciclo)
+        self.streams = streams
+        self.cycle = 0
+
+    # ---------------------------------------------------------
+    # Sorteios
+    # ---------------------------------------------------------
+    def fail_draws(self, shape):
+        """Equivalente vetorizado de random.random() < sample_fail_prob(params)"""
+        p = np.clip(self.rng.normal(self.params.fail_mean, self.params.fail_std, shape), 0.0, 1.0)
+        return self.rng.random(shape) < p
+
+    def random_valid_slot(self, views):
+        """Sorteia, por linha, uma posição não vazia (linhas sem posição válida retornam lixo)"""
+        keys = self.rng.random(views.shape)
+        keys[views < 0] = 2.0
+        return keys.argmin(axis=1)
+
+    # ---------------------------------------------------------
+    # Inicialização
+    # ---------------------------------------------------------
+    def initialize_neighbors(self):
+        n, a, p = self.n, self.active_size, self.passive_size
+        k = min(a + p, n - 1)
+        ids = np.arange(self.rows)
+        if n <= SMALL_MESH:
+            # Uma réplica por vez: as chaves ocupam N x N, e não R*N x N (mesma sequência de sorteios)
+            chosen = np.empty((self.rows, k), dtype=np.int64)
+            local = np.arange(n)
+            for start in range(0, self.rows, n):
+                keys = self.rng.random((n, n))
+                keys[local, local] = 2.0
+                chosen[start:start + n] = np.argsort(keys, axis=1)[:, :k] + start
+        else:
+            chosen = self._draw_excluding_self(ids, k)
+            while True:
+                s = np.sort(chosen, axis=1)
+                dup = np.flatnonzero((s[:, 1:] == s[:, :-1]).any(axis=1))
+                if dup.size == 0:
+                    break
+                chosen[dup] = self._draw_excluding_self(dup, k)
+        n_active = min(a, k)
+        self.active[:, :n_active] = chosen[:, :n_active]
+        self.passive[:, :k - n_active] = chosen[:, n_active:]
+        self.record_history(ids)
+
+    def _draw_excluding_self(self, rows, k):
+        base = self.base[rows][:, None]
+        draws = self.rng.integers(0, self.n - 1, size=(rows.size, k))
+        draws += draws >= rows[:, None] - base
+        return draws + base
+
+    # ---------------------------------------------------------
+    # Passive View
+    # ---------------------------------------------------------
+    def replenish_passive(self, rows):
+        """Completa as posições vazias da Passive View das linhas indicadas"""
+        rows = rows[(self.passive[rows] < 0).any(axis=1)]
+        # Em redes muito pequenas a rejeição quase sempre falha; vai direto ao sorteio exato
+        attempts = REJECTION_ATTEMPTS if self.n > 2 * (self.active_size + self.passive_size) else 0
+        for _ in range(attempts):
+            if rows.size == 0 or self.n <= 1:
+                return
+            sub_p = self.passive[rows]
+            sub_a = self.active[rows]
+            missing = sub_p < 0
+            cand = self._draw_excluding_self(rows, self.passive_size)
+            proposed = np.where(missing, cand, sub_p)
+            # Rejeita candidatos já ativos, já passivos ou repetidos entre os novos (vale o primeiro)
+            in_active = (proposed[:, :, None] == sub_a[:, None, :]).any(axis=2)
+            same = proposed[:, :, None] == proposed[:, None, :]
+            in_passive = (same & ~missing[:, None, :]).any(axis=2)
+            repeated = (np.tril(same, k=-1) & missing[:, None, :]).any(axis=2)
+            accept = missing & ~in_active & ~in_passive & ~repeated
+            self.passive[rows] = np.where(accept, cand, sub_p)
+            rows = rows[(self.passive[rows] < 0).any(axis=1)]
+        # Poucos candidatos disponíveis (redes pequenas): sorteio exato linha a linha
+        if self.n <= 1:
+            return
+        for r in rows:
+            row = self.passive[r]
+            taken = np.concatenate(([r], self.active[r], row))
+            available = np.setdiff1d(np.arange(self.n) + self.base[r], taken[taken >= 0])
+            empty = np.flatnonzero(row < 0)
+            take = min(empty.size, available.size)
+            if take:
+                row[empty[:take]] = self.rng.choice(available, size=take, replace=False)
+
+    def record_history(self, rows):
+        """Acrescenta ao histórico os passivos atuais das linhas indicadas"""
+        sub = self.passive[rows]
+        valid = sub >= 0
+        codes = (np.repeat(rows, self.passive_size).reshape(sub.shape) * self.rows + sub)[valid]
+        if codes.size == 0:
+            return
+        codes = np.unique(codes)
+        # Posição de cada código no histórico ordenado: os ausentes são inseridos ali, numa
+        # intercalação O(H + k), sem reordenar o histórico inteiro a cada rodada
+        idx = np.searchsorted(self.history, codes)
+        if self.history.size:
+            found = self.history[np.minimum(idx, self.history.size - 1)] == codes
+            codes, idx = codes[~found], idx[~found]
+        if codes.size == 0:
+            return
+        self.history_count += np.bincount(codes // self.rows, minlength=self.rows)
+        self.history = np.insert(self.history, idx, codes)
+
+    # ---------------------------------------------------------
+    # Fases do ciclo
+    # ---------------------------------------------------------
+    def ping_phase(self):
+        valid = self.active >= 0
+        if self.streams is not None:
+            failed = self.streams.stacked(PING, self.cycle, self.replicates, self.n, self.active_size) & valid
+        else:
+            failed = self.fail_draws(self.active.shape) & valid
+        ping_messages = valid.sum(axis=1)
+        failed_ids = np.where(failed, self.active, EMPTY)
+        self.active[failed] = EMPTY
+        return ping_messages, failed_ids
+
+    def replace_phase(self, failed_ids, debug_rows=(), attempt_log=None):
+        """Substitui os ativos que falharam por passivos testados, em rodadas sobre todos os nós
+
+        Com attempt_log (lista), acrescenta a cada rodada os arrays (linhas, candidatos, ok)
+        das tentativas de todos os nós.
+        """
+        n_failed = (failed_ids >= 0).sum(axis=1)
+        test_messages = np.zeros(self.rows, dtype=np.int64)
+        attempts = {r: [] for r in debug_rows}
+
+        rows = np.flatnonzero(n_failed > 0)
+        if rows.size:
+            # Ordem de teste dos passivos e resultados dos pings sorteados de uma vez para a fase
+            order = np.argsort(self.rng.random((rows.size, self.passive_size)), axis=1)
+            if self.streams is not None:
+                fails = self.streams.stacked(REPLACE, self.cycle, self.replicates, self.n, self.passive_size)[rows]
+            else:
+                fails = self.fail_draws((rows.size, self.passive_size))
+            budget = n_failed[rows].copy()
+            local = np.arange(rows.size)
+            for k in range(self.passive_size):
+                slot = order[:, k]
+                cand = self.passive[rows, slot]
+                n_active = (self.active[rows] >= 0).sum(axis=1)
+                needs = (budget > 0) & (n_active < self.active_size)
+                if not needs.any():
+                    break
+                trying = needs & (cand >= 0)
+                t = local[trying]
+                r = rows[t]
+                self.passive[r, slot[t]] = EMPTY
+                test_messages[r] += 1
+                ok = ~fails[t, k]
+                r_ok = r[ok]
+                free = (self.active[r_ok] < 0).argmax(axis=1)
+                self.active[r_ok, free] = cand[t][ok]
+                budget[t[ok]] -= 1
+                if attempt_log is not None:
+                    attempt_log.append((r, cand[t], ok))
+                for dr in attempts:
+                    hit = np.flatnonzero(r == dr)
+                    if hit.size:
+                        attempts[dr].append((int(cand[t][hit[0]]), bool(ok[hit[0]])))
+
+        self.replenish_passive(np.arange(self.rows))
+        self.record_history(np.arange(self.rows))
+        return test_messages, attempts
+
+    def shuffle_phase(self):
+        """Troca parcial da Passive View com um vizinho ativo, em rodadas de pares disjuntos"""
+        pending = np.flatnonzero((self.active >= 0).any(axis=1))
+        while pending.size:
+            pending = self.rng.permutation(pending)
+            partners = self.active[pending, self.random_valid_slot(self.active[pending])]
+            # Cada nó participa de no máximo um par por rodada; vence o primeiro na ordem sorteada
+            m = pending.size
+            first = np.full(self.rows, m, dtype=np.int64)
+            pair_idx = np.arange(m)
+            np.minimum.at(first, np.concatenate((pending, partners)), np.concatenate((pair_idx, pair_idx)))
+            accept = (first[pending] == pair_idx) & (first[partners] == pair_idx)
+            i_rows, j_rows = pending[accept], partners[accept]
+            self._exchange(i_rows, j_rows)
+            touched = np.concatenate((i_rows, j_rows))
+            self.replenish_passive(touched)
+            self.record_history(touched)
+            pending = pending[~accept]
+
+    def _take_swap(self, rows, swap_count):
+        sub = self.passive[rows]
+        keys = self.rng.random(sub.shape)
+        keys[sub < 0] = 2.0
+        slots = np.argsort(keys, axis=1)[:, :swap_count]
+        taken = np.take_along_axis(sub, slots, axis=1)
+        np.put_along_axis(sub, slots, EMPTY, axis=1)
+        self.passive[rows] = sub
+        return taken
+
+    def _merge(self, rows, incoming):
+        sub = self.passive[rows]
+        keep = (incoming >= 0) & (incoming != rows[:, None])
+        keep &= ~(incoming[:, :, None] == self.active[rows][:, None, :]).any(axis=2)
+        keep &= ~(incoming[:, :, None] == sub[:, None, :]).any(axis=2)
+        merged = np.concatenate((sub, np.where(keep, incoming, EMPTY)), axis=1)
+        # Compacta os válidos no início; a troca nunca ultrapassa passive_size
+        order = np.argsort(merged < 0, axis=1, kind="stable")
+        self.passive[rows] = np.take_along_axis(merged, order, axis=1)[:, :self.passive_size]
+
+    def _exchange(self, i_rows, j_rows):
+        swap_count = max(1, int(self.passive_size * 0.3))
+        mine = self._take_swap(i_rows, swap_count)
+        theirs = self._take_swap(j_rows, swap_count)
+        self._merge(i_rows, theirs)
+        self._merge(j_rows, mine)
+
+
+def _sorted_ids(row):
+    return sorted(int(x) for x in row if x >= 0)
+
+
+def simulate_vectorized(params):
+    """Mesma simulação de sc.simulate_with_debug, com as fases executadas em lote pelo NumPy"""
+    streams = make_streams(params)
+    mesh = VectorMesh(params, np.random.default_rng(params.seed), streams=streams)
+    mesh.initialize_neighbors()
+
+    n = params.total_nodes
+    tracer = tracing.make_tracer(params)
+    debug_rows = list(tracer.nodes)
+    # Tentativas de substituição só são registradas por linha quando algum trace as usa
+    attempt_rows = debug_rows if tracer.debug or (tracer.logging and not tracer.log_all) else ()
+    all_rows = np.arange(n, dtype=np.int32)
+    avg_active_list = []
+    avg_passive_diversity_list = []
+    messages_per_cycle = []
+    total_messages = 0
+    convergence_cycle = None
+    writer = open_result_writer(params)
+    messages_per_node_cumulative = np.zeros(n, dtype=np.int64)
+    messages_per_node_evolution = {i: [] for i in debug_rows}
+    conn = connectivity.make_connectivity(params)
+
+    for cycle in range(params.max_cycles):
+        mesh.cycle = cycle
+        if tracer.summary:
+            print(f"\n=== CICLO {cycle} ===")
+        if tracer.debug:
+            for i in debug_rows:
+                print(f"\nNó {i} - Ativos iniciais: {_sorted_ids(mesh.active[i])} | Passivos iniciais: {_sorted_ids(mesh.passive[i])}")
+
+        # Pings
+        if tracer.debug or tracer.logging:
+            before = mesh.active.copy() if tracer.log_all else {i: mesh.active[i].copy() for i in debug_rows}
+        ping_messages, failed_ids = mesh.ping_phase()
+        if tracer.debug:
+            for i in debug_rows:
+                failed = _sorted_ids(failed_ids[i])
+                responded = sorted(set(_sorted_ids(before[i])) - set(failed))
+                print(f"\nNó {i} - Ping OK: {responded} | Ping FAIL: {failed}")
+        if tracer.log_all:
+            rows, slots = np.nonzero(before >= 0)
+            ok = failed_ids[rows, slots] < 0
+            tracer.events(cycle, rows[ok], tracing.PING_OK, before[rows[ok], slots[ok]])
+            tracer.events(cycle, rows[~ok], tracing.PING_FAIL, before[rows[~ok], slots[~ok]])
+        elif tracer.logging:
+            for i in debug_rows:
+                for neighbor in before[i][before[i] >= 0]:
+                    kind = tracing.PING_FAIL if (failed_ids[i] == neighbor).any() else tracing.PING_OK
+                    tracer.event(cycle, i, kind, int(neighbor))
+
+        # Substituições
+        attempt_log = [] if tracer.log_all else None
+        test_messages, attempts = mesh.replace_phase(failed_ids, attempt_rows, attempt_log)
+        if attempt_rows:
+            for i in debug_rows:
+                still_missing = (mesh.active[i] >= 0).sum() < params.active_size
+                for old, cand, status in _replacements([int(f) for f in failed_ids[i] if f >= 0], attempts[i],
+                                                       still_missing):
+                    if tracer.debug:
+                        _print_replacement(i, old, cand, status)
+                    if tracer.logging and not tracer.log_all:
+                        _log_replacement(tracer, cycle, i, old, cand, status)
+        if tracer.log_all:
+            # Em lote, o ativo substituído não é identificado (a = -1)
+            for rows, cands, ok in attempt_log:
+                tracer.events(cycle, rows[ok], tracing.REPLACE_OK, -1, cands[ok])
+                tracer.events(cycle, rows[~ok], tracing.REPLACE_FAIL, -1, cands[~ok])
+            # Os primeiros ativos que falharam foram substituídos; os restantes, em nós ainda
+            # incompletos, ficaram sem candidato
+            replaced = np.zeros(n, dtype=np.int64)
+            for rows, cands, ok in attempt_log:
+                np.add.at(replaced, rows[ok], 1)
+            missing = (mesh.active >= 0).sum(axis=1) < params.active_size
+            valid = failed_ids >= 0
+            rank = np.cumsum(valid, axis=1) - 1
+            rows, slots = np.nonzero(valid & missing[:, None] & (rank >= replaced[:, None]))
+            tracer.events(cycle, rows, tracing.NO_CANDIDATE, failed_ids[rows, slots])
+
+        # Shuffle
+        mesh.shuffle_phase()
+
+        cycle_messages_per_node = ping_messages + test_messages
+        if tracer.debug:
+            for i in debug_rows:
+                print(f"Nó {i} - Mensagens enviadas no ciclo: {cycle_messages_per_node[i]}")
+        if tracer.log_all:
+            tracer.events(cycle, all_rows, tracing.CYCLE_MESSAGES, cycle_messages_per_node)
+        elif tracer.logging:
+            for i in debug_rows:
+                tracer.event(cycle, i, tracing.CYCLE_MESSAGES, int(cycle_messages_per_node[i]))
+        messages_per_node_cumulative += cycle_messages_per_node
+        for i, evolution in messages_per_node_evolution.items():
+            evolution.append(int(messages_per_node_cumulative[i]))
+
+        # Métricas
+        active_counts = (mesh.active >= 0).sum(axis=1)
+        avg_active = float(active_counts.mean())
+        avg_active_list.append(avg_active)
+        avg_passive_diversity = float(mesh.history_count.mean())
+        avg_passive_diversity_list.append(avg_passive_diversity)
+        if convergence_cycle is None and (active_counts >= params.active_size).all():
+            convergence_cycle = cycle
+
+        cycle_messages = int(cycle_messages_per_node.sum())
+        total_messages += cycle_messages
+        messages_per_cycle.append(cycle_messages)
+
+        if tracer.summary:
+            sc.print_cycle_summary(avg_active, avg_passive_diversity, cycle_messages, total_messages)
+        if conn is not None:
+            conn.record(cycle, *connectivity.edges_from_matrix(mesh.active), show=tracer.summary)
+        writer.write_cycle(cycle, avg_active, avg_passive_diversity, cycle_messages, total_messages,
+                           active_counts, cycle_messages_per_node, messages_per_node_cumulative)
+
+    messages_per_node_cumulative = messages_per_node_cumulative.tolist()
+    writer.close(messages_per_node_cumulative)
+    tracer.close()
+    summary = sc.run_summary(params, convergence_cycle, avg_active_list, avg_passive_diversity_list, messages_per_cycle)
+    if conn is not None:
+        conn.close()
+        summary.update(conn.summary())
+    sc.report_convergence(convergence_cycle)
+    sc.save_summary(params, [summary])
+
+    final_active_counts = (mesh.active >= 0).sum(axis=1).tolist()
+    return (avg_active_list, avg_passive_diversity_list, final_active_counts, messages_per_cycle,
+            messages_per_node_evolution, messages_per_node_cumulative)
+
+
+def _replacements(failed, attempts, still_missing):
+    """Reconstrói o log de substituições do motor Python a partir das tentativas registradas"""
+    pending = iter(failed)
+    current = next(pending, None)
+    for cand, ok in attempts:
+        yield current, cand, "PING OK" if ok else "PING FAIL"
+        if ok:
+            current = next(pending, None)
+    if still_missing:
+        while current is not None:
+            yield current, None, "SEM CANDIDATO"
+            current = next(pending, None)
+
+
+def _print_replacement(node_id, old, cand, status):
+    if cand is None:
+        print(f"Nó {node_id} - Substituindo ativo {old}: {status} (sem candidatos na Passive View)")
+    else:
+        print(f"Nó {node_id} - Substituindo ativo {old} por passivo {cand} → {status}")
+
+
+def _log_replacement(tracer, cycle, node_id, old, cand, status):
+    if cand is None:
+        tracer.event(cycle, node_id, tracing.NO_CANDIDATE, old)
+    else:
+        kind = tracing.REPLACE_OK if status == "PING OK" else tracing.REPLACE_FAIL
+        tracer.event(cycle, node_id, kind, old, cand)
+
+
+def simulate_replicates(params):
+    """Simula params.replicates redes independentes em uma única chamada.
+
+    Retorna um dicionário com as séries por réplica (matrizes R x ciclos), o
+    ciclo de convergência de cada réplica (-1 quando não convergiu) e as
+    médias/desvios padrão entre réplicas em "mean" e "std".
+    """
+    replicates = params.replicates
+    n, cycles = params.total_nodes, params.max_cycles
+    streams = make_streams(params)
+    mesh = VectorMesh(params, np.random.default_rng(params.seed), replicates=replicates, streams=streams)
+    mesh.initialize_neighbors()
+
+    avg_active = np.zeros((replicates, cycles))
+    avg_passive_diversity = np.zeros((replicates, cycles))
+    messages_per_cycle = np.zeros((replicates, cycles), dtype=np.int64)
+    convergence_cycle = np.full(replicates, -1, dtype=np.int64)
+    # Réplicas não têm trace por nó nem log de eventos: só o resumo de cada ciclo segue --trace_level
+    tracer = tracing.Tracer(params.trace_level)
+
+    for cycle in range(cycles):
+        mesh.cycle = cycle
+        ping_messages, failed_ids = mesh.ping_phase()
+        test_messages, _ = mesh.replace_phase(failed_ids)
+        mesh.shuffle_phase()
+
+        active_counts = (mesh.active >= 0).sum(axis=1).reshape(replicates, n)
+        avg_active[:, cycle] = active_counts.mean(axis=1)
+        avg_passive_diversity[:, cycle] = mesh.history_count.reshape(replicates, n).mean(axis=1)
+        messages_per_cycle[:, cycle] = (ping_messages + test_messages).reshape(replicates, n).sum(axis=1)
+        converged = (convergence_cycle < 0) & (active_counts >= params.active_size).all(axis=1)
+        convergence_cycle[converged] = cycle
+
+        if tracer.summary:
+            print(f"Ciclo {cycle}: Média de ativos = {avg_active[:, cycle].mean():.2f} ± {avg_active[:, cycle].std():.2f} | "
+                  f"Mensagens no ciclo = {messages_per_cycle[:, cycle].mean():.1f} ± "
+                  f"{messages_per_cycle[:, cycle].std():.1f} | "
+                  f"Réplicas convergidas = {(convergence_cycle >= 0).sum()}/{replicates}")
+
+    series = {
+        "avg_active": avg_active,
+        "avg_passive_diversity": avg_passive_diversity,
+        "messages_per_cycle": messages_per_cycle,
+    }
+    result = dict(series)
+    result["convergence_cycle"] = convergence_cycle
+    result["mean"] = {key: values.mean(axis=0) for key, values in series.items()}
+    result["std"] = {key: values.std(axis=0) for key, values in series.items()}
+
+    save_replicates_csv(params, result)
+    sc.save_summary(params, [
+        sc.run_summary(params, int(cycle) if cycle >= 0 else None, avg_active[r], avg_passive_diversity[r],
+                       messages_per_cycle[r], replica=r)
+        for r, cycle in enumerate(convergence_cycle)
+    ])
+    converged = convergence_cycle[convergence_cycle >= 0]
+    if converged.size:
+        print(f"\nTempo de convergência médio: {converged.mean():.2f} ± {converged.std():.2f} ciclos "
+              f"({converged.size}/{replicates} réplicas convergiram)")
+    else:
+        print("\nNenhuma réplica convergiu totalmente dentro do limite de ciclos.")
+    return result
+
+
+def save_replicates_csv(params, result):
+    """Grava as curvas agregadas em csv_filename e o resumo por réplica em <base>_replicas.csv"""
+    if not params.csv_filename:
+        return
+    mean, std = result["mean"], result["std"]
+    with open(params.csv_filename, mode="w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Ciclo", "MediaAtivos", "MediaAtivos_std", "MediaDiversidadePassiva",
+                         "MediaDiversidadePassiva_std", "MensagensCiclo", "MensagensCiclo_std"])
+        for cycle in range(params.max_cycles):
+            writer.writerow([cycle, mean["avg_active"][cycle], std["avg_active"][cycle],
+                             mean["avg_passive_diversity"][cycle], std["avg_passive_diversity"][cycle],
+                             mean["messages_per_cycle"][cycle], std["messages_per_cycle"][cycle]])
+    print(f"\n📁 Médias entre réplicas salvas em: {params.csv_filename}")
+
+    base, ext = os.path.splitext(params.csv_filename)
+    replicas_filename = f"{base}_replicas.csv"
+    with open(replicas_filename, mode="w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Replica", "Convergiu", "TempoConvergencia", "MediaAtivosCiclo0", "MensagensTotais"])
+        for r, cycle in enumerate(result["convergence_cycle"]):
+            writer.writerow([r, int(cycle >= 0), int(cycle) if cycle >= 0 else "",
+                             result["avg_active"][r, 0], int(result["messages_per_cycle"][r].sum())])
+    print(f"📁 Resumo por réplica salvo em: {replicas_filename}")
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# Os módulos do simulador ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sc  # noqa: E402
+
+
+@pytest.fixture
+def make_params(tmp_path):
+    """Parâmetros do sc.py sem gráficos nem trace; com name, os resultados vão para <tmp_path>/<name>.csv"""
+    def factory(name=None, **overrides):
+        options = dict(plot_mode="none", trace_level="off",
+                       csv_filename=str(tmp_path / f"{name}.csv") if name else "")
+        options.update(overrides)
+        return sc.make_params(**options)
+    return factory
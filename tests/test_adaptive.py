@@ -0,0 +1,42 @@
+import pytest
+
+import run
+
+# Quantis 97,5% tabelados da t de Student
+T95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 8: 2.306, 10: 2.228, 20: 2.086, 29: 2.045}
+
+
+def adaptive_args(*argv):
+    """Opções do run.py com os padrões da linha de comando"""
+    return run.build_parser().parse_args(["--adaptive", *argv])
+
+
+def test_wilson_half_width_known_values():
+    # Intervalo de Wilson de 0/10 é [0, 0,2775]; o de 5/10 é [0,2366, 0,7634]
+    assert run.wilson_half_width(0, 10) == pytest.approx(0.2775 / 2, abs=1e-4)
+    assert run.wilson_half_width(5, 10) == pytest.approx((0.7634 - 0.2366) / 2, abs=1e-4)
+    assert run.wilson_half_width(0, 0) == float("inf")
+
+
+@pytest.mark.parametrize("df", sorted(T95))
+def test_t_quantile_matches_table(df):
+    assert run.t_quantile(df) == pytest.approx(T95[df], rel=1e-2)
+
+
+def test_default_ci_rate_is_reachable_at_fifty_percent():
+    default = run.build_parser().get_default("ci_rate")
+    widest = max(100 * run.wilson_half_width(k, run.repetitions) for k in range(run.repetitions + 1))
+    assert widest <= default
+
+
+def test_cell_target_rounds():
+    args = adaptive_args()
+    uncertain = {"rate_half": 30.0, "time_half": 0.5}
+    precise = {"rate_half": 10.0, "time_half": float("nan")}
+    assert run.cell_target(0, uncertain, args) == 5
+    assert run.cell_target(5, uncertain, args) == 10
+    assert run.cell_target(5, precise, args) == 5
+    # Lote incompleto (retomada) é completado antes de decidir
+    assert run.cell_target(7, precise, args) == 10
+    assert run.cell_target(run.repetitions, uncertain, args) == run.repetitions
+    assert run.cell_target(5, {"rate_half": 10.0, "time_half": 2.0}, args) == 10
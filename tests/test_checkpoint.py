@@ -0,0 +1,93 @@
+import json
+import functools
+
+import numpy as np
+import pytest
+
+import sc
+import checkpoint
+
+
+@pytest.fixture
+def run(tmp_path, make_params):
+    """Executa o motor python sem gráficos e devolve o resumo gravado"""
+    params = functools.partial(make_params, total_nodes=60, max_cycles=20, fail_mean=0.3, seed=9)
+
+    def execute(name, **overrides):
+        sc.simulate(params(name, **overrides))
+        with open(tmp_path / f"{name}_resumo.jsonl") as f:
+            return json.loads(f.readline())
+    return execute
+
+
+def test_resume_reproduces_uninterrupted_run(tmp_path, run):
+    full = run("full")
+    run("first", max_cycles=8, checkpoint=str(tmp_path / "r.ckpt"))
+    resumed = run("resumed", restore=str(tmp_path / "r.ckpt"))
+    assert resumed.pop("Ciclos_Restaurados") == 8
+    assert resumed == full
+
+
+def test_resumed_npy_table_holds_only_simulated_cycles(tmp_path, run):
+    run("full", output_format="npy")
+    run("first", max_cycles=8, checkpoint=str(tmp_path / "r.ckpt"))
+    run("resumed", output_format="npy", restore=str(tmp_path / "r.ckpt"))
+    full = np.load(tmp_path / "full_nos.npy")
+    resumed = np.load(tmp_path / "resumed_nos.npy")
+    assert len(resumed) == 12 * 60
+    assert np.array_equal(resumed, full[full["Ciclo"] >= 8])
+
+
+def test_roundtrip_keeps_views_and_random_state(tmp_path, make_params):
+    import random
+    sc.simulate(make_params(total_nodes=30, max_cycles=4, seed=2, checkpoint=str(tmp_path / "c.ckpt")))
+    expected_random = random.random()
+
+    ckpt = checkpoint.load_checkpoint(str(tmp_path / "c.ckpt"))
+    assert ckpt.cycle == 4
+    nodes = [sc.Node(i, 4, 6, 30) for i in range(30)]
+    ckpt.restore_nodes(nodes)
+    for i, node in enumerate(nodes):
+        assert list(node.active) == ckpt.view("active", i).tolist()
+        assert len(node.active) <= 4 and len(node.passive) <= 6
+    ckpt.restore_random()
+    assert random.random() == expected_random
+
+
+def test_branch_does_not_inherit_warmup_convergence(tmp_path, run):
+    # Aquecimento com poucas falhas converge logo; o cenário com muitas falhas não pode herdar isso
+    warmup = run("warmup", max_cycles=5, fail_mean=0.1, seed=4, checkpoint=str(tmp_path / "w.ckpt"))
+    assert warmup["Convergiu"]
+    fresh = run("fresh", max_cycles=30, fail_mean=0.55, seed=4)
+    branched = run("branched", max_cycles=30, fail_mean=0.55, restore=str(tmp_path / "w.ckpt"))
+
+    assert not fresh["Convergiu"]
+    assert not branched["Convergiu"]
+    assert branched["Tempo_Convergencia"] is None
+    assert branched["Ciclo_Ramificacao"] == 5
+    # Ciclo 0 do resumo é o primeiro após a ramificação, já sob as falhas do cenário
+    assert branched["Media_Ativos_Ciclo0"] < 4.0
+
+
+def test_branch_series_cover_only_post_branch_cycles(tmp_path, run, make_params):
+    run("warmup", max_cycles=5, fail_mean=0.3, seed=4, checkpoint=str(tmp_path / "w.ckpt"))
+    params = make_params(total_nodes=60, max_cycles=12, fail_mean=0.3, restore=str(tmp_path / "w.ckpt"), branch=True)
+    avg_active, diversity, final_counts, messages, evolution, cumulative = sc.simulate(params)
+    assert len(avg_active) == len(messages) == 7
+    assert sum(cumulative) == sum(messages)
+
+
+def test_resumed_branch_matches_uninterrupted_branch(tmp_path, run):
+    run("warmup", max_cycles=5, fail_mean=0.1, seed=4, checkpoint=str(tmp_path / "w.ckpt"))
+    whole = run("whole", max_cycles=25, restore=str(tmp_path / "w.ckpt"))
+    run("part", max_cycles=12, restore=str(tmp_path / "w.ckpt"), checkpoint=str(tmp_path / "b.ckpt"))
+    resumed = run("resumed", max_cycles=25, restore=str(tmp_path / "b.ckpt"))
+    assert resumed.pop("Ciclos_Restaurados") == 12
+    whole.pop("Ciclos_Restaurados")
+    assert resumed == whole
+
+
+def test_restore_rejects_other_network(tmp_path, run):
+    run("small", max_cycles=2, checkpoint=str(tmp_path / "s.ckpt"))
+    with pytest.raises(ValueError):
+        run("other", total_nodes=61, restore=str(tmp_path / "s.ckpt"))
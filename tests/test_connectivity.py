@@ -0,0 +1,66 @@
+from collections import deque
+
+import numpy as np
+
+import connectivity
+
+
+def random_overlay(n, degree, seed):
+    rng = np.random.default_rng(seed)
+    src = np.repeat(np.arange(n), degree)
+    dst = rng.integers(0, n, size=src.size)
+    keep = src != dst
+    return src[keep], dst[keep]
+
+
+def brute_distances(n, src, dst, start):
+    neighbors = [set() for _ in range(n)]
+    for a, b in zip(src.tolist(), dst.tolist()):
+        neighbors[a].add(b)
+        neighbors[b].add(a)
+    distance = {start: 0}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for other in neighbors[node]:
+            if other not in distance:
+                distance[other] = distance[node] + 1
+                queue.append(other)
+    return distance
+
+
+def test_component_labels_match_brute_force_bfs():
+    # Grau baixo: a rede se parte em várias componentes
+    n = 400
+    src, dst = random_overlay(n, 1, seed=3)
+    labels = connectivity.component_labels(n, src, dst)
+    unvisited = set(range(n))
+    while unvisited:
+        component = set(brute_distances(n, src, dst, min(unvisited)))
+        assert len({int(labels[i]) for i in component}) == 1
+        assert int((labels == labels[min(component)]).sum()) == len(component)
+        unvisited -= component
+
+
+def test_bfs_farthest_matches_brute_force_eccentricity():
+    n = 300
+    src, dst = random_overlay(n, 2, seed=5)
+    indptr, indices = connectivity.undirected_csr(n, src, dst)
+    for start in (0, 17, 123):
+        distance = brute_distances(n, src, dst, start)
+        far, depth = connectivity.bfs_farthest(indptr, indices, start)
+        assert depth == max(distance.values())
+        assert distance[far] == depth
+
+
+def test_overlay_metrics_on_known_graph():
+    # Caminho 0-1-2-3-4 (diâmetro 4), triângulo 5-6-7 e o nó 8 isolado
+    src = np.array([0, 1, 2, 3, 5, 6, 7])
+    dst = np.array([1, 2, 3, 4, 6, 7, 5])
+    metrics = connectivity.overlay_metrics(9, src, dst)
+    assert metrics["Componentes"] == 3
+    assert metrics["MaiorComponente"] == 5 / 9
+    assert metrics["DiametroEstimado"] == 4
+    assert metrics["SemEntrada"] == 2
+    assert metrics["GrauEntradaMax"] == 1
+    assert metrics["GrauEntradaMedio"] == 7 / 9
@@ -0,0 +1,117 @@
+import os
+
+import numpy as np
+import pytest
+
+import analysis
+
+
+def p2_reference(values, q):
+    """P² escalar (Jain e Chlamtac, 1985), observação por observação"""
+    heights = sorted(values[:5])
+    pos = [1, 2, 3, 4, 5]
+    desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+    step = [0, q / 2, q, (1 + q) / 2, 1]
+    for x in values[5:]:
+        if x < heights[0]:
+            heights[0], k = x, 0
+        elif x >= heights[4]:
+            heights[4], k = x, 3
+        else:
+            k = max(i for i in range(4) if heights[i] <= x)
+        for i in range(k + 1, 5):
+            pos[i] += 1
+        desired = [d + s for d, s in zip(desired, step)]
+        for i in (1, 2, 3):
+            d = desired[i] - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                s = 1 if d > 0 else -1
+                parabola = heights[i] + s / (pos[i + 1] - pos[i - 1]) * (
+                    (pos[i] - pos[i - 1] + s) * (heights[i + 1] - heights[i]) / (pos[i + 1] - pos[i])
+                    + (pos[i + 1] - pos[i] - s) * (heights[i] - heights[i - 1]) / (pos[i] - pos[i - 1]))
+                if heights[i - 1] < parabola < heights[i + 1]:
+                    heights[i] = parabola
+                else:
+                    heights[i] += s * (heights[i + s] - heights[i]) / (pos[i + s] - pos[i])
+                pos[i] += s
+    return heights[2]
+
+
+def ragged_runs(count, seed):
+    """Séries de comprimentos diferentes, com ciclos ausentes (NaN)"""
+    rng = np.random.default_rng(seed)
+    runs = []
+    for _ in range(count):
+        serie = rng.normal(3.0, 1.0, rng.integers(5, 12))
+        serie[rng.random(len(serie)) < 0.1] = np.nan
+        runs.append(serie)
+    return runs
+
+
+def padded(runs, ciclos=0):
+    matriz = np.full((len(runs), max(ciclos, *(len(r) for r in runs))), np.nan)
+    for i, serie in enumerate(runs):
+        matriz[i, :len(serie)] = serie
+    return matriz
+
+
+def test_welford_matches_numpy():
+    runs = ragged_runs(50, seed=1)
+    acumulador = analysis.AcumuladorWelford()
+    for serie in runs:
+        acumulador.adicionar(serie)
+    matriz = padded(runs)
+    assert np.allclose(acumulador.media, np.nanmean(matriz, axis=0))
+    assert np.allclose(acumulador.desvio(), np.nanstd(matriz, axis=0))
+    assert acumulador.n.tolist() == (~np.isnan(matriz)).sum(axis=0).tolist()
+
+
+def test_welford_combine_matches_pooled_numpy():
+    runs = ragged_runs(20, seed=2)
+    lote = np.random.default_rng(3).normal(5.0, 2.0, (8, 12))
+    acumulador = analysis.AcumuladorWelford()
+    for serie in runs:
+        acumulador.adicionar(serie)
+    acumulador.combinar(len(lote), lote.mean(axis=0), lote.std(axis=0))
+
+    matriz = np.vstack([padded(runs, ciclos=12), lote])
+    assert np.allclose(acumulador.media, np.nanmean(matriz, axis=0))
+    assert np.allclose(acumulador.desvio(), np.nanstd(matriz, axis=0))
+
+
+@pytest.mark.parametrize("q", analysis.QUANTIS)
+def test_p2_matches_scalar_reference(q):
+    matriz = np.random.default_rng(4).exponential(2.0, (400, 6))
+    acumulador = analysis.AcumuladorP2(q)
+    for linha in matriz:
+        acumulador.adicionar(linha)
+    esperado = [p2_reference(list(matriz[:, c]), q) for c in range(matriz.shape[1])]
+    assert np.allclose(acumulador.valor(), esperado)
+    # A estimativa fica próxima do quantil exato
+    assert np.allclose(acumulador.valor(), np.quantile(matriz, q, axis=0), rtol=0.15)
+
+
+def test_p2_is_exact_up_to_five_observations():
+    matriz = np.random.default_rng(5).normal(size=(5, 4))
+    matriz[4, 0] = np.nan
+    acumulador = analysis.AcumuladorP2(0.5)
+    for linha in matriz:
+        acumulador.adicionar(linha)
+    assert np.allclose(acumulador.valor(), np.nanquantile(matriz, 0.5, axis=0))
+
+
+def test_collected_curves_do_not_depend_on_workers(tmp_path):
+    rng = np.random.default_rng(6)
+    for p in ("prob0_1", "prob0_3"):
+        for rep in range(1, 7):
+            run_dir = tmp_path / "n10" / p / f"rep{rep}"
+            os.makedirs(run_dir)
+            (run_dir / "debug.txt").write_text("")
+            linhas = ["Ciclo,MediaAtivos,MensagensCiclo"]
+            linhas += [f"{c},{rng.random() * 4:.3f},{rng.integers(10, 50)}" for c in range(8)]
+            (run_dir / "res.csv").write_text("\n".join(linhas) + "\n")
+
+    serial = analysis.coletar_curvas(str(tmp_path), workers=1)
+    paralelo = analysis.coletar_curvas(str(tmp_path), workers=2)
+    assert len(serial) == 16
+    assert serial.equals(paralelo)
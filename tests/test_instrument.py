@@ -0,0 +1,47 @@
+import csv
+import random
+
+import pytest
+
+import sc
+import instrument
+
+
+def test_instrumented_run_writes_one_row_per_cycle(tmp_path, make_params):
+    sc.simulate(make_params("res", total_nodes=30, max_cycles=4, seed=1, instrument=True))
+    with open(tmp_path / "res_perf.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["Ciclo"] for row in rows] == ["0", "1", "2", "3"]
+    assert all(int(row["ChamadasRNG"]) > 0 and int(row["ChamadasReplenish"]) > 0 for row in rows)
+
+
+def test_patches_are_undone_when_the_run_fails(make_params, monkeypatch):
+    originals = (sc.random, sc.sample_excluding, sc.Node._replenish_passive)
+
+    def broken_shuffle(node, nodes):
+        raise RuntimeError("falha no meio do ciclo")
+
+    monkeypatch.setattr(sc.Node, "shuffle_passive", broken_shuffle)
+    with pytest.raises(RuntimeError):
+        sc.simulate(make_params("res", total_nodes=20, max_cycles=3, seed=1, instrument=True))
+    assert (sc.random, sc.sample_excluding, sc.Node._replenish_passive) == originals
+    assert sc.random is random
+    assert not hasattr(sc, "_instrument_originals")
+
+
+def test_counting_random_keeps_the_sequence():
+    counts = {"ChamadasRNG": 0}
+    wrapped = instrument._CountingRandom(random, counts)
+    random.seed(5)
+    expected = [random.random() for _ in range(3)]
+    random.seed(5)
+    assert [wrapped.random() for _ in range(3)] == expected
+    assert counts["ChamadasRNG"] == 3
+
+
+@pytest.mark.parametrize("overrides", [dict(engine="numpy"), dict(engine="des"), dict(replicates=3)])
+def test_instrument_is_rejected_outside_the_python_engine(make_params, overrides):
+    params = make_params("res", total_nodes=20, max_cycles=2, seed=1, instrument=True, **overrides)
+    run = sc.simulate_replicates if params.replicates > 1 else sc.simulate
+    with pytest.raises(SystemExit):
+        run(params)
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+import sc
+
+
+def test_counts_follow_active_changes():
+    stats = sc.MeshStats(3, 2)
+    assert stats.under_target == 3
+    stats.active_changed(0, 2)
+    stats.active_changed(0, 1)
+    assert (stats.active_total, stats.under_target) == (3, 2)
+    stats.active_changed(2, 1)
+    assert (stats.active_total, stats.under_target) == (2, 3)
+
+
+def test_zero_active_size_starts_on_target():
+    assert sc.MeshStats(10, 0).under_target == 0
+
+
+@pytest.mark.parametrize("engine", ["python", "des"])
+def test_zero_active_size_converges_at_cycle_zero(engine, tmp_path, make_params):
+    sc.simulate(make_params("res", total_nodes=20, active_size=0, max_cycles=3, seed=1, engine=engine))
+    with open(tmp_path / "res_resumo.jsonl") as f:
+        summary = json.loads(f.readline())
+    assert summary["Convergiu"] and summary["Tempo_Convergencia"] == 0
+
+
+def test_running_totals_match_nodes(make_params):
+    avg_active, diversity, final_counts, *_ = sc.simulate(make_params(total_nodes=40, max_cycles=5, seed=3))
+    assert avg_active[-1] == pytest.approx(sum(final_counts) / 40)
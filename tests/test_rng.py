@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+import sc
+import rng
+
+
+def test_block_depends_only_on_key():
+    streams = rng.FailureStreams(11, 0.3, 0.1)
+    first = streams.block(rng.PING, 4, 50, 4, replicate=2)
+    streams.block(rng.REPLACE, 0, 50, 6)
+    assert np.array_equal(streams.block(rng.PING, 4, 50, 4, replicate=2), first)
+    assert not np.array_equal(streams.block(rng.PING, 5, 50, 4, replicate=2), first)
+
+
+def test_stacked_replicate_matches_isolated_block():
+    streams = rng.FailureStreams(11, 0.3, 0.1)
+    stacked = streams.stacked(rng.REPLACE, 3, 4, 20, 6)
+    for r in range(4):
+        assert np.array_equal(stacked[r * 20:(r + 1) * 20], streams.block(rng.REPLACE, 3, 20, 6, replicate=r))
+
+
+def test_failure_rate_follows_fail_mean():
+    block = rng.FailureStreams(1, 0.3, 0.1).block(rng.PING, 0, 2000, 50)
+    assert abs(block.mean() - 0.3) < 0.01
+
+
+def test_des_engine_rejects_streams(make_params):
+    with pytest.raises(SystemExit):
+        sc.simulate(make_params(total_nodes=20, max_cycles=2, seed=1, engine="des", rng="streams"))
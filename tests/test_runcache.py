@@ -0,0 +1,70 @@
+import os
+import functools
+
+import pytest
+
+import runcache
+
+
+@pytest.fixture
+def params(make_params):
+    return functools.partial(make_params, "res", total_nodes=20, seed=1)
+
+
+def make_run_dir(path, content):
+    os.makedirs(path)
+    for name in ("res.csv", "debug.txt"):
+        with open(os.path.join(path, name), "w") as f:
+            f.write(f"{name}:{content}")
+    return str(path)
+
+
+def test_key_depends_on_results_not_paths(params):
+    assert runcache.run_key(params()) == runcache.run_key(params(graphs_dir="elsewhere"))
+    assert runcache.run_key(params()) != runcache.run_key(params(seed=2))
+    assert runcache.run_key(params()) != runcache.run_key(params(fail_mean=0.31))
+
+
+def test_fetch_hits_stored_entry_and_misses_others(tmp_path, params):
+    cache = runcache.RunCache(str(tmp_path / "cache"), float("inf"))
+    key = runcache.run_key(params())
+    cache.store(key, params(), make_run_dir(tmp_path / "run", "a"), results={"avg": [1.0]})
+
+    target = tmp_path / "copy"
+    target.mkdir()
+    assert cache.fetch(runcache.run_key(params(seed=2)), str(target), "debug.txt") == (False, None)
+    hit, results = cache.fetch(key, str(target), "debug.txt")
+    assert hit and results == {"avg": [1.0]}
+    assert sorted(os.listdir(target)) == ["debug.txt", "res.csv"]
+    assert (target / "res.csv").read_text() == "res.csv:a"
+    # O marcador é copiado por último: nunca é mais antigo que os demais arquivos
+    assert os.path.getmtime(target / "debug.txt") >= os.path.getmtime(target / "res.csv")
+
+
+def test_store_keeps_first_entry_and_leaves_no_temporaries(tmp_path, params):
+    cache = runcache.RunCache(str(tmp_path / "cache"), float("inf"))
+    key = runcache.run_key(params())
+    cache.store(key, params(), make_run_dir(tmp_path / "a", "a"))
+    cache.store(key, params(), make_run_dir(tmp_path / "b", "b"))
+    assert [name for name in os.listdir(os.path.dirname(cache.entry_dir(key)))] == [key]
+    with open(os.path.join(cache.entry_dir(key), "res.csv")) as f:
+        assert f.read() == "res.csv:a"
+
+
+def test_evict_removes_least_recently_used(tmp_path, params):
+    cache = runcache.RunCache(str(tmp_path / "cache"), float("inf"))
+    keys = [runcache.run_key(params(seed=seed)) for seed in range(3)]
+    for i, key in enumerate(keys):
+        cache.store(key, params(seed=i), make_run_dir(tmp_path / f"run{i}", i))
+        index = os.path.join(cache.entry_dir(key), runcache.INDEX_FILE)
+        os.utime(index, (1000 + i, 1000 + i))
+    # Usar a entrada mais antiga a torna a mais recente
+    target = tmp_path / "copy"
+    target.mkdir()
+    assert cache.fetch(keys[0], str(target), "debug.txt")[0]
+
+    size = sum(s for _, s, _ in cache.entries())
+    cache.max_bytes = size - 1
+    removed, total = cache.evict()
+    assert removed == 1 and total < size
+    assert sorted(os.path.basename(path) for _, _, path in cache.entries()) == sorted([keys[0], keys[2]])
@@ -0,0 +1,44 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+import sc
+import sc_vec
+
+
+def test_record_history_matches_naive_set(make_params):
+    params = make_params(total_nodes=50, max_cycles=1, seed=1)
+    rng = np.random.default_rng(7)
+    mesh = sc_vec.VectorMesh(params, rng, replicates=2)
+    seen = set()
+    for _ in range(40):
+        rows = rng.choice(mesh.rows, size=rng.integers(1, 20), replace=False)
+        # Passivos arbitrários (com posições vazias) dentro do bloco da réplica de cada linha
+        values = rng.integers(0, mesh.n, size=(rows.size, mesh.passive_size)) + mesh.base[rows][:, None]
+        mesh.passive[rows] = np.where(rng.random(values.shape) < 0.2, sc_vec.EMPTY, values)
+        mesh.record_history(rows)
+        for r in rows:
+            seen.update(int(r) * mesh.rows + int(v) for v in mesh.passive[r] if v >= 0)
+
+    assert mesh.history.tolist() == sorted(seen)
+    assert mesh.history_count.tolist() == np.bincount(mesh.history // mesh.rows, minlength=mesh.rows).tolist()
+
+
+@pytest.mark.parametrize("level, printed", [("off", 0), ("summary", 4)])
+def test_replicate_cycle_lines_follow_trace_level(make_params, capsys, level, printed):
+    sc.simulate_replicates(make_params(total_nodes=20, max_cycles=4, seed=1, replicates=3, trace_level=level))
+    lines = capsys.readouterr().out.splitlines()
+    assert sum(line.startswith("Ciclo ") for line in lines) == printed
+
+
+def test_small_mesh_initialization_memory_does_not_grow_with_replicates(make_params):
+    n, replicates = 300, 20
+    mesh = sc_vec.VectorMesh(make_params(total_nodes=n, seed=1), np.random.default_rng(1), replicates=replicates)
+    tracemalloc.start()
+    mesh.initialize_neighbors()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # Uma matriz de chaves R*N x N ocuparia replicates * n * n * 8 bytes
+    assert peak < replicates * n * n * 8 / 4
+    assert ((mesh.active // n) == np.arange(mesh.rows)[:, None] // n).all()
@@ -0,0 +1,60 @@
+import csv
+import json
+import functools
+
+import numpy as np
+import pytest
+
+import sc
+import topology
+
+
+@pytest.fixture
+def geo_params(make_params):
+    return functools.partial(make_params, total_nodes=200, max_cycles=6, fail_mean=0.2, seed=5, topology="geo",
+                             mean_degree=10)
+
+
+def test_radio_graph_matches_brute_force():
+    positions = np.random.default_rng(1).random((300, 2))
+    indptr, indices = topology.radio_graph(positions, 0.1)
+    d2 = ((positions[:, None, :] - positions[None, :, :]) ** 2).sum(axis=2)
+    for i in range(len(positions)):
+        expected = np.nonzero((d2[i] < 0.01) & (np.arange(len(positions)) != i))[0]
+        assert indices[indptr[i]:indptr[i + 1]].tolist() == expected.tolist()
+
+
+def test_link_failures_are_symmetric():
+    topo = topology.Topology(300, 0.1, 0.3, 0.1, seed=2)
+    fail = {}
+    for i in range(300):
+        for j, p in zip(topo.neighbors(i), topo.link_fail[topo.indptr[i]:topo.indptr[i + 1]]):
+            fail[i, int(j)] = p
+    assert all(fail[j, i] == p for (i, j), p in fail.items())
+
+
+def test_restore_rejects_topology_from_other_seed(tmp_path, geo_params):
+    sc.simulate(geo_params("warm", checkpoint=str(tmp_path / "g.ckpt")))
+    with pytest.raises(ValueError):
+        sc.simulate(geo_params("other", seed=6, max_cycles=10, restore=str(tmp_path / "g.ckpt")))
+
+
+def test_geo_resume_reproduces_uninterrupted_run(tmp_path, geo_params):
+    sc.simulate(geo_params("full", max_cycles=12))
+    sc.simulate(geo_params("warm", checkpoint=str(tmp_path / "g.ckpt")))
+    sc.simulate(geo_params("resumed", seed=None, max_cycles=12, restore=str(tmp_path / "g.ckpt")))
+    full = json.load(open(tmp_path / "full_resumo.jsonl"))
+    resumed = json.load(open(tmp_path / "resumed_resumo.jsonl"))
+    resumed.pop("Ciclos_Restaurados")
+    assert resumed == full
+
+
+def test_instrument_counts_geo_random_draws(tmp_path, geo_params):
+    sc.simulate(geo_params("perf", instrument=True))
+    with open(tmp_path / "perf_perf.csv") as f:
+        rows = list(csv.DictReader(f))
+    with open(tmp_path / "perf.csv") as f:
+        messages = [int(row["MensagensCiclo"]) for row in csv.DictReader(f)]
+    # Cada mensagem da topologia geo sorteia a perda do enlace pelo gerador instrumentado
+    assert all(int(row["ChamadasRNG"]) >= m for row, m in zip(rows, messages))
+    assert not hasattr(sc, "_instrument_originals")
@@ -0,0 +1,165 @@
+"""Topologia física: nós posicionados no plano e vizinhança por alcance de rádio.
+
+Com sc.py --topology geo, os nós são sorteados no quadrado unitário e só
+podem se conectar a nós dentro do alcance de rádio (--radio_range, ou o
+alcance que dá o grau médio --mean_degree). O grafo de alcance é montado
+com um índice espacial em grade (células do tamanho do alcance): cada nó só
+é comparado com os nós das 9 células vizinhas, então a construção custa
+O(N · grau) e não O(N²). A adjacência fica em formato CSR (indptr, indices),
+com os vizinhos de cada nó ordenados.
+
+Cada enlace recebe a sua probabilidade de falha, sorteada uma vez da
+gaussiana (fail_mean, fail_std) limitada a [0, 1] e igual nos dois
+sentidos; cada mensagem pelo enlace se perde com essa probabilidade. A
+escolha de candidatos (inicialização e reposição da Passive View) e as
+trocas do shuffle ficam restritas à vizinhança do nó, com custo O(grau).
+
+Posições e falhas dos enlaces vêm de um gerador próprio derivado da semente,
+então a mesma semente reproduz a mesma topologia. Os checkpoints guardam o
+hash do grafo (Topology.digest), e a restauração recusa um grafo diferente.
+Os sorteios da simulação (vizinhos, perdas) usam sc.random, o mesmo gerador
+dos nós comuns, que o --instrument conta.
+"""
+import random
+import hashlib
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+import sc
+
+# Chave do gerador da topologia (distinta das fases de rng.FailureStreams)
+TOPOLOGY_KEY = 2
+
+
+class Topology:
+    """Posições, adjacência CSR e probabilidade de falha de cada enlace"""
+
+    def __init__(self, total_nodes, radio_range, fail_mean, fail_std, seed):
+        gen = np.random.Generator(np.random.Philox(np.random.SeedSequence(seed, spawn_key=(0, TOPOLOGY_KEY, 0))))
+        self.total_nodes = total_nodes
+        self.radio_range = radio_range
+        self.positions = gen.random((total_nodes, 2))
+        self.indptr, self.indices = radio_graph(self.positions, radio_range)
+        self.link_fail = link_failures(self.indptr, self.indices, fail_mean, fail_std, gen)
+
+    @property
+    def degrees(self):
+        return np.diff(self.indptr)
+
+    def neighbors(self, node_id):
+        return self.indices[self.indptr[node_id]:self.indptr[node_id + 1]]
+
+    def digest(self):
+        """Hash do grafo de alcance (as falhas por enlace dependem de fail_mean/fail_std e podem mudar)"""
+        h = hashlib.sha256()
+        h.update(self.indptr.astype("<i8").tobytes())
+        h.update(self.indices.astype("<i4").tobytes())
+        return h.hexdigest()
+
+
+def radio_graph(positions, radio_range):
+    """Adjacência CSR (indptr int64, indices int32) dos pares a menos de radio_range"""
+    n = len(positions)
+    side = max(1, int(1.0 / radio_range))
+    cells = np.minimum((positions * side).astype(np.int64), side - 1)
+    cell_id = cells[:, 0] * side + cells[:, 1]
+
+    # Índice espacial: nós ordenados por célula e início/fim de cada célula nessa ordem
+    order = np.argsort(cell_id, kind="stable")
+    bounds = np.searchsorted(cell_id[order], np.arange(side * side + 1))
+
+    sources, targets = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            cx = cells[:, 0] + dx
+            cy = cells[:, 1] + dy
+            valid = (cx >= 0) & (cx < side) & (cy >= 0) & (cy < side)
+            src = np.nonzero(valid)[0]
+            other = cx[valid] * side + cy[valid]
+            start, count = bounds[other], bounds[other + 1] - bounds[other]
+            # Expande cada nó em todos os nós da célula vizinha, sem laço em Python
+            src = np.repeat(src, count)
+            offsets = np.arange(len(src)) - np.repeat(np.cumsum(count) - count, count)
+            dst = order[np.repeat(start, count) + offsets]
+            d2 = ((positions[src] - positions[dst]) ** 2).sum(axis=1)
+            keep = (d2 < radio_range * radio_range) & (src != dst)
+            sources.append(src[keep])
+            targets.append(dst[keep])
+
+    src = np.concatenate(sources)
+    dst = np.concatenate(targets)
+    edge_order = np.lexsort((dst, src))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst[edge_order].astype(np.int32)
+
+
+def link_failures(indptr, indices, fail_mean, fail_std, gen):
+    """Probabilidade de falha por enlace (alinhada a indices), a mesma nos dois sentidos"""
+    n = len(indptr) - 1
+    src = np.repeat(np.arange(n, dtype=np.int64), np.diff(indptr))
+    dst = indices.astype(np.int64)
+    p = np.clip(gen.normal(fail_mean, fail_std, len(indices)), 0.0, 1.0)
+    # As arestas estão ordenadas por (origem, destino): a chave origem*n+destino é crescente
+    reverse = np.searchsorted(src * n + dst, dst * n + src)
+    return np.where(src < dst, p, p[reverse])
+
+
+def radio_range_for(params):
+    """Alcance informado, ou o que dá grau médio mean_degree no quadrado unitário"""
+    if params.radio_range:
+        return params.radio_range
+    return float(np.sqrt(params.mean_degree / (np.pi * max(1, params.total_nodes - 1))))
+
+
+class GeoNode(sc.Node):
+    """Node restrito à vizinhança de rádio, com falha por enlace"""
+    __slots__ = ("neighbors", "link_fail")
+
+    def __init__(self, node_id, active_size, passive_size, total_nodes, stats=None, neighbors=(), link_fail=()):
+        super().__init__(node_id, active_size, passive_size, total_nodes, stats)
+        # Vizinhos ordenados (busca binária) e a probabilidade de falha de cada enlace
+        self.neighbors = array("i", neighbors)
+        self.link_fail = array("d", link_fail)
+
+    def _sample_peers(self, k, excluded):
+        candidates = [p for p in self.neighbors if p not in excluded]
+        return sc.random.sample(candidates, min(k, len(candidates)))
+
+    def _link_down(self, peer, params):
+        i = bisect_left(self.neighbors, peer)
+        if i == len(self.neighbors) or self.neighbors[i] != peer:
+            return True  # fora do alcance: a mensagem nunca chega
+        return sc.random.random() < self.link_fail[i]
+
+    def _merge_passive(self, peers):
+        # Nós recebidos no shuffle fora do alcance de rádio são descartados
+        neighbors = self.neighbors
+        for p in peers:
+            i = bisect_left(neighbors, p)
+            if (i < len(neighbors) and neighbors[i] == p
+                    and p not in self.active and p not in self.passive):
+                self.passive.append(p)
+
+
+def build_nodes(params, stats=None):
+    """Topologia da semente de params e os GeoNodes correspondentes (sem inicializar as visões)"""
+    if params.seed is None:
+        # Semente sorteada gravada em params, como em rng.make_streams: a topologia pode ser refeita
+        params.seed = random.SystemRandom().randrange(2**63)
+    topo = Topology(params.total_nodes, radio_range_for(params), params.fail_mean, params.fail_std, params.seed)
+    nodes = []
+    for i in range(params.total_nodes):
+        start, end = topo.indptr[i], topo.indptr[i + 1]
+        nodes.append(GeoNode(i, params.active_size, params.passive_size, params.total_nodes, stats,
+                             topo.indices[start:end].tobytes(), topo.link_fail[start:end].tobytes()))
+    return topo, nodes
+
+
+def describe(topo, active_size):
+    degrees = topo.degrees
+    return (f"Topologia geo: {topo.total_nodes} nós | alcance {topo.radio_range:.4f} | grau médio "
+            f"{degrees.mean():.1f} (mín. {degrees.min()}, máx. {degrees.max()}) | nós com grau < {active_size}: "
+            f"{int((degrees < active_size).sum())} | falha média dos enlaces {topo.link_fail.mean():.3f}")
@@ -0,0 +1,120 @@
+"""Rastreamento (trace) da simulação, com níveis e filtro por nó.
+
+Níveis (sc.py --trace_level):
+- off: nenhuma saída por ciclo (apenas resultados finais);
+- summary: cabeçalho e resumo de cada ciclo;
+- debug: além do resumo, listas, pings e substituições dos nós de debug_nodes.
+
+Os pontos de trace testam os atributos booleanos do Tracer (summary, debug,
+logging) antes de montar qualquer texto, então um nível desligado não custa
+ordenação nem formatação de strings.
+
+Com --trace_log, os eventos dos nós filtrados (ou de todos os nós, com
+--trace_log_all) são gravados em um log binário de registros de tamanho fixo,
+que pode ser decodificado depois com:
+
+    python3 tracing.py eventos.bin
+"""
+import sys
+import struct
+import argparse
+
+LEVELS = {"off": 0, "summary": 1, "debug": 2}
+
+# Tipos de evento do log binário
+PING_OK = 1          # a = vizinho
+PING_FAIL = 2        # a = vizinho
+REPLACE_OK = 3       # a = ativo substituído (-1 se desconhecido), b = passivo promovido
+REPLACE_FAIL = 4     # a = ativo substituído (-1 se desconhecido), b = passivo testado
+NO_CANDIDATE = 5     # a = ativo sem substituto
+CYCLE_MESSAGES = 6   # a = mensagens enviadas pelo nó no ciclo
+
+EVENT_NAMES = {
+    PING_OK: "PING OK",
+    PING_FAIL: "PING FAIL",
+    REPLACE_OK: "SUBSTITUICAO OK",
+    REPLACE_FAIL: "SUBSTITUICAO FAIL",
+    NO_CANDIDATE: "SEM CANDIDATO",
+    CYCLE_MESSAGES: "MENSAGENS",
+}
+
+MAGIC = b"NMTR\x01"
+# ciclo, nó, tipo, a, b (little-endian, sem alinhamento: 17 bytes por evento)
+RECORD = struct.Struct("<IiBii")
+NUMPY_RECORD = [("cycle", "<u4"), ("node", "<i4"), ("kind", "u1"), ("a", "<i4"), ("b", "<i4")]
+
+
+class Tracer:
+    __slots__ = ("summary", "debug", "nodes", "logging", "log_all", "_log", "_pack")
+
+    def __init__(self, level="debug", nodes=(), event_log=None, log_all=False):
+        self.summary = LEVELS[level] >= LEVELS["summary"]
+        self.debug = LEVELS[level] >= LEVELS["debug"]
+        self.nodes = tuple(nodes)
+        self.logging = event_log is not None
+        self.log_all = self.logging and log_all
+        self._log = None
+        if self.logging:
+            self._log = open(event_log, "wb")
+            self._log.write(MAGIC)
+        self._pack = RECORD.pack
+
+    def event(self, cycle, node, kind, a=-1, b=-1):
+        # Só deve ser chamado quando self.logging é verdadeiro
+        self._log.write(self._pack(cycle, node, kind, a, b))
+
+    def events(self, cycle, nodes, kind, a, b=None):
+        """Grava um lote de eventos a partir de arrays NumPy (motor vetorizado)"""
+        import numpy as np
+        block = np.empty(len(nodes), dtype=NUMPY_RECORD)
+        block["cycle"] = cycle
+        block["node"] = nodes
+        block["kind"] = kind
+        block["a"] = a
+        block["b"] = -1 if b is None else b
+        self._log.write(block.tobytes())
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+def make_tracer(params):
+    return Tracer(params.trace_level, [i for i in params.debug_nodes if i < params.total_nodes],
+                  params.trace_log, params.trace_log_all)
+
+
+def read_events(path):
+    """Lê um log binário, devolvendo tuplas (ciclo, nó, tipo, a, b)"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} não é um log de eventos do simulador")
+        while True:
+            chunk = f.read(RECORD.size * 4096)
+            if not chunk:
+                break
+            yield from RECORD.iter_unpack(chunk)
+
+
+def format_event(cycle, node, kind, a, b):
+    name = EVENT_NAMES.get(kind, f"EVENTO {kind}")
+    if kind in (REPLACE_OK, REPLACE_FAIL):
+        old = "?" if a < 0 else a
+        return f"Ciclo {cycle} | Nó {node} - {name}: ativo {old} → passivo {b}"
+    return f"Ciclo {cycle} | Nó {node} - {name}: {a}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decodifica um log binário de eventos gerado com sc.py --trace_log")
+    parser.add_argument("event_log")
+    parser.add_argument("--nodes", nargs="+", type=int, default=None, help="Mostra apenas estes nós")
+    args = parser.parse_args()
+
+    wanted = set(args.nodes) if args.nodes else None
+    try:
+        for record in read_events(args.event_log):
+            if wanted is None or record[1] in wanted:
+                print(format_event(*record))
+    except BrokenPipeError:
+        sys.stderr.close()